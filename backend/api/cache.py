@@ -0,0 +1,77 @@
+"""
+In-process response caching utilities
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from functools import wraps
+
+
+class TTLCache:
+    """Small LRU cache whose entries expire after ttl seconds"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+
+def cached(cache, key_func):
+    """Cache an async function's result and coalesce concurrent calls
+
+    Callers asking for a key that is already being computed await the same
+    task instead of issuing another backend request. The wrapper returns
+    ``(value, cache_hit)``.
+    """
+    in_flight = {}
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = key_func(*args, **kwargs)
+
+            value = cache.get(key)
+            if value is not None:
+                return value, True
+
+            task = in_flight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(func(*args, **kwargs))
+                in_flight[key] = task
+                try:
+                    value = await asyncio.shield(task)
+                    cache.set(key, value)
+                finally:
+                    in_flight.pop(key, None)
+                return value, False
+
+            return await asyncio.shield(task), True
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
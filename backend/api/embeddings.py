@@ -0,0 +1,36 @@
+"""
+Sentence embedding utilities for similarity search
+"""
+
+import os
+from functools import lru_cache
+
+# Optional - only needed to embed claims indexed before embeddings existed
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
+# Must match EMBEDDING_MODEL used by the crawler's EmbeddingPipeline
+EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+
+
+@lru_cache(maxsize=1)
+def get_encoder():
+    """Load the sentence-transformers model once per process"""
+    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+        return None
+    try:
+        return SentenceTransformer(EMBEDDING_MODEL, device='cpu')
+    except Exception as e:
+        print(f"Failed to load embedding model: {e}")
+        return None
+
+
+def encode(text):
+    """Embed a single text, or return None if no model is available"""
+    encoder = get_encoder()
+    if encoder is None or not text:
+        return None
+    return encoder.encode(text, normalize_embeddings=True).tolist()
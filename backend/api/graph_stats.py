@@ -0,0 +1,139 @@
+"""
+Knowledge graph statistics
+Node and relationship counts come from Neo4j's count store, which answers
+single-label / single-type counts without scanning. Company degrees are
+scanned a batch at a time on each refresh, so hub metrics converge over a
+few cycles instead of walking the whole graph at once.
+"""
+
+import asyncio
+import os
+import threading
+from datetime import datetime
+from starlette.concurrency import run_in_threadpool
+
+GRAPH_STATS_REFRESH_SECONDS = int(os.getenv("GRAPH_STATS_REFRESH_SECONDS", 300))
+DEGREE_BATCH_SIZE = int(os.getenv("GRAPH_STATS_DEGREE_BATCH", 5000))
+
+# Upper bounds of the degree distribution buckets
+DEGREE_BUCKETS = [0, 1, 4, 9, 49, 99]
+
+# Pages by internal node id: label scans return nodes in id order, so the
+# planner needs no sort and degrees are only counted for the page itself.
+# elementId() strings had to be built and sorted for every company per batch.
+DEGREE_QUERY = """
+MATCH (c:Company)
+WHERE id(c) > $after
+WITH c
+ORDER BY id(c)
+LIMIT $limit
+RETURN id(c) AS node_id, c.company_id AS company_id, c.name AS name, COUNT { (c)--() } AS degree
+"""
+
+
+def quote(name):
+    """Backtick-quote a label or relationship type for interpolation"""
+    return "`" + name.replace("`", "``") + "`"
+
+
+def bucket_name(degree):
+    lower = 0
+    for upper in DEGREE_BUCKETS:
+        if degree <= upper:
+            return str(upper) if lower == upper else f"{lower}-{upper}"
+        lower = upper + 1
+    return f"{lower}+"
+
+
+class GraphStats:
+    """Periodically refreshed snapshot of graph-wide statistics"""
+
+    def __init__(self, degree_batch_size=DEGREE_BATCH_SIZE, top_n=20):
+        self.degree_batch_size = degree_batch_size
+        self.top_n = top_n
+        self.snapshot = None
+        self._degrees = {}      # node id -> (company id, name, degree)
+        self._seen = set()      # node ids seen in the current degree pass
+        self._after = -1        # last node id of the previous batch
+        self._lock = threading.Lock()
+
+    def count_nodes(self, session):
+        labels = [record["label"] for record in session.run("CALL db.labels() YIELD label")]
+        return {
+            label: session.run(f"MATCH (n:{quote(label)}) RETURN count(n) AS count").single()["count"]
+            for label in labels
+        }
+
+    def count_relationships(self, session):
+        types = [
+            record["relationshipType"]
+            for record in session.run("CALL db.relationshipTypes() YIELD relationshipType")
+        ]
+        return {
+            rel_type: session.run(f"MATCH ()-[r:{quote(rel_type)}]->() RETURN count(r) AS count").single()["count"]
+            for rel_type in types
+        }
+
+    def scan_degrees(self, session):
+        """Update degrees for the next batch of companies"""
+        records = list(session.run(DEGREE_QUERY, after=self._after, limit=self.degree_batch_size))
+        for record in records:
+            self._degrees[record["node_id"]] = (
+                record["company_id"] or record["name"], record["name"], record["degree"]
+            )
+            self._seen.add(record["node_id"])
+
+        if len(records) < self.degree_batch_size:
+            # Finished a full pass: forget companies that no longer exist
+            self._degrees = {key: value for key, value in self._degrees.items() if key in self._seen}
+            self._seen = set()
+            self._after = -1
+        else:
+            self._after = records[-1]["node_id"]
+
+    def degree_summary(self):
+        distribution = {}
+        for _, _, degree in self._degrees.values():
+            bucket = bucket_name(degree)
+            distribution[bucket] = distribution.get(bucket, 0) + 1
+
+        hubs = sorted(self._degrees.values(), key=lambda value: value[2], reverse=True)[:self.top_n]
+        return {
+            "degree_distribution": distribution,
+            "top_hubs": [
+                {"id": company_id, "name": name, "degree": degree}
+                for company_id, name, degree in hubs
+            ],
+            "companies_scanned": len(self._degrees),
+        }
+
+    def refresh(self, driver):
+        with self._lock:
+            with driver.session() as session:
+                nodes = self.count_nodes(session)
+                relationships = self.count_relationships(session)
+                self.scan_degrees(session)
+
+            self.snapshot = {
+                "nodes": nodes,
+                "relationships": relationships,
+                **self.degree_summary(),
+                "updated_at": datetime.utcnow().isoformat(),
+            }
+        return self.snapshot
+
+    async def run_periodically(self, get_driver, interval=GRAPH_STATS_REFRESH_SECONDS):
+        """Refresh forever; started as a background task on app startup"""
+        while True:
+            driver = get_driver()
+            if driver:
+                try:
+                    await run_in_threadpool(self.refresh, driver)
+                except Exception as e:
+                    print(f"Graph stats refresh failed: {e}")
+                finally:
+                    driver.close()
+            await asyncio.sleep(interval)
+
+
+graph_stats = GraphStats()
@@ -0,0 +1,206 @@
+"""
+Knowledge graph traversal
+Breadth-first expansion from a company, one bounded subquery per
+relationship type and hop, instead of a single pattern whose OPTIONAL
+MATCHes multiply into a cartesian product
+"""
+
+import base64
+import json
+from fastapi import HTTPException
+
+# How each node label expands: (relationship, direction, neighbour label)
+EXPANSIONS = {
+    "Company": [
+        ("MAKES_CLAIM", "out", "Claim"),
+        ("MENTIONS", "in", "NewsArticle"),
+        ("MENTIONS", "in", "Publication"),
+    ],
+    "NewsArticle": [("MENTIONS", "out", "Company")],
+    "Publication": [("MENTIONS", "out", "Company")],
+    "Claim": [],
+}
+
+# Label -> (API node type, id property, label property)
+NODE_TYPES = {
+    "Company": ("company", "company_id", "name"),
+    "Claim": ("claim", "claim_id", "claim_text"),
+    "NewsArticle": ("news", "article_id", "title"),
+    "Publication": ("publication", "publication_id", "title"),
+}
+
+EXPAND_QUERY = """
+MATCH (n:{source}) WHERE elementId(n) IN $frontier
+MATCH (n){pattern}(m:{target})
+WITH DISTINCT n, m
+ORDER BY elementId(m)
+SKIP $skip LIMIT $limit
+RETURN elementId(n) AS from_id, elementId(m) AS to_id, {node} AS m
+"""
+
+# Node types in the order compact responses index them
+COMPACT_NODE_TYPES = [api_type for api_type, _, _ in NODE_TYPES.values()]
+
+
+def encode_graph_cursor(offsets):
+    payload = json.dumps(offsets, sort_keys=True)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_graph_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        offsets = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return {key: int(value) for key, value in offsets.items()}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def node_key(label, node, element_id):
+    """Public id of a node
+
+    Companies created from news/publication mentions only have a name.
+    """
+    _, id_property, _ = NODE_TYPES[label]
+    return node.get(id_property) or node.get("name") or element_id
+
+
+def node_label(label, node):
+    _, _, label_property = NODE_TYPES[label]
+    text = node.get(label_property) or ""
+    if label == "Claim":
+        return text[:50] + "..."
+    return text or "Unknown"
+
+
+def expansion_key(relationship, direction, target):
+    return f"{relationship}:{direction}:{target}"
+
+
+def node_projection(variable, label, properties):
+    """Whole node, or only what ids and labels need"""
+    if properties:
+        return variable
+    _, id_property, label_property = NODE_TYPES[label]
+    # node_key() falls back to the name of mention-only companies
+    names = "" if label_property == "name" else ", .name"
+    return f"{variable} {{.{id_property}, .{label_property}{names}}}"
+
+
+class GraphTraversal:
+    """Collects deduplicated nodes and edges around a company
+
+    Every (hop, relationship type) expansion returns at most limit_per_type
+    neighbours. The continuation cursor pages through the root company's
+    direct neighbours per type; deeper hops are capped, not paged.
+    """
+
+    def __init__(self, session, depth=1, limit_per_type=50, properties=True):
+        self.session = session
+        self.depth = depth
+        self.limit_per_type = limit_per_type
+        self.properties = properties
+        self.nodes = {}     # element id -> (label, node)
+        self.edges = set()  # (source element id, type, target element id)
+
+    def expand(self, label, frontier, relationship, direction, target, skip):
+        pattern = f"-[:{relationship}]->" if direction == "out" else f"<-[:{relationship}]-"
+        query = EXPAND_QUERY.format(
+            source=label, pattern=pattern, target=target,
+            node=node_projection("m", target, self.properties)
+        )
+        records = list(self.session.run(
+            query,
+            frontier=frontier,
+            skip=skip,
+            limit=self.limit_per_type
+        ))
+
+        # Nodes already reached by another path are not expanded again, but
+        # their edges are kept
+        reached = []
+        for record in records:
+            to_id = record["to_id"]
+            if to_id not in self.nodes:
+                self.nodes[to_id] = (target, record["m"])
+                reached.append(to_id)
+            if direction == "out":
+                self.edges.add((record["from_id"], relationship, to_id))
+            else:
+                self.edges.add((to_id, relationship, record["from_id"]))
+
+        return reached, len(records)
+
+    def run(self, company_id, cursor=None):
+        """Traverse from a company, returning (found, next_cursor)"""
+        root = self.session.run(
+            "MATCH (c:Company {company_id: $company_id}) "
+            f"RETURN {node_projection('c', 'Company', self.properties)} AS c, elementId(c) AS id LIMIT 1",
+            company_id=company_id
+        ).single()
+        if root is None:
+            return False, None
+
+        self.nodes[root["id"]] = ("Company", root["c"])
+        offsets = decode_graph_cursor(cursor) if cursor else {}
+        next_offsets = {}
+
+        frontier = {"Company": [root["id"]]}
+        for hop in range(1, self.depth + 1):
+            next_frontier = {}
+            for label, element_ids in frontier.items():
+                for relationship, direction, target in EXPANSIONS[label]:
+                    key = expansion_key(relationship, direction, target)
+                    skip = offsets.get(key, 0) if hop == 1 else 0
+                    if skip < 0:
+                        # Exhausted on an earlier page
+                        next_offsets[key] = -1
+                        continue
+
+                    reached, returned = self.expand(label, element_ids, relationship, direction, target, skip)
+                    next_frontier.setdefault(target, []).extend(reached)
+                    if hop == 1:
+                        more = returned == self.limit_per_type
+                        next_offsets[key] = skip + returned if more else -1
+
+            frontier = {label: ids for label, ids in next_frontier.items() if ids}
+            if not frontier:
+                break
+
+        has_more = any(offset >= 0 for offset in next_offsets.values())
+        return True, encode_graph_cursor(next_offsets) if has_more else None
+
+    def node_keys(self):
+        return {
+            element_id: node_key(label, node, element_id)
+            for element_id, (label, node) in self.nodes.items()
+        }
+
+    def compact(self, next_cursor=None):
+        """Columnar nodes and edges, with edges and types as integer indices
+
+        Node properties are left out; fetch them per node from
+        /api/graph/node/{type}/{id}.
+        """
+        index = {}
+        ids, labels, types = [], [], []
+        for element_id, (label, node) in self.nodes.items():
+            index[element_id] = len(ids)
+            ids.append(node_key(label, node, element_id))
+            labels.append(node_label(label, node))
+            types.append(COMPACT_NODE_TYPES.index(NODE_TYPES[label][0]))
+
+        edge_types = sorted({edge_type for _, edge_type, _ in self.edges})
+        sources, targets, type_indices = [], [], []
+        for source, edge_type, target in sorted(self.edges):
+            sources.append(index[source])
+            targets.append(index[target])
+            type_indices.append(edge_types.index(edge_type))
+
+        return {
+            "node_types": COMPACT_NODE_TYPES,
+            "edge_types": edge_types,
+            "nodes": {"id": ids, "label": labels, "type": types},
+            "edges": {"source": sources, "target": targets, "type": type_indices},
+            "next_cursor": next_cursor,
+        }
@@ -0,0 +1,110 @@
+"""
+HTTP caching helpers
+ETag / Last-Modified validators, conditional GET checks and per-route
+Cache-Control policies
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Response
+
+# Cache-Control per GET route template. Routes listed here also get a
+# body-hash ETag from HTTPCacheMiddleware unless they set their own.
+CACHE_POLICIES = {
+    "/api/companies/": "public, max-age=30",
+    "/api/companies/{company_id}": "public, max-age=60, must-revalidate",
+    "/api/companies/{company_id}/score": "public, max-age=300",
+    "/api/claims/": "public, max-age=30",
+    "/api/claims/types/summary": "public, max-age=300",
+    "/api/claims/values/summary": "public, max-age=300",
+    "/api/claims/{claim_id}": "public, max-age=300, must-revalidate",
+    "/api/graph/company/{company_id}": "public, max-age=120, must-revalidate",
+    "/api/graph/node/{node_type}/{node_id}": "public, max-age=300",
+    "/api/graph/relationships": "public, max-age=300",
+    "/api/graph/rankings": "public, max-age=300",
+    "/api/graph/communities": "public, max-age=300",
+    "/api/graph/company/{company_id}/similar": "public, max-age=300",
+    "/api/analytics/overview": "public, max-age=60",
+    "/api/analytics/trends": "public, max-age=300",
+    "/api/analytics/sentiment": "public, max-age=300",
+}
+
+# Source fields that record when a document last changed, most specific first
+TIMESTAMP_FIELDS = ["updated_at", "crawled_at", "extracted_at"]
+
+
+def make_etag(*parts):
+    """Weak ETag - responses may be re-encoded (gzip/br) in transit"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def http_date(value):
+    """RFC 7231 date from an ISO timestamp, or None if it cannot be parsed"""
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return format_datetime(parsed.astimezone(timezone.utc), usegmt=True)
+
+
+def document_validators(doc, *variant):
+    """ETag and Last-Modified for an Elasticsearch get response
+
+    The ETag is keyed on the document version (_primary_term/_seq_no), plus
+    anything else that changes the body for the same document such as a
+    fields= projection.
+    """
+    headers = {
+        "ETag": make_etag(
+            doc.get("_index"), doc.get("_id"),
+            doc.get("_primary_term"), doc.get("_seq_no"), *variant
+        )
+    }
+    source = doc.get("_source") or {}
+    for field in TIMESTAMP_FIELDS:
+        if source.get(field):
+            modified = http_date(source[field])
+            if modified:
+                headers["Last-Modified"] = modified
+            break
+    return headers
+
+
+def etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(request_headers, validators):
+    """Whether a conditional GET can be answered with 304
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 7232 6).
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return "ETag" in validators and etag_matches(if_none_match, validators["ETag"])
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since and "Last-Modified" in validators:
+        try:
+            return parsedate_to_datetime(validators["Last-Modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def not_modified(validators):
+    return Response(status_code=304, headers=validators)
@@ -5,16 +5,29 @@ Main API application with routes for accessing crawler data
 
 from fastapi import FastAPI, HTTPException, Depends, Query, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 from typing import List, Optional
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 
-from .routes import companies, claims, search, analytics, graph
+from .routes import companies, claims, search, analytics, graph, export, watchlist
 from .database import get_elasticsearch, get_neo4j, get_mongodb
 from .models import HealthCheck
 from .crawler_endpoint import router as crawler_router
+from .serialization import FAST_SERIALIZATION, FastJSONResponse
+from .middleware import PayloadMetricsMiddleware, HTTPCacheMiddleware, payload_sizes
+from .graph_stats import graph_stats
+from .graph_analytics import graph_analytics
+import asyncio
+
+# Optional - brotli for clients that accept it, gzip otherwise
+try:
+    from brotli_asgi import BrotliMiddleware
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
 
 # Load environment variables
 load_dotenv()
@@ -25,9 +38,16 @@ app = FastAPI(
     description="Corporate Sustainability Claims Verification Platform",
     version="1.0.0",
     docs_url="/api/docs",
-    redoc_url="/api/redoc"
+    redoc_url="/api/redoc",
+    # orjson for every route when the fast path is enabled
+    default_response_class=FastJSONResponse if FAST_SERIALIZATION else JSONResponse
 )
 
+# Middleware added first runs innermost. Conditional GET sits inside CORS so
+# 304s still carry CORS headers, and compression is outermost so payload
+# metrics record uncompressed sizes.
+app.add_middleware(HTTPCacheMiddleware)
+
 # CORS middleware
 allowed_origins = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
 
@@ -37,14 +57,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Response size per endpoint, reported at /api/metrics/payloads
+app.add_middleware(PayloadMetricsMiddleware)
+
+# Compress large payloads such as /api/graph/company/{id}
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))
+if BROTLI_AVAILABLE:
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+else:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE)
+
 # Include routers
 app.include_router(companies.router, prefix="/api/companies", tags=["Companies"])
 app.include_router(claims.router, prefix="/api/claims", tags=["Claims"])
 app.include_router(search.router, prefix="/api/search", tags=["Search"])
 app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
 app.include_router(graph.router, prefix="/api/graph", tags=["Knowledge Graph"])
+app.include_router(export.router, prefix="/api/export", tags=["Export"])
+app.include_router(watchlist.router, prefix="/api/watchlist", tags=["Watchlist"])
 app.include_router(crawler_router, tags=["Live Crawler"])
 
 
@@ -104,17 +137,55 @@ async def health_check():
     )
 
 
+@app.get("/api/metrics/payloads", tags=["Health"])
+async def payload_metrics():
+    """Response body sizes per endpoint"""
+    return payload_sizes.summary()
+
+
+@app.get("/api/metrics/projection", tags=["Health"])
+def projection_metrics():
+    """Lag of the MongoDB -> Elasticsearch/Neo4j outbox projection
+
+    Reported by the projector after every poll; state_age_seconds is how
+    long ago that was.
+    """
+    client = get_mongodb()
+    if not client:
+        raise HTTPException(status_code=503, detail="MongoDB unavailable")
+
+    try:
+        db = client[os.getenv("MONGODB_DB", "ecotrace")]
+        state = db["projector_state"].find_one({"_id": "outbox"}, {"_id": 0})
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"MongoDB error: {str(e)}")
+    finally:
+        client.close()
+
+    if not state:
+        raise HTTPException(status_code=404, detail="The outbox projector has not run yet")
+    state["state_age_seconds"] = round((datetime.utcnow() - state["updated_at"]).total_seconds(), 1)
+    return state
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize connections on startup"""
     print("Starting EcoTrace API...")
     print(f"Allowed CORS origins: {allowed_origins}")
 
+    # Keep /api/graph/relationships off the request path
+    app.state.graph_stats_task = asyncio.create_task(graph_stats.run_periodically(get_neo4j))
+    # PageRank, communities and similarity (GRAPH_ANALYTICS_INTERVAL=0 disables)
+    app.state.graph_analytics_task = asyncio.create_task(graph_analytics.run_periodically(get_neo4j))
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Clean up on shutdown"""
     print("Shutting down EcoTrace API...")
+    app.state.graph_stats_task.cancel()
+    app.state.graph_analytics_task.cancel()
 
 
 if __name__ == "__main__":
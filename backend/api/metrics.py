@@ -0,0 +1,73 @@
+"""
+Lightweight in-process latency and payload metrics
+"""
+
+from collections import deque
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class LatencyTracker:
+    """Keeps the most recent request latencies and reports percentiles"""
+
+    def __init__(self, window=1000, target_p99_ms=None):
+        self.samples = deque(maxlen=window)
+        self.target_p99_ms = target_p99_ms
+        self.count = 0
+
+    def record(self, ms):
+        self.samples.append(ms)
+        self.count += 1
+
+    def percentile(self, pct):
+        return float(percentile(self.samples, pct))
+
+    def summary(self):
+        p99 = self.percentile(99)
+        return {
+            "requests": self.count,
+            "window": len(self.samples),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": p99,
+            "target_p99_ms": self.target_p99_ms,
+            "within_target": self.target_p99_ms is None or p99 <= self.target_p99_ms
+        }
+
+
+class PayloadSizeTracker:
+    """Keeps recent response body sizes per endpoint"""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.totals = {}
+
+    def record(self, endpoint, size):
+        if endpoint not in self.samples:
+            self.samples[endpoint] = deque(maxlen=self.window)
+            self.counts[endpoint] = 0
+            self.totals[endpoint] = 0
+        self.samples[endpoint].append(size)
+        self.counts[endpoint] += 1
+        self.totals[endpoint] += size
+
+    def summary(self):
+        return {
+            endpoint: {
+                "responses": self.counts[endpoint],
+                "total_bytes": self.totals[endpoint],
+                "mean_bytes": int(self.totals[endpoint] / self.counts[endpoint]),
+                "p50_bytes": percentile(samples, 50),
+                "p95_bytes": percentile(samples, 95),
+                "max_bytes": max(samples),
+            }
+            for endpoint, samples in sorted(self.samples.items())
+        }
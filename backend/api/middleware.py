@@ -0,0 +1,110 @@
+"""
+ASGI middleware for the EcoTrace API
+"""
+
+import hashlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from .http_cache import CACHE_POLICIES, make_etag, is_not_modified
+from .metrics import PayloadSizeTracker
+
+payload_sizes = PayloadSizeTracker()
+
+
+class PayloadMetricsMiddleware:
+    """Records response body bytes per route template
+
+    Counts bytes as they are sent, so streamed exports are measured too.
+    """
+
+    def __init__(self, app, tracker=payload_sizes):
+        self.app = app
+        self.tracker = tracker
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        size = 0
+
+        async def counting_send(message):
+            nonlocal size
+            if message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, counting_send)
+        finally:
+            # The router stores the matched route on the scope
+            route = scope.get("route")
+            if route is not None:
+                self.tracker.record(f"{scope['method']} {route.path}", size)
+
+
+class HTTPCacheMiddleware:
+    """Cache-Control per route plus conditional GET for cacheable routes
+
+    Routes that set their own ETag (document versions) handle 304s
+    themselves. Other GET routes listed in CACHE_POLICIES get a body-hash
+    ETag, and a 304 when it matches If-None-Match; the work is still done
+    but the payload is not resent.
+    """
+
+    def __init__(self, app, policies=CACHE_POLICIES):
+        self.app = app
+        self.policies = policies
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        start = None
+        body = []
+
+        async def caching_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                policy = self.policies.get(route.path) if route is not None else None
+                headers = MutableHeaders(scope=message)
+
+                if policy is None or message["status"] not in (200, 304):
+                    await send(message)
+                    return
+                if "cache-control" not in headers:
+                    headers["Cache-Control"] = policy
+                if message["status"] == 304 or "etag" in headers:
+                    await send(message)
+                    return
+
+                # Hold the response until the body is complete
+                start = message
+                return
+
+            if start is None:
+                await send(message)
+                return
+
+            body.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            content = b"".join(body)
+            headers = MutableHeaders(scope=start)
+            headers["ETag"] = make_etag(hashlib.sha1(content).hexdigest())
+
+            if is_not_modified(request_headers, {"ETag": headers["etag"]}):
+                start["status"] = 304
+                for header in ("content-length", "content-type"):
+                    if header in headers:
+                        del headers[header]
+                content = b""
+
+            await send(start)
+            await send({"type": "http.response.body", "body": content})
+
+        await self.app(scope, receive, caching_send)
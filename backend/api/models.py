@@ -2,7 +2,7 @@
 Pydantic models for API requests and responses
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, HttpUrl
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
@@ -32,6 +32,8 @@ class SustainabilityClaim(BaseModel):
     claim_category: Optional[str] = None
     numerical_value: Optional[str] = None
     unit: Optional[str] = None
+    normalized_value: Optional[float] = None
+    normalized_unit: Optional[str] = None
     target_year: Optional[str] = None
     baseline_year: Optional[str] = None
     confidence_score: Optional[float] = None
@@ -41,6 +43,32 @@ class SustainabilityClaim(BaseModel):
     extracted_at: Optional[str] = None
 
 
+class EvidenceDocument(BaseModel):
+    document_id: str
+    source_type: str  # news, publication
+    title: str
+    url: Optional[str] = None
+    published_date: Optional[str] = None
+    similarity: float
+    stance: str  # supporting, contradicting, related
+    # The article's own tone, not its stance on the claim
+    sentiment: Optional[str] = None
+
+
+class ClaimEvidence(BaseModel):
+    """Documents closest to a claim, by embedding similarity
+
+    Stance is not detected yet: every document is "related", and
+    supporting / contradicting stay empty.
+    """
+    claim_id: str
+    claim_text: str
+    supporting: List[EvidenceDocument]
+    contradicting: List[EvidenceDocument]
+    related: List[EvidenceDocument]
+    took_ms: int
+
+
 class CredibilityScore(BaseModel):
     company_id: str
     company_name: str
@@ -53,17 +81,96 @@ class CredibilityScore(BaseModel):
     last_updated: datetime
 
 
+class CompanyBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=100)
+    include_score: bool = True
+    claims_limit: int = Field(default=5, ge=0, le=20)
+
+
+class CompanyBatchItem(BaseModel):
+    company: Company
+    score: Optional[CredibilityScore] = None
+    latest_claims: List[SustainabilityClaim] = []
+
+
+class CompanyBatchResponse(BaseModel):
+    companies: List[CompanyBatchItem]
+    missing: List[str]
+    took_ms: int
+
+
+class ClaimBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=100)
+
+
+class ClaimBatchResponse(BaseModel):
+    claims: List[SustainabilityClaim]
+    missing: List[str]
+    took_ms: int
+
+
 class SearchQuery(BaseModel):
     query: str
     filters: Optional[Dict[str, Any]] = None
     limit: int = Field(default=10, ge=1, le=100)
     offset: int = Field(default=0, ge=0)
+    cursor: Optional[str] = None
+    fields: Optional[List[str]] = None
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+
+
+class WatchCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=200)
+    query: Optional[str] = Field(default=None, description="Full-text query; every term must match")
+    kinds: List[str] = Field(default=["claims", "news"], min_length=1)
+    filters: Optional[Dict[str, Any]] = None
+    owner: Optional[str] = None
+    webhook_url: Optional[HttpUrl] = None
+
+
+class Watch(BaseModel):
+    """A saved search as returned; the webhook URL is write-only"""
+    watch_id: str
+    name: str
+    query: Optional[str] = None
+    kinds: List[str]
+    filters: Optional[Dict[str, Any]] = None
+    owner: Optional[str] = None
+    has_webhook: bool = False
+    created_at: Optional[str] = None
+
+
+class WatchMatch(BaseModel):
+    watch_id: str
+    kind: str
+    doc_id: str
+    title: Optional[str] = None
+    url: Optional[str] = None
+    company: Optional[Any] = None
+    matched_at: Optional[str] = None
+    delivered: bool = False
 
 
 class SearchResult(BaseModel):
     total: int
     results: List[Dict[str, Any]]
     took_ms: int
+    next_cursor: Optional[str] = None
+
+
+class Suggestion(BaseModel):
+    text: str
+    type: str  # company, claim_type, title
+    id: Optional[str] = None
+    index: Optional[str] = None
+
+
+class SuggestResponse(BaseModel):
+    query: str
+    suggestions: List[Suggestion]
+    took_ms: int
+    cached: bool
 
 
 class NewsArticle(BaseModel):
@@ -96,6 +203,27 @@ class GraphEdge(BaseModel):
 class GraphData(BaseModel):
     nodes: List[GraphNode]
     edges: List[GraphEdge]
+    next_cursor: Optional[str] = None
+
+
+class CompactGraphNodes(BaseModel):
+    id: List[str]
+    label: List[str]
+    type: List[int]  # index into node_types
+
+
+class CompactGraphEdges(BaseModel):
+    source: List[int]  # index into nodes
+    target: List[int]
+    type: List[int]  # index into edge_types
+
+
+class CompactGraphData(BaseModel):
+    node_types: List[str]
+    edge_types: List[str]
+    nodes: CompactGraphNodes
+    edges: CompactGraphEdges
+    next_cursor: Optional[str] = None
 
 
 class AnalyticsOverview(BaseModel):
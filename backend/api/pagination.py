@@ -0,0 +1,146 @@
+"""
+Cursor pagination over Elasticsearch using point-in-time + search_after
+"""
+
+import base64
+import hashlib
+import json
+import os
+from elasticsearch import NotFoundError
+from fastapi import HTTPException
+
+# Passing cursor=start opens a new point in time
+START_CURSOR = "start"
+
+CURSOR_KEEP_ALIVE = os.getenv("CURSOR_KEEP_ALIVE", "2m")
+
+# Elasticsearch's default index.max_result_window
+MAX_RESULT_WINDOW = 10000
+
+# Implicit tiebreaker for PIT searches, added explicitly so every hit
+# carries a unique sort value to resume from
+TIEBREAKER = {"_shard_doc": "asc"}
+
+
+def fingerprint(query, sort):
+    """Short hash binding a cursor to the query it was issued for"""
+    payload = json.dumps([query, sort], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+def encode_cursor(pit_id, search_after, query_fingerprint):
+    payload = json.dumps({"pit": pit_id, "after": search_after, "fp": query_fingerprint})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return payload["pit"], payload["after"], payload["fp"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def check_offset(offset, limit):
+    """Reject offset pages past the result window, pointing at cursors"""
+    if offset + limit > MAX_RESULT_WINDOW:
+        raise HTTPException(
+            status_code=400,
+            detail=f"offset + limit may not exceed {MAX_RESULT_WINDOW}; use cursor=start for deep pagination"
+        )
+
+
+def with_tiebreaker(sort):
+    sort = list(sort or [])
+    if not any(isinstance(key, dict) and "_shard_doc" in key for key in sort):
+        sort.append(TIEBREAKER)
+    return sort
+
+
+def open_pit(es, index):
+    # Multi-index searches list their indices explicitly; skip missing ones
+    return es.open_point_in_time(
+        index=index, keep_alive=CURSOR_KEEP_ALIVE, ignore_unavailable=True
+    )['id']
+
+
+def close_pit(es, pit_id):
+    try:
+        es.close_point_in_time(id=pit_id)
+    except Exception:
+        pass
+
+
+def search_page(es, index, cursor, query, size, sort=None, **kwargs):
+    """Fetch one page for a cursor, returning (response, next_cursor)
+
+    next_cursor is None once the last page has been returned, at which
+    point the point in time is closed.
+    """
+    sort = with_tiebreaker(sort)
+    query_fingerprint = fingerprint(query, sort)
+
+    if cursor == START_CURSOR:
+        pit_id = open_pit(es, index)
+        search_after = None
+    else:
+        pit_id, search_after, cursor_fingerprint = decode_cursor(cursor)
+        if cursor_fingerprint != query_fingerprint:
+            raise HTTPException(status_code=400, detail="Cursor does not match query parameters")
+
+    params = dict(
+        query=query,
+        size=size,
+        sort=sort,
+        pit={"id": pit_id, "keep_alive": CURSOR_KEEP_ALIVE},
+        **kwargs
+    )
+    if search_after is not None:
+        params["search_after"] = search_after
+
+    try:
+        response = es.search(**params)
+    except NotFoundError:
+        raise HTTPException(status_code=410, detail="Cursor expired; start again with cursor=start")
+
+    # The PIT id may change between requests; always resume from the latest
+    pit_id = response.get('pit_id', pit_id)
+    hits = response['hits']['hits']
+
+    if len(hits) < size:
+        close_pit(es, pit_id)
+        return response, None
+
+    return response, encode_cursor(pit_id, hits[-1]['sort'], query_fingerprint)
+
+
+def iter_hits(es, index, query, sort=None, batch_size=1000, **kwargs):
+    """Yield every hit for a query with constant memory, via PIT pages"""
+    sort = with_tiebreaker(sort)
+    pit_id = open_pit(es, index)
+    search_after = None
+
+    try:
+        while True:
+            params = dict(
+                query=query,
+                size=batch_size,
+                sort=sort,
+                pit={"id": pit_id, "keep_alive": CURSOR_KEEP_ALIVE},
+                **kwargs
+            )
+            if search_after is not None:
+                params["search_after"] = search_after
+
+            response = es.search(**params)
+            pit_id = response.get('pit_id', pit_id)
+            hits = response['hits']['hits']
+
+            yield from hits
+
+            if len(hits) < batch_size:
+                break
+            search_after = hits[-1]['sort']
+    finally:
+        close_pit(es, pit_id)
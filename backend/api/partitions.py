@@ -0,0 +1,81 @@
+"""
+Date-range pruning for time-partitioned indices
+News and regulatory records live in rolled-over partitions behind the
+ecotrace_news / ecotrace_regulatory aliases. A date-bounded search asks
+field_caps which partitions can hold matching dates - answered from
+per-shard min/max values without searching - and only searches those.
+"""
+
+import os
+import re
+from .cache import TTLCache
+
+# Partitioned alias -> date field that bounds its partitions
+PARTITIONED_INDICES = {
+    "ecotrace_news": "published_date",
+    "ecotrace_regulatory": "crawled_at",
+}
+
+# Partition names, including the shrink-<id>- prefix ILM gives shrunken
+# copies, and the -r<timestamp> copies made by `scrapy remap_indices`.
+# Kept in step with ecotrace_crawler/partitions.py (see tests/test_partitions.py)
+PARTITION_NAME = re.compile(r'^(?:shrink-[a-z0-9]+-)?(?P<alias>.+)-(?:(?P<generation>\d{6})|r(?P<copied>\d{14}))$')
+
+partition_cache = TTLCache(maxsize=1024, ttl=int(os.getenv("PARTITION_CACHE_TTL", 30)))
+
+
+def date_range(date_from=None, date_to=None):
+    """range query bounds, or None if neither bound is given"""
+    bounds = {}
+    if date_from:
+        bounds["gte"] = date_from
+    if date_to:
+        bounds["lte"] = date_to
+    return bounds or None
+
+
+def logical_index(index):
+    """Alias name for a partition name; other names are returned unchanged"""
+    match = PARTITION_NAME.match(index)
+    return match.group('alias') if match else index
+
+
+def partitions_for(es, index, date_from=None, date_to=None):
+    """Indices to search for one index and date range
+
+    The partitions whose dates can fall in the range, or the index itself
+    when it is not partitioned or the search has no date bounds.
+    """
+    bounds = date_range(date_from, date_to)
+    if index not in PARTITIONED_INDICES or bounds is None:
+        return [index]
+
+    key = (index, date_from, date_to)
+    cached = partition_cache.get(key)
+    if cached is not None:
+        return cached
+
+    field = PARTITIONED_INDICES[index]
+    response = es.field_caps(
+        index=index,
+        fields=field,
+        index_filter={"range": {field: bounds}},
+        ignore_unavailable=True
+    )
+    indices = response.get("indices") or []
+    if isinstance(indices, str):
+        indices = [indices]
+
+    # Without a fixed upper bound the answer changes as new documents and
+    # partitions arrive, so only closed ranges are cached
+    if date_to and "now" not in date_to:
+        partition_cache.set(key, indices)
+    return indices
+
+
+def resolve_indices(es, indices, date_from=None, date_to=None):
+    """Replace partitioned aliases with the partitions covering a date range"""
+    resolved = []
+    for index in indices:
+        resolved.extend(partitions_for(es, index, date_from, date_to))
+    return resolved
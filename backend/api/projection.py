@@ -0,0 +1,70 @@
+"""
+_source filtering for Elasticsearch reads
+Each endpoint fetches only the fields it returns by default; clients can
+narrow that further with a fields= query parameter
+"""
+
+from fastapi import HTTPException, Query
+from typing import Optional
+from .models import Company, SustainabilityClaim
+
+# Large or internal fields never returned by list/search endpoints
+HEAVY_FIELDS = ["embedding", "raw_context", "content", "full_text"]
+
+NEWS_FIELDS = [
+    "article_id", "title", "summary", "url", "source", "author", "published_date",
+    "company_mentions", "sustainability_topics", "sentiment", "credibility_rating"
+]
+
+# endpoint -> {"includes": [...]} or {"excludes": [...]}
+ENDPOINT_SOURCES = {
+    "companies.list": {"includes": list(Company.model_fields)},
+    "companies.detail": {"includes": list(Company.model_fields)},
+    "companies.claims": {"includes": list(SustainabilityClaim.model_fields)},
+    "companies.news": {"includes": NEWS_FIELDS},
+    "claims.list": {"includes": list(SustainabilityClaim.model_fields)},
+    "claims.detail": {"includes": list(SustainabilityClaim.model_fields)},
+    "analytics.recent": {"includes": ["company_name", "claim_text", "extracted_at"]},
+    "search": {"excludes": HEAVY_FIELDS},
+}
+
+
+def fields_param(
+    fields: Optional[str] = Query(
+        default=None,
+        description="Comma-separated fields to return, e.g. fields=claim_id,claim_text"
+    )
+):
+    """Dependency parsing the fields= projection parameter"""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()] or None
+
+
+def source_filter(endpoint, fields=None):
+    """source_includes/source_excludes kwargs for an endpoint's ES read
+
+    Requested fields must be a subset of what the endpoint returns.
+    """
+    default = ENDPOINT_SOURCES[endpoint]
+    if not fields:
+        if "includes" in default:
+            return {"source_includes": default["includes"]}
+        return {"source_excludes": default["excludes"]}
+
+    if "includes" in default:
+        disallowed = [field for field in fields if field not in default["includes"]]
+    else:
+        disallowed = [field for field in fields if field in default["excludes"]]
+    if disallowed:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Field(s) not available on this endpoint: {', '.join(disallowed)}"
+        )
+
+    return {"source_includes": fields}
+
+
+def project(source, fields):
+    """Keep only the requested fields of a document"""
+    return {field: source.get(field) for field in fields}
@@ -0,0 +1,153 @@
+"""
+Elasticsearch query builder
+Keeps exact filters in non-scoring (cacheable) filter context on keyword
+fields and only targets the text fields that exist in each index
+"""
+
+from fastapi import HTTPException
+from .partitions import PARTITIONED_INDICES, date_range
+
+ALL_INDICES = [
+    "ecotrace_companies",
+    "ecotrace_claims",
+    "ecotrace_news",
+    "ecotrace_publications",
+    "ecotrace_regulatory",
+]
+
+# Full-text fields (with boosts) per index
+TEXT_FIELDS = {
+    "ecotrace_companies": ["name^3", "description", "industry"],
+    "ecotrace_claims": ["company_name^3", "claim_text^2"],
+    "ecotrace_news": ["title^2", "summary", "content"],
+    "ecotrace_publications": ["title^2", "abstract", "keywords"],
+    "ecotrace_regulatory": ["company_name^3", "metric", "facility_name"],
+}
+
+# Date field per index that date_from/date_to bound
+DATE_FIELDS = {
+    "ecotrace_claims": "extracted_at",
+    "ecotrace_news": "published_date",
+    "ecotrace_publications": "publication_date",
+    "ecotrace_regulatory": "crawled_at",
+}
+
+# Whitelisted filter keys -> keyword field per index they apply to
+FILTER_FIELDS = {
+    "company_id": {
+        "ecotrace_companies": "company_id.keyword",
+        "ecotrace_claims": "company_id.keyword",
+        "ecotrace_regulatory": "company_id.keyword",
+    },
+    "company_name": {
+        "ecotrace_companies": "name.keyword",
+        "ecotrace_claims": "company_name.keyword",
+        "ecotrace_regulatory": "company_name.keyword",
+        "ecotrace_news": "company_mentions.keyword",
+        "ecotrace_publications": "related_companies.keyword",
+    },
+    "industry": {"ecotrace_companies": "industry.keyword"},
+    "claim_type": {"ecotrace_claims": "claim_type.keyword"},
+    "claim_category": {"ecotrace_claims": "claim_category.keyword"},
+    "source_type": {"ecotrace_claims": "source_type.keyword"},
+    "sentiment": {"ecotrace_news": "sentiment.keyword"},
+    "source": {"ecotrace_news": "source.keyword"},
+    "journal": {"ecotrace_publications": "journal.keyword"},
+    "agency": {"ecotrace_regulatory": "agency.keyword"},
+    "record_type": {"ecotrace_regulatory": "record_type.keyword"},
+}
+
+
+def validate_filters(filters):
+    """Reject filter keys that are not whitelisted"""
+    unknown = sorted(set(filters or {}) - set(FILTER_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported filter(s): {', '.join(unknown)}. Allowed: {', '.join(sorted(FILTER_FIELDS))}"
+        )
+
+
+def filter_clauses(index, filters):
+    """term/terms clauses for one index, or None if a filter cannot apply"""
+    clauses = []
+    for key, value in (filters or {}).items():
+        if value is None or value == "" or value == []:
+            continue
+        field = FILTER_FIELDS[key].get(index)
+        if field is None:
+            return None
+        if isinstance(value, list):
+            clauses.append({"terms": {field: value}})
+        else:
+            clauses.append({"term": {field: value}})
+    return clauses
+
+
+def build_filtered_query(index, filters, extra=None):
+    """Filter-only query for a single index (list and export endpoints)
+
+    extra holds additional filter clauses such as date ranges.
+    """
+    validate_filters(filters)
+    clauses = filter_clauses(index, filters)
+    if clauses is None:
+        raise HTTPException(status_code=400, detail=f"Filters do not apply to {index}")
+    clauses += list(extra or [])
+    return {"bool": {"filter": clauses}} if clauses else {"match_all": {}}
+
+
+def index_clause(index):
+    """Restricts a multi-index query to one index
+
+    Partitioned indices are searched through their partitions, whose names
+    contain the alias name.
+    """
+    if index in PARTITIONED_INDICES:
+        return {"wildcard": {"_index": f"*{index}*"}}
+    return {"term": {"_index": index}}
+
+
+def build_search(text, indices=None, filters=None, fuzziness=None, date_from=None, date_to=None):
+    """Full-text search over the given indices, returning (indices, query)
+
+    Each index only searches its own text fields. Indices a filter or the
+    date range cannot apply to are dropped from the request entirely.
+    """
+    validate_filters(filters)
+    bounds = date_range(date_from, date_to)
+
+    targets = []
+    per_index = []
+    for index in indices or ALL_INDICES:
+        clauses = filter_clauses(index, filters)
+        if clauses is None:
+            continue
+        if bounds:
+            if index not in DATE_FIELDS:
+                continue
+            clauses.append({"range": {DATE_FIELDS[index]: bounds}})
+
+        multi_match = {"query": text, "fields": TEXT_FIELDS[index]}
+        if fuzziness:
+            multi_match["fuzziness"] = fuzziness
+
+        targets.append(index)
+        per_index.append({
+            "bool": {
+                "must": [{"multi_match": multi_match}],
+                "filter": [index_clause(index)] + clauses
+            }
+        })
+
+    if not targets:
+        raise HTTPException(status_code=400, detail="Filters do not apply to any searched index")
+
+    if len(per_index) == 1:
+        query = per_index[0]
+        # The _index term is redundant when searching a single index
+        query["bool"]["filter"] = query["bool"]["filter"][1:]
+    else:
+        query = {"bool": {"should": per_index, "minimum_should_match": 1}}
+
+    return targets, query
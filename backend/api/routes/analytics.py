@@ -2,13 +2,43 @@
 Analytics API routes
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
 from ..models import AnalyticsOverview
 from ..database import get_elasticsearch, get_mongodb
+from ..projection import source_filter
+from ..cache import TTLCache
 from datetime import datetime, timedelta
 
 router = APIRouter()
 
+# Daily counters maintained by the crawler (ecotrace_crawler/rollups.py)
+ROLLUP_INDEX = "ecotrace_rollups_daily"
+
+# Written by `scrapy rollup` once every day of a dataset has been rolled
+# up. Until then (e.g. right after upgrading, before `scrapy rollup --full`
+# has run) trends are aggregated from the raw indices.
+WATERMARK_ID = "_watermark|{dataset}"
+UNKNOWN_VALUE = "unknown"
+
+# Raw index, day field, company field and counted fields of each dataset
+RAW_DATASETS = {
+    "claims": {
+        "index": "ecotrace_claims",
+        "date_field": "extracted_at",
+        "company_field": "company_name.keyword",
+        "dimensions": {"claim_type": "claim_type.keyword"},
+    },
+    "news": {
+        "index": "ecotrace_news",
+        "date_field": "published_date",
+        "company_field": "company_mentions.keyword",
+        "dimensions": {"sentiment": "sentiment.keyword"},
+    },
+}
+
+rollup_cache = TTLCache(maxsize=16, ttl=300)
+
 
 @router.get("/overview", response_model=AnalyticsOverview)
 async def get_analytics_overview():
@@ -64,7 +94,8 @@ async def get_analytics_overview():
                 }
             },
             size=5,
-            sort=[{"extracted_at": {"order": "desc"}}]
+            sort=[{"extracted_at": {"order": "desc"}}],
+            **source_filter("analytics.recent")
         )
 
         recent_activity = []
@@ -95,53 +126,176 @@ async def get_analytics_overview():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/trends")
-async def get_trends(days: int = 30):
-    """Get trending topics and claims over time"""
-    es = get_elasticsearch()
-    if not es:
-        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+def rollup_query(dataset, dimension, days, company_name=None):
+    """Rollup documents of one dimension over the last days, overall or for a company"""
+    clauses = [
+        {"term": {"dataset": dataset}},
+        {"term": {"dimension": dimension}},
+        {"range": {"date": {"gte": f"now-{days}d/d"}}},
+    ]
+    query = {"bool": {"filter": clauses}}
+    if company_name:
+        clauses.append({"term": {"company": company_name}})
+    else:
+        query["bool"]["must_not"] = [{"exists": {"field": "company"}}]
+    return query
+
 
+def rolled_up(es, dataset):
+    """Whether the rollup index holds every day of a dataset"""
+    if rollup_cache.get(dataset):
+        return True
     try:
-        cutoff_date = (datetime.utcnow() - timedelta(days=days)).isoformat()
+        es.get(index=ROLLUP_INDEX, id=WATERMARK_ID.format(dataset=dataset))
+    except Exception:
+        return False
+    rollup_cache.set(dataset, True)
+    return True
 
-        response = es.search(
-            index="ecotrace_claims",
-            query={
-                "range": {
-                    "extracted_at": {"gte": cutoff_date}
-                }
+
+def raw_timeline(es, dataset, dimension, days, company_name=None, top=5):
+    """rollup_timeline() computed by aggregating the raw index"""
+    spec = RAW_DATASETS[dataset]
+    field = spec["dimensions"][dimension]
+    clauses = [{"range": {spec["date_field"]: {"gte": f"now-{days}d/d"}}}]
+    if company_name:
+        clauses.append({"term": {spec["company_field"]: company_name}})
+
+    response = es.search(
+        index=spec["index"],
+        query={"bool": {"filter": clauses}},
+        size=0,
+        aggs={
+            "over_time": {
+                "date_histogram": {"field": spec["date_field"], "calendar_interval": "day", "format": "yyyy-MM-dd"},
+                "aggs": {"values": {"terms": {"field": field, "size": 20, "missing": UNKNOWN_VALUE}}}
             },
-            size=0,
-            aggs={
-                "claims_over_time": {
-                    "date_histogram": {
-                        "field": "extracted_at",
-                        "calendar_interval": "day"
-                    }
-                },
-                "trending_types": {
-                    "terms": {"field": "claim_type.keyword", "size": 5}
+            "top_values": {"terms": {"field": field, "size": top, "missing": UNKNOWN_VALUE}}
+        },
+        ignore_unavailable=True
+    )
+
+    aggregations = response.get('aggregations')
+    if not aggregations:
+        return [], {}
+
+    timeline = [
+        {
+            "date": bucket['key_as_string'],
+            "count": bucket['doc_count'],
+            "by_value": {value['key']: value['doc_count'] for value in bucket['values']['buckets']}
+        }
+        for bucket in aggregations['over_time']['buckets']
+        if bucket['doc_count']
+    ]
+    top_values = {bucket['key']: bucket['doc_count'] for bucket in aggregations['top_values']['buckets']}
+    return timeline, top_values
+
+
+def trend_timeline(es, dataset, dimension, days, company_name=None, top=5):
+    """From the rollup index once it is complete, otherwise from the raw index"""
+    if rolled_up(es, dataset):
+        return rollup_timeline(es, dataset, dimension, days, company_name, top)
+    return raw_timeline(es, dataset, dimension, days, company_name, top)
+
+
+def rollup_timeline(es, dataset, dimension, days, company_name=None, top=5):
+    """Per-day totals, per-day counts by value, and the top values, from the rollup index"""
+    total = {"sum": {"field": "count"}}
+    response = es.search(
+        index=ROLLUP_INDEX,
+        query=rollup_query(dataset, dimension, days, company_name),
+        size=0,
+        aggs={
+            "over_time": {
+                "date_histogram": {"field": "date", "calendar_interval": "day"},
+                "aggs": {
+                    "total": total,
+                    "values": {"terms": {"field": "value", "size": 20}, "aggs": {"total": total}}
                 }
+            },
+            "top_values": {
+                "terms": {"field": "value", "size": top, "order": {"total": "desc"}},
+                "aggs": {"total": total}
             }
-        )
+        },
+        ignore_unavailable=True
+    )
 
-        timeline = []
-        for bucket in response['aggregations']['claims_over_time']['buckets']:
-            timeline.append({
-                "date": bucket['key_as_string'],
-                "count": bucket['doc_count']
-            })
+    aggregations = response.get('aggregations')
+    if not aggregations:
+        return [], {}
+
+    timeline = [
+        {
+            "date": bucket['key_as_string'],
+            "count": int(bucket['total']['value']),
+            "by_value": {
+                value['key']: int(value['total']['value'])
+                for value in bucket['values']['buckets']
+            }
+        }
+        for bucket in aggregations['over_time']['buckets']
+    ]
+    top_values = {
+        bucket['key']: int(bucket['total']['value'])
+        for bucket in aggregations['top_values']['buckets']
+    }
+    return timeline, top_values
 
-        trending = {}
-        for bucket in response['aggregations']['trending_types']['buckets']:
-            trending[bucket['key']] = bucket['doc_count']
+
+@router.get("/trends")
+async def get_trends(
+    days: int = Query(default=30, ge=1, le=3650),
+    company_name: Optional[str] = None
+):
+    """Get trending topics and claims over time
+
+    Reads the daily rollup index, so the cost grows with days rather than
+    with the number of claims; falls back to the claims index until the
+    rollup index has been filled.
+    """
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    try:
+        timeline, trending = trend_timeline(es, "claims", "claim_type", days, company_name)
 
         return {
             "period_days": days,
-            "timeline": timeline,
+            "timeline": [
+                {"date": day['date'], "count": day['count'], "by_type": day['by_value']}
+                for day in timeline
+            ],
             "trending_claim_types": trending
         }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/sentiment")
+async def get_sentiment_trends(
+    days: int = Query(default=30, ge=1, le=3650),
+    company_name: Optional[str] = None
+):
+    """Get news sentiment over time, overall or for articles mentioning a company"""
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    try:
+        timeline, totals = trend_timeline(es, "news", "sentiment", days, company_name, top=10)
+
+        return {
+            "period_days": days,
+            "timeline": [
+                {"date": day['date'], "count": day['count'], "by_sentiment": day['by_value']}
+                for day in timeline
+            ],
+            "sentiment_totals": totals
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -2,67 +2,331 @@
 Claims API routes
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
-from ..models import SustainabilityClaim
+from ..models import (
+    SustainabilityClaim, ClaimEvidence, EvidenceDocument,
+    ClaimBatchRequest, ClaimBatchResponse
+)
 from ..database import get_elasticsearch
+from ..embeddings import encode
+from ..pagination import search_page, check_offset
+from ..query_builder import build_filtered_query
+from ..serialization import FAST_SERIALIZATION, construct_rows, trusted_response
+from ..projection import fields_param, source_filter, project
+from ..http_cache import document_validators, is_not_modified, not_modified
+from .export import build_export_query, stream_export
+import time
 
 router = APIRouter()
 
 
+def build_claims_query(claim_type=None, company_name=None, unit=None, min_value=None, max_value=None):
+    """Exact-match filters shared by the claims list and export endpoints
+
+    min_value/max_value bound normalized_value and need a canonical unit,
+    since magnitudes in different units are not comparable.
+    """
+    return build_filtered_query(
+        "ecotrace_claims",
+        {"claim_type": claim_type, "company_name": company_name},
+        extra=value_clauses(unit, min_value, max_value)
+    )
+
+
+def value_clauses(unit=None, min_value=None, max_value=None):
+    """Filter clauses on the normalised quantity of a claim"""
+    if (min_value is not None or max_value is not None) and not unit:
+        raise HTTPException(status_code=400, detail="min_value/max_value require a unit")
+    if min_value is not None and max_value is not None and min_value > max_value:
+        raise HTTPException(status_code=400, detail="min_value is greater than max_value")
+
+    clauses = []
+    if unit:
+        clauses.append({"term": {"normalized_unit": unit}})
+    bounds = {}
+    if min_value is not None:
+        bounds["gte"] = min_value
+    if max_value is not None:
+        bounds["lte"] = max_value
+    if bounds:
+        clauses.append({"range": {"normalized_value": bounds}})
+    return clauses
+
+
 @router.get("/", response_model=List[SustainabilityClaim])
 async def get_claims(
+    http_response: Response,
     limit: int = Query(default=50, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None, description="'start', or X-Next-Cursor from the previous page"),
     claim_type: Optional[str] = None,
-    company_name: Optional[str] = None
+    company_name: Optional[str] = None,
+    unit: Optional[str] = Query(default=None, description="Canonical unit, e.g. tCO2e, percent, MW"),
+    min_value: Optional[float] = Query(default=None, description="Lower bound on normalized_value"),
+    max_value: Optional[float] = Query(default=None, description="Upper bound on normalized_value"),
+    fields: Optional[List[str]] = Depends(fields_param)
 ):
-    """Get list of sustainability claims"""
+    """Get list of sustainability claims
+
+    Pages by offset by default; pass cursor=start and then the returned
+    X-Next-Cursor header to page with search_after over a point in time.
+    unit/min_value/max_value filter on the claim's normalised quantity.
+    """
     es = get_elasticsearch()
     if not es:
         raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
 
     try:
-        # Build query
-        must = []
-        if claim_type:
-            must.append({"match": {"claim_type": claim_type}})
-        if company_name:
-            must.append({"match": {"company_name": company_name}})
+        query = build_claims_query(claim_type, company_name, unit, min_value, max_value)
+        sort = [{"extracted_at": {"order": "desc"}}]
+        source = source_filter("claims.list", fields)
 
-        query = {"bool": {"must": must}} if must else {"match_all": {}}
+        if cursor:
+            response, next_cursor = search_page(
+                es, "ecotrace_claims", cursor, query, limit, sort,
+                **source
+            )
+            if next_cursor:
+                http_response.headers["X-Next-Cursor"] = next_cursor
+        else:
+            check_offset(offset, limit)
+            response = es.search(
+                index="ecotrace_claims",
+                query=query,
+                from_=offset,
+                size=limit,
+                sort=sort,
+                **source
+            )
 
-        response = es.search(
+        sources = [hit['_source'] for hit in response['hits']['hits']]
+        if fields:
+            return trusted_response(
+                [project(source, fields) for source in sources],
+                headers=dict(http_response.headers)
+            )
+        if FAST_SERIALIZATION:
+            return trusted_response(
+                construct_rows(SustainabilityClaim, sources),
+                headers=dict(http_response.headers)
+            )
+
+        return [SustainabilityClaim(**source) for source in sources]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch", response_model=ClaimBatchResponse)
+async def get_claims_batch(batch: ClaimBatchRequest):
+    """Get several claims by ID in one mget"""
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    try:
+        start_time = time.time()
+        ids = list(dict.fromkeys(batch.ids))
+
+        response = es.mget(
             index="ecotrace_claims",
-            query=query,
-            from_=offset,
-            size=limit,
-            sort=[{"extracted_at": {"order": "desc"}}]
+            ids=ids,
+            **source_filter("claims.detail")
         )
 
         claims = []
-        for hit in response['hits']['hits']:
-            claims.append(SustainabilityClaim(**hit['_source']))
+        missing = []
+        for doc in response['docs']:
+            if doc.get('found'):
+                claims.append(SustainabilityClaim(**doc['_source']))
+            else:
+                missing.append(doc['_id'])
 
-        return claims
+        return ClaimBatchResponse(
+            claims=claims,
+            missing=missing,
+            took_ms=int((time.time() - start_time) * 1000)
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/export")
+async def export_claims(
+    format: str = Query(default="ndjson", regex="^(ndjson|csv|parquet)$"),
+    claim_type: Optional[str] = None,
+    company_name: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+):
+    """Stream every matching claim (see /api/export/claims)"""
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    query = build_export_query("claims", company_name, claim_type, date_from, date_to)
+    return stream_export(es, "claims", query, format)
+
+
+@router.get("/values/summary")
+async def get_claim_values_summary(
+    unit: str = Query(..., description="Canonical unit, e.g. tCO2e, percent, MW"),
+    claim_type: Optional[str] = None,
+    company_name: Optional[str] = None
+):
+    """Distribution of normalised claim values in one unit, overall and by claim type"""
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    query = build_claims_query(claim_type, company_name, unit)
+    try:
+        response = es.search(
+            index="ecotrace_claims",
+            query=query,
+            size=0,
+            aggs={
+                "values": {"stats": {"field": "normalized_value"}},
+                "percentiles": {
+                    "percentiles": {"field": "normalized_value", "percents": [25, 50, 75, 95]}
+                },
+                "by_type": {
+                    "terms": {"field": "claim_type.keyword", "size": 20},
+                    "aggs": {"values": {"stats": {"field": "normalized_value"}}}
+                }
+            }
+        )
+
+        aggregations = response['aggregations']
+        return {
+            "unit": unit,
+            "stats": aggregations['values'],
+            "percentiles": aggregations['percentiles']['values'],
+            "by_type": {
+                bucket['key']: bucket['values']
+                for bucket in aggregations['by_type']['buckets']
+            }
+        }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{claim_id}", response_model=SustainabilityClaim)
-async def get_claim(claim_id: str):
+async def get_claim(
+    request: Request,
+    http_response: Response,
+    claim_id: str,
+    fields: Optional[List[str]] = Depends(fields_param)
+):
     """Get specific claim by ID"""
     es = get_elasticsearch()
     if not es:
         raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
 
+    source = source_filter("claims.detail", fields)
     try:
-        response = es.get(index="ecotrace_claims", id=claim_id)
-        return SustainabilityClaim(**response['_source'])
+        response = es.get(index="ecotrace_claims", id=claim_id, **source)
     except Exception as e:
         raise HTTPException(status_code=404, detail="Claim not found")
 
+    validators = document_validators(response, fields)
+    if is_not_modified(request.headers, validators):
+        return not_modified(validators)
+
+    if fields:
+        return trusted_response(project(response['_source'], fields), headers=validators)
+    http_response.headers.update(validators)
+    return SustainabilityClaim(**response['_source'])
+
+
+@router.get("/{claim_id}/evidence", response_model=ClaimEvidence)
+async def get_claim_evidence(
+    claim_id: str,
+    k: int = Query(default=10, ge=1, le=50),
+    same_company: bool = True
+):
+    """Get news and publications semantically closest to a claim"""
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    try:
+        claim = es.get(
+            index="ecotrace_claims",
+            id=claim_id,
+            source_includes=["claim_text", "company_name", "embedding"]
+        )['_source']
+    except Exception:
+        raise HTTPException(status_code=404, detail="Claim not found")
+
+    try:
+        start_time = time.time()
+
+        # Claims indexed before embeddings existed are encoded on the fly
+        vector = claim.get('embedding') or await run_in_threadpool(encode, claim.get('claim_text'))
+        if not vector:
+            raise HTTPException(status_code=503, detail="Embedding model unavailable")
+
+        knn = {
+            "field": "embedding",
+            "query_vector": vector,
+            "k": k,
+            "num_candidates": max(100, k * 10)
+        }
+        if same_company and claim.get('company_name'):
+            knn["filter"] = {
+                "multi_match": {
+                    "query": claim['company_name'],
+                    "fields": ["company_mentions", "related_companies"]
+                }
+            }
+
+        response = es.search(
+            index="ecotrace_news,ecotrace_publications",
+            knn=knn,
+            size=k,
+            source_includes=[
+                "article_id", "publication_id", "title", "url",
+                "published_date", "publication_date", "sentiment"
+            ]
+        )
+
+        # An article's sentiment says nothing about whether it backs the
+        # claim, so until stance is detected everything is only related
+        evidence = {"supporting": [], "contradicting": [], "related": []}
+        for hit in response['hits']['hits']:
+            source = hit['_source']
+            is_news = 'article_id' in source
+
+            evidence['related'].append(EvidenceDocument(
+                document_id=source.get('article_id') if is_news else source.get('publication_id', hit['_id']),
+                source_type='news' if is_news else 'publication',
+                title=source.get('title') or '',
+                url=source.get('url'),
+                published_date=source.get('published_date') if is_news else source.get('publication_date'),
+                similarity=hit['_score'],
+                stance='related',
+                sentiment=source.get('sentiment') if is_news else None
+            ))
+
+        return ClaimEvidence(
+            claim_id=claim_id,
+            claim_text=claim.get('claim_text', ''),
+            took_ms=int((time.time() - start_time) * 1000),
+            **evidence
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 @router.get("/types/summary")
 async def get_claim_types_summary():
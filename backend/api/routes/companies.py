@@ -2,22 +2,38 @@
 Companies API routes
 """
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from typing import List, Optional
-from ..models import Company, CredibilityScore
+from ..models import (
+    Company, CredibilityScore, SustainabilityClaim,
+    CompanyBatchRequest, CompanyBatchItem, CompanyBatchResponse
+)
 from ..database import get_elasticsearch, get_neo4j, get_mongodb
+from ..pagination import search_page, check_offset
+from ..serialization import FAST_SERIALIZATION, construct_rows, trusted_response
+from ..projection import fields_param, source_filter, project
+from ..http_cache import document_validators, is_not_modified, make_etag, not_modified
+from ..query_builder import build_filtered_query
 from datetime import datetime
+import time
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[Company])
 async def get_companies(
+    http_response: Response,
     limit: int = Query(default=50, ge=1, le=100),
     offset: int = Query(default=0, ge=0),
-    industry: Optional[str] = None
+    cursor: Optional[str] = Query(default=None, description="'start', or X-Next-Cursor from the previous page"),
+    industry: Optional[str] = None,
+    fields: Optional[List[str]] = Depends(fields_param)
 ):
-    """Get list of all tracked companies"""
+    """Get list of all tracked companies
+
+    Pages by offset by default; pass cursor=start and then the returned
+    X-Next-Cursor header to page with search_after over a point in time.
+    """
     es = get_elasticsearch()
     if not es:
         raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
@@ -28,41 +44,78 @@ async def get_companies(
         if industry:
             query = {"match": {"industry": industry}}
 
-        response = es.search(
-            index="ecotrace_companies",
-            query=query,
-            from_=offset,
-            size=limit
-        )
-
-        companies = []
-        for hit in response['hits']['hits']:
-            companies.append(Company(**hit['_source']))
-
-        return companies
+        source = source_filter("companies.list", fields)
 
+        if cursor:
+            response, next_cursor = search_page(
+                es, "ecotrace_companies", cursor, query, limit,
+                **source
+            )
+            if next_cursor:
+                http_response.headers["X-Next-Cursor"] = next_cursor
+        else:
+            check_offset(offset, limit)
+            response = es.search(
+                index="ecotrace_companies",
+                query=query,
+                from_=offset,
+                size=limit,
+                **source
+            )
+
+        sources = [hit['_source'] for hit in response['hits']['hits']]
+        if fields:
+            return trusted_response(
+                [project(source, fields) for source in sources],
+                headers=dict(http_response.headers)
+            )
+        if FAST_SERIALIZATION:
+            return trusted_response(
+                construct_rows(Company, sources),
+                headers=dict(http_response.headers)
+            )
+
+        return [Company(**source) for source in sources]
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{company_id}", response_model=Company)
-async def get_company(company_id: str):
+async def get_company(
+    request: Request,
+    http_response: Response,
+    company_id: str,
+    fields: Optional[List[str]] = Depends(fields_param)
+):
     """Get company details by ID"""
     es = get_elasticsearch()
     if not es:
         raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
 
+    source = source_filter("companies.detail", fields)
     try:
-        response = es.get(index="ecotrace_companies", id=company_id)
-        return Company(**response['_source'])
+        response = es.get(index="ecotrace_companies", id=company_id, **source)
     except Exception as e:
         raise HTTPException(status_code=404, detail="Company not found")
 
+    validators = document_validators(response, fields)
+    if is_not_modified(request.headers, validators):
+        return not_modified(validators)
+
+    if fields:
+        return trusted_response(project(response['_source'], fields), headers=validators)
+    http_response.headers.update(validators)
+    return Company(**response['_source'])
+
 
 @router.get("/{company_id}/claims")
 async def get_company_claims(
     company_id: str,
-    limit: int = Query(default=20, ge=1, le=100)
+    limit: int = Query(default=20, ge=1, le=100),
+    fields: Optional[List[str]] = Depends(fields_param)
 ):
     """Get all claims made by a specific company"""
     es = get_elasticsearch()
@@ -74,7 +127,8 @@ async def get_company_claims(
             index="ecotrace_claims",
             query={"match": {"company_id": company_id}},
             size=limit,
-            sort=[{"extracted_at": {"order": "desc"}}]
+            sort=[{"extracted_at": {"order": "desc"}}],
+            **source_filter("companies.claims", fields)
         )
 
         claims = [hit['_source'] for hit in response['hits']['hits']]
@@ -84,12 +138,131 @@ async def get_company_claims(
             "claims": claims
         }
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def score_aggs():
+    """Aggregations behind CredibilityScore, over all of a company's claims
+
+    Claims without a confidence score count as contradicted, as before.
+    """
+    verified = {"range": {"confidence_score": {"gt": 0.8}}}
+    return {
+        "verified": {"filter": verified},
+        "contradicted": {
+            "filter": {
+                "bool": {
+                    "should": [
+                        {"range": {"confidence_score": {"lt": 0.3}}},
+                        {"bool": {"must_not": {"exists": {"field": "confidence_score"}}}}
+                    ]
+                }
+            }
+        },
+        "by_type": {
+            "terms": {"field": "claim_type.keyword", "missing": "unknown", "size": 50},
+            "aggs": {"verified": {"filter": verified}}
+        }
+    }
+
+
+def score_from_response(company_id, company_name, response):
+    """CredibilityScore from a claims search run with score_aggs()"""
+    aggs = response['aggregations']
+    total_claims = response['hits']['total']['value']
+    verified = aggs['verified']['doc_count']
+    contradicted = aggs['contradicted']['doc_count']
+
+    score_breakdown = {}
+    for bucket in aggs['by_type']['buckets']:
+        score_breakdown[bucket['key']] = (bucket['verified']['doc_count'] / bucket['doc_count']) * 100
+
+    return CredibilityScore(
+        company_id=company_id,
+        company_name=company_name or 'Unknown',
+        overall_score=(verified / total_claims) * 100 if total_claims > 0 else 0.0,
+        total_claims=total_claims,
+        verified_claims=verified,
+        contradicted_claims=contradicted,
+        pending_claims=total_claims - verified - contradicted,
+        score_breakdown=score_breakdown,
+        last_updated=datetime.utcnow()
+    )
+
+
+@router.post("/batch", response_model=CompanyBatchResponse)
+async def get_companies_batch(batch: CompanyBatchRequest):
+    """Get several companies with their scores and latest claims
+
+    Everything is fetched in one msearch: the company documents plus, per
+    company, a claims search carrying the score aggregations.
+    """
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    try:
+        start_time = time.time()
+        ids = list(dict.fromkeys(batch.ids))
+
+        searches = [
+            {"index": "ecotrace_companies"},
+            {"query": {"ids": {"values": ids}}, "size": len(ids), "_source": list(Company.model_fields)}
+        ]
+        if batch.include_score or batch.claims_limit:
+            for company_id in ids:
+                searches.append({"index": "ecotrace_claims"})
+                body = {
+                    "query": build_filtered_query("ecotrace_claims", {"company_id": company_id}),
+                    "size": batch.claims_limit,
+                    "sort": [{"extracted_at": {"order": "desc"}}],
+                    "_source": list(SustainabilityClaim.model_fields),
+                    "track_total_hits": True
+                }
+                if batch.include_score:
+                    body["aggs"] = score_aggs()
+                searches.append(body)
+
+        responses = es.msearch(searches=searches)['responses']
+        if 'error' in responses[0]:
+            raise HTTPException(status_code=500, detail=str(responses[0]['error']))
+
+        companies = {hit['_id']: hit['_source'] for hit in responses[0]['hits']['hits']}
+        claims_responses = dict(zip(ids, responses[1:]))
+
+        items = []
+        for company_id in ids:
+            if company_id not in companies:
+                continue
+            company = companies[company_id]
+            item = CompanyBatchItem(company=Company(**company))
+
+            claims_response = claims_responses.get(company_id)
+            if claims_response and 'error' not in claims_response:
+                item.latest_claims = [
+                    SustainabilityClaim(**hit['_source']) for hit in claims_response['hits']['hits']
+                ]
+                if batch.include_score:
+                    item.score = score_from_response(company_id, company.get('name'), claims_response)
+            items.append(item)
+
+        return CompanyBatchResponse(
+            companies=items,
+            missing=[company_id for company_id in ids if company_id not in companies],
+            took_ms=int((time.time() - start_time) * 1000)
+        )
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/{company_id}/score", response_model=CredibilityScore)
-async def get_company_credibility_score(company_id: str):
+async def get_company_credibility_score(request: Request, http_response: Response, company_id: str):
     """Calculate and return company credibility score"""
     es = get_elasticsearch()
     if not es:
@@ -97,55 +270,26 @@ async def get_company_credibility_score(company_id: str):
 
     try:
         # Get company info
-        company_response = es.get(index="ecotrace_companies", id=company_id)
+        company_response = es.get(index="ecotrace_companies", id=company_id, source_includes=["name"])
         company = company_response['_source']
 
-        # Get all claims
+        # Aggregate over all claims instead of fetching them
         claims_response = es.search(
             index="ecotrace_claims",
-            query={"match": {"company_id": company_id}},
-            size=1000
+            query=build_filtered_query("ecotrace_claims", {"company_id": company_id}),
+            size=0,
+            aggs=score_aggs(),
+            track_total_hits=True
         )
 
-        total_claims = claims_response['hits']['total']['value']
-        claims = [hit['_source'] for hit in claims_response['hits']['hits']]
+        score = score_from_response(company_id, company.get('name'), claims_response)
 
-        # Calculate score (simplified version)
-        verified = sum(1 for c in claims if c.get('confidence_score', 0) > 0.8)
-        contradicted = sum(1 for c in claims if c.get('confidence_score', 0) < 0.3)
-        pending = total_claims - verified - contradicted
-
-        # Overall score calculation
-        if total_claims > 0:
-            overall_score = (verified / total_claims) * 100
-        else:
-            overall_score = 0.0
-
-        # Score breakdown by claim type
-        score_breakdown = {}
-        claim_types = {}
-        for claim in claims:
-            ct = claim.get('claim_type', 'unknown')
-            if ct not in claim_types:
-                claim_types[ct] = {'total': 0, 'verified': 0}
-            claim_types[ct]['total'] += 1
-            if claim.get('confidence_score', 0) > 0.8:
-                claim_types[ct]['verified'] += 1
-
-        for ct, data in claim_types.items():
-            score_breakdown[ct] = (data['verified'] / data['total']) * 100 if data['total'] > 0 else 0
-
-        return CredibilityScore(
-            company_id=company_id,
-            company_name=company.get('name', 'Unknown'),
-            overall_score=overall_score,
-            total_claims=total_claims,
-            verified_claims=verified,
-            contradicted_claims=contradicted,
-            pending_claims=pending,
-            score_breakdown=score_breakdown,
-            last_updated=datetime.utcnow()
-        )
+        # last_updated changes on every request, so it is left out of the ETag
+        validators = {"ETag": make_etag(score.model_dump_json(exclude={"last_updated"}))}
+        if is_not_modified(request.headers, validators):
+            return not_modified(validators)
+        http_response.headers.update(validators)
+        return score
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -154,7 +298,8 @@ async def get_company_credibility_score(company_id: str):
 @router.get("/{company_id}/news")
 async def get_company_news(
     company_id: str,
-    limit: int = Query(default=20, ge=1, le=100)
+    limit: int = Query(default=20, ge=1, le=100),
+    fields: Optional[List[str]] = Depends(fields_param)
 ):
     """Get news articles mentioning the company"""
     es = get_elasticsearch()
@@ -165,7 +310,7 @@ async def get_company_news(
 
     try:
         # Get company name first
-        company_response = es.get(index="ecotrace_companies", id=company_id)
+        company_response = es.get(index="ecotrace_companies", id=company_id, source_includes=["name"])
         company_name = company_response['_source'].get('name')
 
         # Search news articles
@@ -173,7 +318,8 @@ async def get_company_news(
             index="ecotrace_news",
             query={"match": {"company_mentions": company_name}},
             size=limit,
-            sort=[{"published_date": {"order": "desc"}}]
+            sort=[{"published_date": {"order": "desc", "missing": "_last", "unmapped_type": "date"}}],
+            **source_filter("companies.news", fields)
         )
 
         articles = [hit['_source'] for hit in response['hits']['hits']]
@@ -184,5 +330,7 @@ async def get_company_news(
             "articles": articles
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,245 @@
+"""
+Bulk export API routes
+Streams whole datasets as NDJSON, CSV or Parquet with constant memory
+"""
+
+from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from ..database import get_elasticsearch
+from ..pagination import iter_hits
+from ..query_builder import build_filtered_query
+from ..partitions import partitions_for
+import csv
+import io
+import json
+
+# Optional - only needed for format=parquet
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+router = APIRouter()
+
+# Hits per point-in-time page, and rows per CSV chunk / Parquet row group
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_DATASETS = {
+    "claims": {
+        "index": "ecotrace_claims",
+        "date_field": "extracted_at",
+        "columns": [
+            "claim_id", "company_id", "company_name", "claim_text", "claim_type",
+            "claim_category", "numerical_value", "unit", "normalized_value", "normalized_unit",
+            "target_year", "baseline_year",
+            "confidence_score", "source_type", "source_url", "published_date", "extracted_at"
+        ],
+    },
+    "news": {
+        "index": "ecotrace_news",
+        "date_field": "published_date",
+        "columns": [
+            "article_id", "title", "summary", "company_mentions", "sustainability_topics",
+            "sentiment", "source", "author", "published_date", "url",
+            "credibility_rating", "crawled_at"
+        ],
+    },
+    "regulatory": {
+        "index": "ecotrace_regulatory",
+        "date_field": "crawled_at",
+        "columns": [
+            "record_id", "company_id", "company_name", "agency", "record_type", "metric",
+            "value", "unit", "normalized_value", "normalized_unit", "reporting_year", "facility_name", "facility_location",
+            "source_url", "document_id", "filed_date", "crawled_at"
+        ],
+    },
+}
+
+FLOAT_COLUMNS = {"confidence_score", "credibility_rating", "normalized_value"}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def build_export_query(dataset, company=None, claim_type=None, date_from=None, date_to=None):
+    """Non-scoring filters for an export"""
+    config = EXPORT_DATASETS[dataset]
+    extra = []
+    if date_from or date_to:
+        date_range = {}
+        if date_from:
+            date_range["gte"] = date_from
+        if date_to:
+            date_range["lte"] = date_to
+        extra.append({"range": {config["date_field"]: date_range}})
+
+    return build_filtered_query(
+        config["index"],
+        {"company_name": company, "claim_type": claim_type},
+        extra
+    )
+
+
+def flatten(value):
+    """Scalar form of a value for CSV and Parquet cells"""
+    if isinstance(value, list):
+        return "; ".join(str(v) for v in value)
+    return value
+
+
+def iter_ndjson(hits, columns):
+    for hit in hits:
+        source = hit['_source']
+        yield json.dumps({column: source.get(column) for column in columns}) + "\n"
+
+
+def iter_csv(hits, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+
+    rows = 0
+    for hit in hits:
+        source = hit['_source']
+        writer.writerow([flatten(source.get(column)) for column in columns])
+        rows += 1
+        if rows % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the generator"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def parquet_value(column, value):
+    value = flatten(value)
+    if value is None or value == '':
+        return None
+    if column in FLOAT_COLUMNS:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    return str(value)
+
+
+def iter_parquet(hits, columns):
+    """Write one row group per batch, yielding bytes as they are produced"""
+    schema = pa.schema([
+        (column, pa.float64() if column in FLOAT_COLUMNS else pa.string())
+        for column in columns
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+
+    def write_batch(rows):
+        table = pa.Table.from_pydict(
+            {column: [row[i] for row in rows] for i, column in enumerate(columns)},
+            schema=schema
+        )
+        writer.write_table(table)
+
+    rows = []
+    for hit in hits:
+        source = hit['_source']
+        rows.append([parquet_value(column, source.get(column)) for column in columns])
+        if len(rows) == EXPORT_BATCH_SIZE:
+            write_batch(rows)
+            rows = []
+            yield sink.drain()
+
+    if rows:
+        write_batch(rows)
+    writer.close()
+    yield sink.drain()
+
+
+def stream_export(es, dataset, query, format, index=None):
+    """StreamingResponse for a dataset export in the requested format
+
+    index overrides the dataset's index, e.g. with the partitions covering
+    the exported date range.
+    """
+    if format == "parquet" and not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow")
+
+    config = EXPORT_DATASETS[dataset]
+    columns = config["columns"]
+    hits = iter_hits(
+        es, index or config["index"], query,
+        batch_size=EXPORT_BATCH_SIZE,
+        source_includes=columns
+    )
+
+    if format == "csv":
+        body = iter_csv(hits, columns)
+    elif format == "parquet":
+        body = iter_parquet(hits, columns)
+    else:
+        body = iter_ndjson(hits, columns)
+
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={dataset}.{format}"}
+    )
+
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: str = Path(..., regex="^(claims|news|regulatory)$"),
+    format: str = Query(default="ndjson", regex="^(ndjson|csv|parquet)$"),
+    company: Optional[str] = None,
+    claim_type: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+):
+    """Stream every matching record of a dataset
+
+    Date bounds apply to extracted_at for claims, published_date for news
+    and crawled_at for regulatory records. claim_type only applies to claims.
+    """
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    if claim_type and dataset != "claims":
+        raise HTTPException(status_code=400, detail="claim_type filter only applies to claims")
+
+    query = build_export_query(dataset, company, claim_type, date_from, date_to)
+    index = partitions_for(es, EXPORT_DATASETS[dataset]["index"], date_from, date_to)
+    if not index:
+        # No partition holds dates in the range; export nothing
+        query = {"match_none": {}}
+        index = [EXPORT_DATASETS[dataset]["index"]]
+    return stream_export(es, dataset, query, format, index)
@@ -2,146 +2,255 @@
 Knowledge Graph API routes
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from ..models import GraphData, GraphNode, GraphEdge
+from fastapi import APIRouter, HTTPException, Path, Query
+from typing import Optional, Union
+from ..models import GraphData, GraphNode, GraphEdge, CompactGraphData
 from ..database import get_neo4j
+from ..graph_traversal import GraphTraversal, NODE_TYPES, node_key, node_label
+from ..graph_stats import graph_stats
+from ..graph_analytics import graph_analytics
+from starlette.concurrency import run_in_threadpool
 
 router = APIRouter()
 
 
-@router.get("/company/{company_id}", response_model=GraphData)
+@router.get("/company/{company_id}", response_model=Union[GraphData, CompactGraphData])
 async def get_company_graph(
     company_id: str,
-    depth: int = Query(default=1, ge=1, le=3)
+    depth: int = Query(default=1, ge=1, le=3),
+    limit_per_type: int = Query(default=50, ge=1, le=200),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    format: str = Query(default="full", regex="^(full|compact)$")
 ):
-    """Get knowledge graph for a specific company"""
+    """Get knowledge graph for a specific company
+
+    depth 1 covers the company's claims, news and publications, depth 2 the
+    companies mentioned alongside it, and depth 3 their claims, news and
+    publications. Each relationship type is capped per hop; next_cursor
+    pages through further direct neighbours.
+
+    format=compact returns columnar arrays with integer node indices and
+    no properties (see /node/{node_type}/{node_id}).
+    """
     driver = get_neo4j()
     if not driver:
         raise HTTPException(status_code=503, detail="Neo4j unavailable")
 
     try:
         with driver.session() as session:
-            # Get company and related nodes
-            query = """
-            MATCH (c:Company {company_id: $company_id})
-            OPTIONAL MATCH (c)-[r1:MAKES_CLAIM]->(claim:Claim)
-            OPTIONAL MATCH (c)<-[r2:MENTIONS]-(news:NewsArticle)
-            OPTIONAL MATCH (c)<-[r3:MENTIONS]-(pub:Publication)
-            RETURN c, claim, news, pub, r1, r2, r3
-            LIMIT 100
-            """
-
-            result = session.run(query, company_id=company_id)
-
-            nodes = {}
-            edges = []
-
-            for record in result:
-                # Add company node
-                if record['c']:
-                    company = record['c']
-                    node_id = company['company_id']
-                    if node_id not in nodes:
-                        nodes[node_id] = GraphNode(
-                            id=node_id,
-                            label=company.get('name', 'Unknown'),
-                            type='company',
-                            properties=dict(company)
-                        )
-
-                # Add claim nodes
-                if record['claim']:
-                    claim = record['claim']
-                    node_id = claim['claim_id']
-                    if node_id not in nodes:
-                        nodes[node_id] = GraphNode(
-                            id=node_id,
-                            label=claim.get('claim_text', '')[:50] + '...',
-                            type='claim',
-                            properties=dict(claim)
-                        )
-                    edges.append(GraphEdge(
-                        source=company['company_id'],
-                        target=node_id,
-                        type='MAKES_CLAIM'
-                    ))
-
-                # Add news nodes
-                if record['news']:
-                    news = record['news']
-                    node_id = news['article_id']
-                    if node_id not in nodes:
-                        nodes[node_id] = GraphNode(
-                            id=node_id,
-                            label=news.get('title', ''),
-                            type='news',
-                            properties=dict(news)
-                        )
-                    edges.append(GraphEdge(
-                        source=node_id,
-                        target=company['company_id'],
-                        type='MENTIONS'
-                    ))
-
-                # Add publication nodes
-                if record['pub']:
-                    pub = record['pub']
-                    node_id = pub['publication_id']
-                    if node_id not in nodes:
-                        nodes[node_id] = GraphNode(
-                            id=node_id,
-                            label=pub.get('title', ''),
-                            type='publication',
-                            properties=dict(pub)
-                        )
-                    edges.append(GraphEdge(
-                        source=node_id,
-                        target=company['company_id'],
-                        type='MENTIONS'
-                    ))
-
-            return GraphData(
-                nodes=list(nodes.values()),
-                edges=edges
+            compact = format == "compact"
+            traversal = GraphTraversal(
+                session, depth=depth, limit_per_type=limit_per_type, properties=not compact
             )
+            found, next_cursor = traversal.run(company_id, cursor)
+            if compact:
+                return CompactGraphData(**traversal.compact(next_cursor))
+            if not found:
+                return GraphData(nodes=[], edges=[])
+
+            keys = traversal.node_keys()
+            nodes = [
+                GraphNode(
+                    id=keys[element_id],
+                    label=node_label(label, node),
+                    type=NODE_TYPES[label][0],
+                    properties=dict(node)
+                )
+                for element_id, (label, node) in traversal.nodes.items()
+            ]
+            edges = [
+                GraphEdge(source=keys[source], target=keys[target], type=edge_type)
+                for source, edge_type, target in sorted(traversal.edges)
+            ]
 
+            return GraphData(nodes=nodes, edges=edges, next_cursor=next_cursor)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/node/{node_type}/{node_id}", response_model=GraphNode)
+async def get_graph_node(
+    node_type: str = Path(..., regex="^(company|claim|news|publication)$"),
+    node_id: str = Path(...)
+):
+    """Properties of a single node, loaded lazily by the graph view"""
+    driver = get_neo4j()
+    if not driver:
+        raise HTTPException(status_code=503, detail="Neo4j unavailable")
+
+    label = next(label for label, (api_type, _, _) in NODE_TYPES.items() if api_type == node_type)
+    _, id_property, _ = NODE_TYPES[label]
+
+    try:
+        with driver.session() as session:
+            record = session.run(
+                f"MATCH (n:{label} {{{id_property}: $node_id}}) RETURN n, elementId(n) AS id LIMIT 1",
+                node_id=node_id
+            ).single()
+            if record is None and label == "Company":
+                # Companies created from mentions are keyed by name
+                record = session.run(
+                    "MATCH (n:Company {name: $node_id}) RETURN n, elementId(n) AS id LIMIT 1",
+                    node_id=node_id
+                ).single()
+
+            if record is None:
+                raise HTTPException(status_code=404, detail="Node not found")
+
+            return GraphNode(
+                id=node_key(label, record['n'], record['id']),
+                label=node_label(label, record['n']),
+                type=node_type,
+                properties=dict(record['n'])
+            )
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/relationships")
 async def get_relationship_stats():
-    """Get statistics about knowledge graph relationships"""
+    """Get statistics about knowledge graph relationships
+
+    Served from a snapshot refreshed in the background (see graph_stats);
+    only the first request after startup computes it inline.
+    """
+    if graph_stats.snapshot is not None:
+        return graph_stats.snapshot
+
+    driver = get_neo4j()
+    if not driver:
+        raise HTTPException(status_code=503, detail="Neo4j unavailable")
+
+    try:
+        return await run_in_threadpool(graph_stats.refresh, driver)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        driver.close()
+
+
+@router.get("/rankings")
+async def get_rankings(
+    node_type: str = Query(default="company", regex="^(company|claim|news|publication)$"),
+    limit: int = Query(default=20, ge=1, le=100)
+):
+    """Most influential nodes by PageRank (written by the analytics job)"""
+    driver = get_neo4j()
+    if not driver:
+        raise HTTPException(status_code=503, detail="Neo4j unavailable")
+
+    label = next(label for label, (api_type, _, _) in NODE_TYPES.items() if api_type == node_type)
+
+    try:
+        with driver.session() as session:
+            result = session.run(f"""
+                MATCH (n:{label}) WHERE n.pagerank IS NOT NULL
+                RETURN n, elementId(n) AS element_id
+                ORDER BY n.pagerank DESC
+                LIMIT $limit
+            """, limit=limit)
+
+            return {
+                "type": node_type,
+                "rankings": [
+                    {
+                        "id": node_key(label, record['n'], record['element_id']),
+                        "label": node_label(label, record['n']),
+                        "pagerank": record['n']['pagerank'],
+                        "community": record['n'].get('community')
+                    }
+                    for record in result
+                ],
+                "last_run": graph_analytics.last_run
+            }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/communities")
+async def get_communities(
+    limit: int = Query(default=20, ge=1, le=100),
+    members: int = Query(default=10, ge=1, le=50)
+):
+    """Largest company communities (Louvain) with their top companies"""
     driver = get_neo4j()
     if not driver:
         raise HTTPException(status_code=503, detail="Neo4j unavailable")
 
     try:
         with driver.session() as session:
-            # Count nodes
-            node_counts = session.run("""
-                MATCH (n)
-                RETURN labels(n)[0] as label, count(n) as count
-            """)
-
-            nodes_stats = {}
-            for record in node_counts:
-                nodes_stats[record['label']] = record['count']
-
-            # Count relationships
-            rel_counts = session.run("""
-                MATCH ()-[r]->()
-                RETURN type(r) as type, count(r) as count
-            """)
-
-            rel_stats = {}
-            for record in rel_counts:
-                rel_stats[record['type']] = record['count']
+            result = session.run("""
+                MATCH (c:Company) WHERE c.community IS NOT NULL
+                WITH c ORDER BY c.pagerank DESC
+                WITH c.community AS community, count(c) AS size, collect(c)[..$members] AS top
+                RETURN community, size,
+                       [company IN top | {id: coalesce(company.company_id, company.name),
+                                         name: company.name,
+                                         pagerank: company.pagerank}] AS companies
+                ORDER BY size DESC
+                LIMIT $limit
+            """, limit=limit, members=members)
 
             return {
-                "nodes": nodes_stats,
-                "relationships": rel_stats
+                "communities": [
+                    {
+                        "community": record['community'],
+                        "size": record['size'],
+                        "companies": record['companies']
+                    }
+                    for record in result
+                ],
+                "last_run": graph_analytics.last_run
             }
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/company/{company_id}/similar")
+async def get_similar_companies(
+    company_id: str,
+    limit: int = Query(default=10, ge=1, le=50)
+):
+    """Companies most similar by shared news and publication coverage"""
+    driver = get_neo4j()
+    if not driver:
+        raise HTTPException(status_code=503, detail="Neo4j unavailable")
+
+    try:
+        with driver.session() as session:
+            result = session.run("""
+                MATCH (c:Company {company_id: $company_id})-[s:SIMILAR_TO]->(other:Company)
+                RETURN other, s.score AS score
+                ORDER BY score DESC
+                LIMIT $limit
+            """, company_id=company_id, limit=limit)
+
+            return {
+                "company_id": company_id,
+                "similar": [
+                    {
+                        "id": record['other'].get('company_id') or record['other'].get('name'),
+                        "name": record['other'].get('name'),
+                        "score": record['score'],
+                        "community": record['other'].get('community')
+                    }
+                    for record in result
+                ]
+            }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/analytics/status")
+async def get_analytics_status():
+    """Outcome of the last graph analytics run"""
+    return {"last_run": graph_analytics.last_run}
@@ -2,22 +2,70 @@
 Search API routes
 """
 
-from fastapi import APIRouter, HTTPException, Query
-from ..models import SearchQuery, SearchResult
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from ..models import SearchQuery, SearchResult, Suggestion, SuggestResponse
 from ..database import get_elasticsearch
+from ..cache import TTLCache, cached
+from ..metrics import LatencyTracker
+from ..pagination import search_page, check_offset
+from ..query_builder import ALL_INDICES, build_search
+from ..serialization import FAST_SERIALIZATION, trusted_response
+from ..projection import fields_param, source_filter
+from ..partitions import logical_index, resolve_indices
+import os
 import time
 
 router = APIRouter()
 
+# Completion sub-fields backing autocomplete: type -> [(index, field, id field)]
+SUGGEST_SOURCES = {
+    "company": [("ecotrace_companies", "name.suggest", "company_id")],
+    "claim_type": [("ecotrace_claims", "claim_type.suggest", None)],
+    "title": [
+        ("ecotrace_news", "title.suggest", "article_id"),
+        ("ecotrace_publications", "title.suggest", "publication_id"),
+    ],
+}
+
+# Relevance order for cursor pages (pagination adds the _shard_doc tiebreaker)
+SCORE_SORT = [{"_score": {"order": "desc"}}]
+
+SUGGEST_CACHE_TTL = int(os.getenv("SUGGEST_CACHE_TTL", 60))
+
+suggest_cache = TTLCache(maxsize=4096, ttl=SUGGEST_CACHE_TTL)
+suggest_latency = LatencyTracker(target_p99_ms=float(os.getenv("SUGGEST_P99_TARGET_MS", 50)))
+
+
+def search_result(total, results, took_ms, next_cursor):
+    """SearchResult, or the same shape unvalidated on the fast path"""
+    if FAST_SERIALIZATION:
+        return trusted_response({
+            "total": total,
+            "results": results,
+            "took_ms": took_ms,
+            "next_cursor": next_cursor
+        })
+    return SearchResult(total=total, results=results, took_ms=took_ms, next_cursor=next_cursor)
+
 
 @router.get("/", response_model=SearchResult)
 async def search(
     q: str = Query(..., min_length=1),
     index: str = Query(default="all", regex="^(all|companies|claims|news|publications|regulatory)$"),
     limit: int = Query(default=10, ge=1, le=100),
-    offset: int = Query(default=0, ge=0)
+    offset: int = Query(default=0, ge=0),
+    cursor: Optional[str] = Query(default=None, description="'start', or next_cursor from the previous page"),
+    date_from: Optional[str] = Query(default=None, description="Earliest date, e.g. 2024-01-01"),
+    date_to: Optional[str] = Query(default=None, description="Latest date, e.g. 2024-03-31"),
+    fields: Optional[List[str]] = Depends(fields_param)
 ):
-    """Full-text search across all indices"""
+    """Full-text search across all indices
+
+    With date_from/date_to only dated records in the range are returned,
+    and only the news/regulatory partitions covering it are searched.
+    """
     es = get_elasticsearch()
     if not es:
         raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
@@ -25,47 +73,49 @@ async def search(
     try:
         start_time = time.time()
 
-        # Determine which indices to search
-        if index == "all":
-            indices = "ecotrace_*"
-        else:
-            indices = f"ecotrace_{index}"
-
-        # Build search query
-        search_query = {
-            "multi_match": {
-                "query": q,
-                "fields": [
-                    "name^3",
-                    "company_name^3",
-                    "title^2",
-                    "claim_text^2",
-                    "content",
-                    "abstract",
-                    "description"
-                ],
-                "fuzziness": "AUTO"
+        # Each index is searched on its own text fields only
+        indices, search_query = build_search(
+            q,
+            ALL_INDICES if index == "all" else [f"ecotrace_{index}"],
+            fuzziness="AUTO",
+            date_from=date_from,
+            date_to=date_to
+        )
+        indices = resolve_indices(es, indices, date_from, date_to)
+        if not indices:
+            return search_result(0, [], int((time.time() - start_time) * 1000), None)
+
+        highlight = {
+            "fields": {
+                "claim_text": {},
+                "content": {"fragment_size": 150},
+                "abstract": {"fragment_size": 150}
             }
         }
 
-        response = es.search(
-            index=indices,
-            query=search_query,
-            from_=offset,
-            size=limit,
-            highlight={
-                "fields": {
-                    "claim_text": {},
-                    "content": {"fragment_size": 150},
-                    "abstract": {"fragment_size": 150}
-                }
-            }
-        )
+        next_cursor = None
+        if cursor:
+            response, next_cursor = search_page(
+                es, indices, cursor, search_query, limit, SCORE_SORT,
+                highlight=highlight,
+                **source_filter("search", fields)
+            )
+        else:
+            check_offset(offset, limit)
+            response = es.search(
+                index=indices,
+                query=search_query,
+                from_=offset,
+                size=limit,
+                highlight=highlight,
+                ignore_unavailable=True,
+                **source_filter("search", fields)
+            )
 
         results = []
         for hit in response['hits']['hits']:
             result = hit['_source']
-            result['_index'] = hit['_index']
+            result['_index'] = logical_index(hit['_index'])
             result['_score'] = hit['_score']
             if 'highlight' in hit:
                 result['_highlight'] = hit['highlight']
@@ -73,16 +123,101 @@ async def search(
 
         took_ms = int((time.time() - start_time) * 1000)
 
-        return SearchResult(
-            total=response['hits']['total']['value'],
-            results=results,
-            took_ms=took_ms
+        return search_result(response['hits']['total']['value'], results, took_ms, next_cursor)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@cached(suggest_cache, key_func=lambda es, prefix, types, size, fuzzy: (prefix, types, size, fuzzy))
+async def fetch_suggestions(es, prefix, types, size, fuzzy):
+    """Run all completion suggesters in a single msearch round trip"""
+    searches = []
+    targets = []
+    for suggestion_type in types:
+        for index, field, id_field in SUGGEST_SOURCES[suggestion_type]:
+            completion = {"field": field, "size": size, "skip_duplicates": True}
+            if fuzzy:
+                completion["fuzzy"] = {"fuzziness": "AUTO"}
+
+            searches.append({"index": index})
+            searches.append({
+                "suggest": {"s": {"prefix": prefix, "completion": completion}},
+                "_source": [id_field] if id_field else False
+            })
+            targets.append((suggestion_type, id_field))
+
+    # Run the blocking client call off the event loop so coalescing works
+    response = await run_in_threadpool(es.msearch, searches=searches)
+
+    suggestions = []
+    for (suggestion_type, id_field), result in zip(targets, response['responses']):
+        if 'error' in result:
+            continue
+        for option in result['suggest']['s'][0]['options']:
+            source = option.get('_source') or {}
+            suggestions.append(Suggestion(
+                text=option['text'],
+                type=suggestion_type,
+                id=source.get(id_field) if id_field else None,
+                index=logical_index(option['_index']) if option.get('_index') else None
+            ))
+
+    return suggestions
+
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=100),
+    types: str = Query(default="company,claim_type,title", regex="^(company|claim_type|title)(,(company|claim_type|title))*$"),
+    size: int = Query(default=5, ge=1, le=20),
+    fuzzy: bool = False
+):
+    """Autocomplete company names, claim types and article titles
+
+    Backed by completion suggesters instead of full-text search, with
+    identical in-flight prefixes coalesced and results cached briefly.
+    """
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    try:
+        start_time = time.time()
+
+        prefix = q.strip().lower()
+        requested = tuple(sorted(set(types.split(","))))
+        suggestions, cache_hit = await fetch_suggestions(es, prefix, requested, size, fuzzy)
+
+        took_ms = int((time.time() - start_time) * 1000)
+        suggest_latency.record(took_ms)
+
+        # Let the browser reuse results while the user edits the same prefix
+        response.headers["Cache-Control"] = f"public, max-age={SUGGEST_CACHE_TTL}"
+
+        return SuggestResponse(
+            query=q,
+            suggestions=suggestions,
+            took_ms=took_ms,
+            cached=cache_hit
         )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/suggest/stats")
+async def suggest_stats():
+    """Autocomplete latency percentiles against the p99 target"""
+    return {
+        "latency": suggest_latency.summary(),
+        "cache_entries": len(suggest_cache)
+    }
+
+
 @router.post("/advanced", response_model=SearchResult)
 async def advanced_search(search_query: SearchQuery):
     """Advanced search with filters"""
@@ -93,30 +228,40 @@ async def advanced_search(search_query: SearchQuery):
     try:
         start_time = time.time()
 
-        # Build query with filters
-        must = [{"multi_match": {"query": search_query.query, "fields": ["*"]}}]
-
-        if search_query.filters:
-            for key, value in search_query.filters.items():
-                must.append({"match": {key: value}})
-
-        query = {"bool": {"must": must}}
-
-        response = es.search(
-            index="ecotrace_*",
-            query=query,
-            from_=search_query.offset,
-            size=search_query.limit
+        # Exact filters go in filter context; indices they cannot apply to are skipped
+        indices, query = build_search(
+            search_query.query,
+            filters=search_query.filters,
+            date_from=search_query.date_from,
+            date_to=search_query.date_to
         )
+        indices = resolve_indices(es, indices, search_query.date_from, search_query.date_to)
+        if not indices:
+            return search_result(0, [], int((time.time() - start_time) * 1000), None)
+
+        next_cursor = None
+        if search_query.cursor:
+            response, next_cursor = search_page(
+                es, indices, search_query.cursor, query, search_query.limit, SCORE_SORT,
+                **source_filter("search", search_query.fields)
+            )
+        else:
+            check_offset(search_query.offset, search_query.limit)
+            response = es.search(
+                index=indices,
+                query=query,
+                from_=search_query.offset,
+                size=search_query.limit,
+                ignore_unavailable=True,
+                **source_filter("search", search_query.fields)
+            )
 
         results = [hit['_source'] for hit in response['hits']['hits']]
         took_ms = int((time.time() - start_time) * 1000)
 
-        return SearchResult(
-            total=response['hits']['total']['value'],
-            results=results,
-            took_ms=took_ms
-        )
+        return search_result(response['hits']['total']['value'], results, took_ms, next_cursor)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
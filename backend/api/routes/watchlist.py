@@ -0,0 +1,236 @@
+"""
+Watchlist API routes
+Saved searches stored as percolator queries. The crawler percolates new
+records against them and records matches in ecotrace_watch_matches (see
+ecotrace_crawler/watchlist.py).
+"""
+
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from elasticsearch import NotFoundError
+from ..models import Watch, WatchCreate, WatchMatch
+from ..database import get_elasticsearch
+from ..query_builder import FILTER_FIELDS, TEXT_FIELDS, filter_clauses, validate_filters
+from datetime import datetime
+import ipaddress
+import socket
+import uuid
+
+router = APIRouter()
+
+WATCHLIST_INDEX = "ecotrace_watchlist"
+MATCHES_INDEX = "ecotrace_watch_matches"
+
+WATCH_KINDS = ["claims", "news", "publications", "regulatory"]
+
+# How dynamic mapping indexes crawled strings, so percolated documents
+# analyse the same way as in their own index
+TEXT_WITH_KEYWORD = {"type": "text", "fields": {"keyword": {"type": "keyword", "ignore_above": 256}}}
+
+
+def watchlist_mapping():
+    """Saved queries plus every document field they can refer to"""
+    properties = {
+        "query": {"type": "percolator"},
+        "doc_kind": {"type": "keyword"},
+        "watch": {
+            "properties": {
+                "name": {"type": "text"},
+                "query": {"type": "text", "index": False},
+                "kinds": {"type": "keyword"},
+                "filters": {"type": "object", "enabled": False},
+                "owner": {"type": "keyword"},
+                "webhook_url": {"type": "keyword", "index": False},
+                "created_at": {"type": "date"},
+            }
+        },
+    }
+    for kind in WATCH_KINDS:
+        index = f"ecotrace_{kind}"
+        for field in TEXT_FIELDS[index]:
+            properties.setdefault(field.split("^")[0], TEXT_WITH_KEYWORD)
+        for fields in FILTER_FIELDS.values():
+            if index in fields:
+                properties.setdefault(fields[index].removesuffix(".keyword"), TEXT_WITH_KEYWORD)
+    return {"properties": properties}
+
+
+def ensure_watchlist_index(es):
+    mapping = watchlist_mapping()
+    if not es.indices.exists(index=WATCHLIST_INDEX):
+        es.indices.create(index=WATCHLIST_INDEX, mappings=mapping)
+    else:
+        es.indices.put_mapping(index=WATCHLIST_INDEX, properties=mapping["properties"])
+
+
+def build_watch_query(text, kinds, filters):
+    """Percolator query matching documents of the watched kinds
+
+    Percolated documents carry their kind in doc_kind; each kind only
+    matches on its own text fields and the filters that apply to it.
+    """
+    validate_filters(filters)
+
+    per_kind = []
+    for kind in kinds:
+        index = f"ecotrace_{kind}"
+        clauses = filter_clauses(index, filters)
+        if clauses is None:
+            continue
+        must = []
+        if text:
+            must.append({"multi_match": {"query": text, "fields": TEXT_FIELDS[index], "operator": "and"}})
+        per_kind.append({"bool": {"must": must, "filter": [{"term": {"doc_kind": kind}}] + clauses}})
+
+    if not per_kind:
+        raise HTTPException(status_code=400, detail="Filters do not apply to any watched kind")
+    if len(per_kind) == 1:
+        return per_kind[0]
+    return {"bool": {"should": per_kind, "minimum_should_match": 1}}
+
+
+def is_public_host(host):
+    """Whether every address host resolves to is publicly routable
+
+    Keeps the crawler from posting to loopback, private, link-local or
+    reserved addresses on behalf of whoever created a watch; the crawler
+    checks again before each push.
+    """
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host.strip("[]"), None)}
+    except (socket.gaierror, UnicodeError):
+        return False
+    return bool(addresses) and all(ipaddress.ip_address(address.split("%")[0]).is_global for address in addresses)
+
+
+def watch_from_source(watch_id, source):
+    watch = dict(source.get("watch", {}))
+    webhook_url = watch.pop("webhook_url", None)
+    return Watch(watch_id=watch_id, has_webhook=bool(webhook_url), **watch)
+
+
+@router.post("/", response_model=Watch, status_code=201)
+async def create_watch(watch: WatchCreate):
+    """Save a search; new matching records are recorded and pushed to webhook_url"""
+    unknown = sorted(set(watch.kinds) - set(WATCH_KINDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown kind(s): {', '.join(unknown)}. Allowed: {', '.join(WATCH_KINDS)}")
+    if not (watch.query or "").strip() and not watch.filters:
+        raise HTTPException(status_code=400, detail="A watch needs a query or filters")
+    # Resolving the host blocks, so it runs off the event loop
+    if watch.webhook_url is not None and not await run_in_threadpool(is_public_host, watch.webhook_url.host):
+        raise HTTPException(status_code=422, detail="webhook_url must point to a public host")
+
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    query = build_watch_query(watch.query, watch.kinds, watch.filters)
+    try:
+        ensure_watchlist_index(es)
+
+        watch_id = uuid.uuid4().hex
+        source = {
+            "query": query,
+            "watch": {**watch.model_dump(mode="json"), "created_at": datetime.utcnow().isoformat()},
+        }
+        # Visible to the next percolation as soon as this returns
+        es.index(index=WATCHLIST_INDEX, id=watch_id, document=source, refresh="wait_for")
+        return watch_from_source(watch_id, source)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/", response_model=List[Watch])
+async def list_watches(owner: Optional[str] = None):
+    """List saved searches, optionally for one owner"""
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    try:
+        response = es.search(
+            index=WATCHLIST_INDEX,
+            query={"term": {"watch.owner": owner}} if owner else {"match_all": {}},
+            size=1000,
+            source=["watch"],
+            sort=[{"watch.created_at": {"order": "desc"}}],
+            ignore_unavailable=True
+        )
+        return [watch_from_source(hit['_id'], hit['_source']) for hit in response['hits']['hits']]
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{watch_id}", response_model=Watch)
+async def get_watch(watch_id: str):
+    """Get a saved search"""
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    try:
+        response = es.get(index=WATCHLIST_INDEX, id=watch_id, source=["watch"])
+    except NotFoundError:
+        raise HTTPException(status_code=404, detail="Watch not found")
+    return watch_from_source(watch_id, response['_source'])
+
+
+@router.delete("/{watch_id}")
+async def delete_watch(watch_id: str):
+    """Delete a saved search and its recorded matches"""
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    try:
+        es.delete(index=WATCHLIST_INDEX, id=watch_id, refresh="wait_for")
+    except NotFoundError:
+        raise HTTPException(status_code=404, detail="Watch not found")
+
+    try:
+        response = es.delete_by_query(
+            index=MATCHES_INDEX,
+            query={"term": {"watch_id": watch_id}},
+            conflicts="proceed",
+            ignore_unavailable=True
+        )
+        return {"watch_id": watch_id, "deleted_matches": response.get('deleted', 0)}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{watch_id}/matches", response_model=List[WatchMatch])
+async def get_watch_matches(
+    watch_id: str,
+    limit: int = Query(default=50, ge=1, le=500),
+    kind: Optional[str] = None,
+    undelivered: bool = False
+):
+    """Recorded matches of a saved search, newest first"""
+    es = get_elasticsearch()
+    if not es:
+        raise HTTPException(status_code=503, detail="Elasticsearch unavailable")
+
+    clauses = [{"term": {"watch_id": watch_id}}]
+    if kind:
+        clauses.append({"term": {"kind": kind}})
+    if undelivered:
+        clauses.append({"term": {"delivered": False}})
+
+    try:
+        response = es.search(
+            index=MATCHES_INDEX,
+            query={"bool": {"filter": clauses}},
+            size=limit,
+            sort=[{"matched_at": {"order": "desc"}}],
+            ignore_unavailable=True
+        )
+        return [WatchMatch(**hit['_source']) for hit in response['hits']['hits']]
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
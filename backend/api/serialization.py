@@ -0,0 +1,50 @@
+"""
+Response serialisation fast path
+With FAST_SERIALIZATION enabled, list endpoints build their responses from
+Elasticsearch _source without per-hit Pydantic validation and encode them
+with orjson. Only use it for documents the crawler pipelines indexed.
+"""
+
+import os
+from functools import lru_cache
+from fastapi.responses import JSONResponse
+
+# Optional - falls back to the standard JSON encoder
+try:
+    from fastapi.responses import ORJSONResponse
+    import orjson  # noqa: F401  (ORJSONResponse imports it lazily)
+    FastJSONResponse = ORJSONResponse
+    ORJSON_AVAILABLE = True
+except ImportError:
+    FastJSONResponse = JSONResponse
+    ORJSON_AVAILABLE = False
+
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "false").lower() in ("1", "true", "yes")
+
+
+@lru_cache(maxsize=None)
+def field_defaults(model):
+    """(name, default) per field; required fields default to None, not PydanticUndefined"""
+    return [
+        (name, None if field.is_required() else field.get_default(call_default_factory=True))
+        for name, field in model.model_fields.items()
+    ]
+
+
+def construct_rows(model, sources):
+    """Model-shaped dicts from trusted _source, without validation
+
+    Equivalent to model_construct(**source).model_dump() for JSON-typed
+    sources, but a plain projection is several times cheaper than both
+    model_construct and validation.
+    """
+    defaults = field_defaults(model)
+    return [
+        {name: source.get(name, default) for name, default in defaults}
+        for source in sources
+    ]
+
+
+def trusted_response(content, headers=None):
+    """Response returned directly so FastAPI skips response_model validation"""
+    return FastJSONResponse(content=content, headers=headers)
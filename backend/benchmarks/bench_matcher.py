@@ -0,0 +1,105 @@
+"""
+Benchmark the single-pass KeywordMatcher against the old per-keyword loops
+
+Usage:
+    scrapy crawl news_spider -o news.jsonl      (from scrapy_crawlers/)
+    python benchmarks/bench_matcher.py news.jsonl [repeat]
+"""
+import json
+import os
+import sys
+import time
+
+# Make the crawler package importable without installing it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scrapy_crawlers'))
+
+from ecotrace_crawler.matching import KeywordMatcher, AHOCORASICK_AVAILABLE
+
+COMPANIES = [
+    'Apple', 'Microsoft', 'Google', 'Amazon', 'Tesla',
+    'ExxonMobil', 'Shell', 'BP', 'Chevron',
+    'Walmart', 'Target', 'Ford', 'GM'
+]
+TOPICS = [
+    'greenwashing', 'net zero', 'carbon neutral', 'climate pledge',
+    'emissions', 'sustainability report', 'ESG', 'renewable energy',
+    'environmental claim', 'climate target', 'carbon offset'
+]
+POSITIVE = [
+    'achieve', 'success', 'leader', 'innovative', 'commit',
+    'progress', 'milestone', 'award', 'recognized', 'certified'
+]
+NEGATIVE = [
+    'greenwash', 'fail', 'mislead', 'accuse', 'lawsuit',
+    'violation', 'false', 'deceptive', 'controversy', 'scandal',
+    'criticize', 'penalty', 'fraud'
+]
+
+
+def legacy(title, content):
+    """The nested loops previously used by NewsSpider.parse_news_article"""
+    mentions = [c for c in COMPANIES if c.lower() in content.lower() or c.lower() in title.lower()]
+    topics = [k for k in TOPICS if k in content.lower() or k in title.lower()]
+    text = (title + ' ' + content).lower()
+    positive = sum(1 for k in POSITIVE if k in text)
+    negative = sum(1 for k in NEGATIVE if k in text)
+    return mentions, topics, positive, negative
+
+
+def single_pass(use_automaton):
+    matcher = (
+        KeywordMatcher(use_automaton=use_automaton)
+        .add('company', COMPANIES)
+        .add('topic', TOPICS, prefix=True)
+        .add('positive', POSITIVE, prefix=True)
+        .add('negative', NEGATIVE, prefix=True)
+    )
+
+    def match(title, content):
+        hits = matcher.scan(title, content)
+        return (
+            list(hits.get('company', {})),
+            list(hits.get('topic', {})),
+            len(hits.get('positive', {})),
+            len(hits.get('negative', {})),
+        )
+    return match
+
+
+def load_corpus(path):
+    docs = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                docs.append((record.get('title') or '', record.get('content') or ''))
+    return docs
+
+
+def run(fn, docs, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for title, content in docs:
+            fn(title, content)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+
+    docs = load_corpus(sys.argv[1])
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    total = len(docs) * repeat
+
+    print(f"documents: {len(docs)} x {repeat}")
+    old = run(legacy, docs, repeat)
+    print(f"legacy loops:   {old:.3f}s ({total / old:.0f} docs/s)")
+
+    backends = [('substring', False)]
+    if AHOCORASICK_AVAILABLE:
+        backends.append(('aho-corasick', True))
+    for name, use_automaton in backends:
+        new = run(single_pass(use_automaton), docs, repeat)
+        print(f"{name + ':':<15} {new:.3f}s ({total / new:.0f} docs/s, {old / new:.2f}x)")
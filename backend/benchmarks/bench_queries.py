@@ -0,0 +1,132 @@
+"""
+Benchmark filter-context queries against the old scoring match filters
+
+Indexes a synthetic claims index (one million documents by default) and
+compares query latency for the previous advanced search shape (match
+filters in must, multi_match over every field) with the query builder's
+shape (term filters in filter context, claim fields only).
+
+Usage:
+    python benchmarks/bench_queries.py [docs] [repeat]
+    python benchmarks/bench_queries.py 1000000 200 --keep    (reuse index on later runs)
+"""
+import os
+import random
+import statistics
+import sys
+import time
+
+from elasticsearch import Elasticsearch, helpers
+
+# Make the api package importable when run from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.query_builder import build_search
+
+INDEX = "ecotrace_bench_claims"
+
+COMPANIES = [
+    'Apple', 'Microsoft', 'Google', 'Amazon', 'Tesla', 'ExxonMobil', 'Shell',
+    'BP', 'Chevron', 'Walmart', 'Target', 'Ford', 'GM', 'Unilever', 'Nestle'
+]
+CLAIM_TYPES = ['net_zero', 'carbon_neutral', 'renewable_energy', 'emissions_reduction', 'general']
+CATEGORIES = ['Climate', 'Energy', 'Waste', 'Water']
+PHRASES = [
+    'reduce scope 1 and 2 emissions by {n}% by {year}',
+    'achieve net zero across operations by {year}',
+    'source {n}% renewable electricity by {year}',
+    'cut plastic packaging by {n}% compared to {base}',
+    'become carbon neutral in our supply chain by {year}',
+]
+QUERIES = ['net zero', 'renewable electricity', 'emissions', 'plastic packaging', 'supply chain']
+
+
+def synthetic_claims(count):
+    rng = random.Random(42)
+    for i in range(count):
+        company = rng.choice(COMPANIES)
+        text = rng.choice(PHRASES).format(
+            n=rng.randint(10, 100), year=rng.randint(2025, 2050), base=rng.randint(2010, 2020)
+        )
+        yield {
+            "_index": INDEX,
+            "_id": f"claim-{i}",
+            "_source": {
+                "claim_id": f"claim-{i}",
+                "company_id": company.lower(),
+                "company_name": company,
+                "claim_text": f"{company} commits to {text}",
+                "claim_type": rng.choice(CLAIM_TYPES),
+                "claim_category": rng.choice(CATEGORIES),
+                "confidence_score": round(rng.random(), 2),
+            }
+        }
+
+
+def populate(es, count):
+    if es.indices.exists(index=INDEX):
+        es.indices.delete(index=INDEX)
+    es.indices.create(index=INDEX, settings={"number_of_replicas": 0, "refresh_interval": "-1"})
+
+    start = time.perf_counter()
+    for _ in helpers.parallel_bulk(es, synthetic_claims(count), chunk_size=5000, thread_count=4):
+        pass
+    es.indices.put_settings(index=INDEX, settings={"refresh_interval": "1s"})
+    es.indices.refresh(index=INDEX)
+    print(f"indexed {count} claims in {time.perf_counter() - start:.1f}s")
+
+
+def legacy_query(text, filters):
+    """The query previously built by advanced_search"""
+    must = [{"multi_match": {"query": text, "fields": ["*"]}}]
+    for key, value in filters.items():
+        must.append({"match": {key: value}})
+    return {"bool": {"must": must}}
+
+
+def builder_query(text, filters):
+    # The bench index mirrors ecotrace_claims, so build for that index
+    _, query = build_search(text, ["ecotrace_claims"], filters)
+    return query
+
+
+def run(es, build, cases, repeat):
+    timings = []
+    for i in range(repeat):
+        text, filters = cases[i % len(cases)]
+        start = time.perf_counter()
+        es.search(index=INDEX, query=build(text, filters), size=20)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "p50": statistics.median(timings),
+        "p95": timings[int(len(timings) * 0.95) - 1],
+        "p99": timings[int(len(timings) * 0.99) - 1],
+    }
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    count = int(args[0]) if args else 1_000_000
+    repeat = int(args[1]) if len(args) > 1 else 200
+
+    es = Elasticsearch([os.getenv("ELASTICSEARCH_URL", "http://localhost:9200")])
+    if "--keep" not in sys.argv or not es.indices.exists(index=INDEX):
+        populate(es, count)
+
+    rng = random.Random(7)
+    cases = [
+        (rng.choice(QUERIES), {"claim_type": rng.choice(CLAIM_TYPES), "company_name": rng.choice(COMPANIES)})
+        for _ in range(50)
+    ]
+
+    for name, build in [("match filters, fields=*", legacy_query), ("filter context, claim fields", builder_query)]:
+        # Warm up caches the same way for both shapes
+        run(es, build, cases, len(cases))
+        stats = run(es, build, cases, repeat)
+        print(f"{name:32s} p50 {stats['p50']:7.2f} ms  p95 {stats['p95']:7.2f} ms  p99 {stats['p99']:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
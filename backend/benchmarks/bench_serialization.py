@@ -0,0 +1,126 @@
+"""
+Benchmark per-request CPU of the list endpoints with and without the
+FAST_SERIALIZATION path
+
+Requests go through the ASGI app in-process against a canned Elasticsearch
+response, so the numbers are the API's own CPU cost per page (routing,
+model validation and JSON encoding), not network or cluster time.
+
+Usage:
+    python benchmarks/bench_serialization.py [rows] [requests]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+# Make the api package importable when run from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.main import app
+from api.routes import claims, companies
+
+ENDPOINTS = [
+    ("/api/claims/?limit={rows}", claims),
+    ("/api/companies/?limit={rows}", companies),
+]
+
+
+def synthetic_source(i, rng):
+    company = rng.choice(['Apple', 'Microsoft', 'Tesla', 'Shell', 'Unilever'])
+    return {
+        "claim_id": f"claim-{i}",
+        "company_id": company.lower(),
+        "company_name": company,
+        "name": company,
+        "industry": "Technology",
+        "website": f"https://{company.lower()}.com",
+        "claim_text": f"{company} commits to reduce scope 1 and 2 emissions by {rng.randint(10, 100)}% by 2030",
+        "claim_type": "emissions_reduction",
+        "claim_category": "Climate",
+        "numerical_value": str(rng.randint(10, 100)),
+        "unit": "%",
+        "target_year": "2030",
+        "confidence_score": round(rng.random(), 2),
+        "source_type": "sustainability_report",
+        "source_url": f"https://{company.lower()}.com/report.pdf",
+        "published_date": "2024-03-01",
+        "extracted_at": "2024-03-02T10:00:00",
+        "raw_context": "lorem ipsum " * 200,
+        "embedding": [rng.random() for _ in range(384)],
+    }
+
+
+class CannedElasticsearch:
+    """Returns the same page for every search, honouring _source filtering"""
+
+    def __init__(self, rows):
+        rng = random.Random(1)
+        self.sources = [synthetic_source(i, rng) for i in range(rows)]
+
+    def search(self, source_includes=None, source_excludes=None, **kwargs):
+        hits = []
+        for source in self.sources:
+            if source_includes:
+                source = {k: v for k, v in source.items() if k in source_includes}
+            elif source_excludes:
+                source = {k: v for k, v in source.items() if k not in source_excludes}
+            hits.append({"_source": source})
+        return {"hits": {"total": {"value": len(hits)}, "hits": hits}}
+
+
+async def call(path):
+    """Minimal in-process ASGI GET, returning the response body size"""
+    route, _, query = path.partition("?")
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": route, "raw_path": route.encode(), "query_string": query.encode(),
+        "headers": [], "client": ("bench", 0), "server": ("bench", 80), "root_path": "",
+    }
+    body = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return sum(len(chunk) for chunk in body)
+
+
+def measure(path, count):
+    loop = asyncio.new_event_loop()
+    try:
+        size = loop.run_until_complete(call(path))  # warm up
+        start = time.process_time()
+        for _ in range(count):
+            loop.run_until_complete(call(path))
+        return (time.process_time() - start) * 1000 / count, size
+    finally:
+        loop.close()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    es = CannedElasticsearch(rows)
+    for path, module in ENDPOINTS:
+        module.get_elasticsearch = lambda: es
+        path = path.format(rows=rows)
+
+        module.FAST_SERIALIZATION = False
+        slow_ms, slow_size = measure(path, count)
+        module.FAST_SERIALIZATION = True
+        fast_ms, fast_size = measure(path, count)
+
+        print(f"{path}")
+        print(f"  validated   {slow_ms:6.2f} ms CPU/request  {slow_size} bytes")
+        print(f"  fast path   {fast_ms:6.2f} ms CPU/request  {fast_size} bytes  ({slow_ms / fast_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
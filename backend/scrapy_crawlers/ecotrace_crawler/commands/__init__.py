@@ -0,0 +1 @@
+# Custom scrapy commands for the EcoTrace crawler (see COMMANDS_MODULE)
@@ -0,0 +1,67 @@
+"""
+Bulk-load JSON Lines / JSON feed exports into the datastores
+
+    scrapy ingest items.jl.gz more.jl [--workers 4] [--batch-size 500]
+                  [--checkpoint ingest-checkpoint.json] [--restart] [--sink mongodb ...]
+
+Interrupted runs resume from the checkpoint file; --restart ignores it.
+"""
+
+import os
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from ecotrace_crawler.ingest import ingest
+from ecotrace_crawler.storage import SINKS
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+
+    def syntax(self):
+        return "[options] <file> ..."
+
+    def short_desc(self):
+        return "Bulk-load JSON Lines feed exports into Elasticsearch, Neo4j and MongoDB"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="writer processes (default: CPU count)")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="records per bulk write (default: 500)")
+        parser.add_argument("--sink", action="append", dest="sinks", choices=list(SINKS),
+                            help="datastore to load (repeatable, default: all)")
+        parser.add_argument("--checkpoint", default="ingest-checkpoint.json",
+                            help="progress file for resuming (default: ingest-checkpoint.json)")
+        parser.add_argument("--restart", action="store_true",
+                            help="ignore the checkpoint and ingest every file from the start")
+
+    def run(self, args, opts):
+        if not args:
+            raise UsageError("No files given")
+        missing = [path for path in args if not os.path.exists(path)]
+        if missing:
+            raise UsageError(f"No such file: {', '.join(missing)}")
+        if opts.workers < 1 or opts.batch_size < 1:
+            raise UsageError("--workers and --batch-size must be positive")
+
+        if opts.restart and os.path.exists(opts.checkpoint):
+            os.remove(opts.checkpoint)
+
+        deadletter_dir = None
+        if self.settings.getbool("DEADLETTER_ENABLED", True):
+            deadletter_dir = self.settings.get("DEADLETTER_DIR", "deadletter")
+
+        summary = ingest(
+            args,
+            opts.sinks or list(SINKS),
+            workers=opts.workers,
+            batch_size=opts.batch_size,
+            checkpoint_path=opts.checkpoint,
+            embedding_dims=self.settings.getint("EMBEDDING_DIMS", 384),
+            deadletter_dir=deadletter_dir,
+            max_pending=self.settings.getint("STORAGE_MAX_PENDING", 2),
+        )
+        print(f"Ingested {summary['written']} record(s), dead-lettered {summary['failed']}, "
+              f"skipped {summary['skipped']}, "
+              f"in {summary['seconds']}s ({summary['docs_per_sec']} docs/sec)")
@@ -0,0 +1,60 @@
+"""
+Move news and regulatory records into time-partitioned indices
+
+    scrapy partition_indices [--kind news ...] [--rollover]
+
+Copies an unpartitioned index into its first partition and replaces it with
+the alias the crawl and API use, then lists the partitions behind each
+alias. Stop the crawlers first - writes made during the copy are lost.
+--rollover starts a new partition now instead of waiting for ILM, e.g. when
+the one being written maps a field with an outdated type.
+"""
+
+from scrapy.commands import ScrapyCommand
+from ecotrace_crawler.mappings import index_mappings
+from ecotrace_crawler.partitions import PARTITIONED_KINDS, ensure_template, migrate, partitions
+from ecotrace_crawler.storage import connect_sink
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Migrate news and regulatory indices to rolled-over partitions"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument("--kind", action="append", dest="kinds", choices=PARTITIONED_KINDS,
+                            help="kind to partition (repeatable, default: all)")
+        parser.add_argument("--rollover", action="store_true",
+                            help="roll each alias over to a new partition")
+
+    def run(self, args, opts):
+        embedding_dims = self.settings.getint("EMBEDDING_DIMS", 384)
+        # Indices still to be migrated may not take the current mappings
+        sink = connect_sink("elasticsearch", embedding_dims, ensure_indices=False)
+        if sink is None:
+            print("Cannot partition: elasticsearch is unavailable")
+            self.exitcode = 1
+            return
+
+        mappings = index_mappings(embedding_dims)
+        try:
+            for kind in opts.kinds or PARTITIONED_KINDS:
+                alias = sink.index_name(kind)
+                moved = migrate(sink.es, alias, mappings.get(kind))
+                if moved:
+                    print(f"{alias}: moved {moved} document(s) into partitions")
+                if opts.rollover:
+                    # The new partition takes the current mappings from the template
+                    ensure_template(sink.es, alias, mappings.get(kind))
+                    result = sink.es.indices.rollover(alias=alias)
+                    print(f"{alias}: rolled over to {result['new_index']}")
+
+                for index, info in partitions(sink.es, alias).items():
+                    print(f"  {index}: {info['docs']} document(s){' (write)' if info['write'] else ''}")
+        finally:
+            sink.close()
@@ -0,0 +1,83 @@
+"""
+Project MongoDB into Elasticsearch and Neo4j
+
+    scrapy project_outbox [--once] [--batch-size 1000] [--interval 2]
+    scrapy project_outbox --rebuild [--kind claims ...]
+
+Without --rebuild the outbox is drained continuously (or until empty with
+--once). --rebuild re-projects the Mongo collections in full.
+"""
+
+import os
+from pymongo import MongoClient
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from ecotrace_crawler.deadletter import DeadLetterLog
+from ecotrace_crawler.projector import PROJECTION_SINKS, OutboxProjector
+from ecotrace_crawler.storage import KINDS, connect_sink
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Project MongoDB documents into Elasticsearch and Neo4j"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument("--once", action="store_true",
+                            help="stop when the outbox is empty")
+        parser.add_argument("--rebuild", action="store_true",
+                            help="re-project every document in the Mongo collections")
+        parser.add_argument("--kind", action="append", dest="kinds", choices=KINDS,
+                            help="collection to rebuild (repeatable, default: all)")
+        parser.add_argument("--sink", action="append", dest="sinks", choices=PROJECTION_SINKS,
+                            help="datastore to project into (repeatable, default: all)")
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="documents per bulk write (default: PROJECTOR_BATCH_SIZE)")
+        parser.add_argument("--interval", type=float, default=None,
+                            help="seconds between polls of an empty outbox (default: PROJECTOR_INTERVAL)")
+
+    def run(self, args, opts):
+        batch_size = opts.batch_size or self.settings.getint("PROJECTOR_BATCH_SIZE", 1000)
+        if batch_size < 1:
+            raise UsageError("--batch-size must be positive")
+
+        sinks = {}
+        for name in opts.sinks or PROJECTION_SINKS:
+            sink = connect_sink(name, self.settings.getint("EMBEDDING_DIMS", 384))
+            if sink is None:
+                print(f"Cannot project: {name} is unavailable")
+                self.exitcode = 1
+                return
+            sinks[name] = sink
+
+        client = MongoClient(os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+        deadletter = DeadLetterLog.from_settings(self.settings, name="projector")
+        projector = OutboxProjector(
+            client[os.getenv("MONGODB_DB", "ecotrace")], sinks,
+            deadletter=deadletter, batch_size=batch_size,
+            max_pending=self.settings.getint("STORAGE_MAX_PENDING", 2),
+        )
+
+        try:
+            if opts.rebuild:
+                print(projector.rebuild(opts.kinds))
+            else:
+                projector.run(
+                    interval=opts.interval or self.settings.getfloat("PROJECTOR_INTERVAL", 2.0),
+                    once=opts.once,
+                )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            projector.close()
+            print(projector.lag())
+            if deadletter:
+                deadletter.close()
+            for sink in sinks.values():
+                sink.close()
+            client.close()
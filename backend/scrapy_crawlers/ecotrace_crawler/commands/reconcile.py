@@ -0,0 +1,76 @@
+"""
+Compare MongoDB, Elasticsearch and Neo4j and repair the differences
+
+    scrapy reconcile [--kind claims ...] [--buckets 4096] [--output diff.jsonl] [--repair]
+
+Every difference is written as a JSON line (kind, store, id, problem) to
+--output, and counted per store. --repair rewrites Elasticsearch and Neo4j
+from MongoDB in bulk.
+"""
+
+import json
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from ecotrace_crawler.reconciler import DEFAULT_BUCKETS, Reconciler
+from ecotrace_crawler.storage import KINDS, SINKS, connect_sink
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Find and repair documents that differ between MongoDB, Elasticsearch and Neo4j"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument("--kind", action="append", dest="kinds", choices=KINDS,
+                            help="kind to reconcile (repeatable, default: all)")
+        parser.add_argument("--buckets", type=int, default=DEFAULT_BUCKETS,
+                            help=f"hash buckets per kind (default: {DEFAULT_BUCKETS})")
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="documents per scan page and repair batch (default: 1000)")
+        parser.add_argument("--output", metavar="FILE",
+                            help="write every difference to FILE as JSON lines")
+        parser.add_argument("--repair", action="store_true",
+                            help="rewrite Elasticsearch and Neo4j from MongoDB")
+
+    def run(self, args, opts):
+        if opts.buckets < 1 or opts.batch_size < 1:
+            raise UsageError("--buckets and --batch-size must be positive")
+
+        sinks = {}
+        for name in SINKS:
+            sink = connect_sink(name, self.settings.getint("EMBEDDING_DIMS", 384))
+            if sink is None:
+                print(f"Cannot reconcile: {name} is unavailable")
+                self.exitcode = 1
+                for connected in sinks.values():
+                    connected.close()
+                return
+            sinks[name] = sink
+
+        reconciler = Reconciler(sinks, buckets=opts.buckets, batch_size=opts.batch_size)
+        output = open(opts.output, "w", encoding="utf-8") if opts.output else None
+        try:
+            for kind in opts.kinds or KINDS:
+                differences = reconciler.diff(kind)
+                for store, found in differences.items():
+                    if output:
+                        for problem, doc_ids in found.items():
+                            for doc_id in doc_ids:
+                                output.write(json.dumps(
+                                    {"kind": kind, "store": store, "id": doc_id, "problem": problem}
+                                ) + "\n")
+                    counts = ", ".join(f"{len(doc_ids)} {problem}" for problem, doc_ids in found.items())
+                    print(f"{kind} in {store}: {counts}")
+
+                if opts.repair and any(any(found.values()) for found in differences.values()):
+                    print(f"{kind} repaired: {reconciler.repair(kind, differences)}")
+        finally:
+            if output:
+                output.close()
+            for sink in sinks.values():
+                sink.close()
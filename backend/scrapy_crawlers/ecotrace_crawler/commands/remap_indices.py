@@ -0,0 +1,64 @@
+"""
+Reindex Elasticsearch indices whose field types predate the current mappings
+
+    scrapy remap_indices [--kind claims ...] [--dry-run]
+
+put_mapping cannot change a field's type - e.g. dates or years that
+dynamic mapping indexed as text before they were mapped explicitly - so
+the crawl refuses to write to such an index. This copies each conflicting
+index into a new one with the current mappings and moves the old name onto
+it as an alias. Stop the crawlers first - writes made during the copy are
+lost. Dates stored as free text before normalisation stay unindexed in the
+copy until their documents are crawled or ingested again. Partitioned kinds
+are fixed with `scrapy partition_indices` instead.
+"""
+
+from scrapy.commands import ScrapyCommand
+from ecotrace_crawler.mappings import index_mappings, mapping_conflicts, remap
+from ecotrace_crawler.partitions import PARTITIONED_KINDS
+from ecotrace_crawler.storage import KINDS, connect_sink
+
+REMAPPED_KINDS = [kind for kind in KINDS if kind not in PARTITIONED_KINDS]
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Reindex indices whose field types conflict with the current mappings"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument("--kind", action="append", dest="kinds", choices=REMAPPED_KINDS,
+                            help="kind to check (repeatable, default: all)")
+        parser.add_argument("--dry-run", action="store_true",
+                            help="list the conflicts without reindexing")
+
+    def run(self, args, opts):
+        embedding_dims = self.settings.getint("EMBEDDING_DIMS", 384)
+        sink = connect_sink("elasticsearch", embedding_dims, ensure_indices=False)
+        if sink is None:
+            print("Cannot remap: elasticsearch is unavailable")
+            self.exitcode = 1
+            return
+
+        mappings = index_mappings(embedding_dims)
+        try:
+            for kind in opts.kinds or REMAPPED_KINDS:
+                index = sink.index_name(kind)
+                if kind not in mappings or not sink.es.indices.exists(index=index):
+                    continue
+                conflicts = mapping_conflicts(sink.es, index, mappings[kind]['properties'])
+                if not conflicts:
+                    print(f"{index}: mappings up to date")
+                    continue
+                for field, (current, wanted) in sorted(conflicts.items()):
+                    print(f"  {index}.{field}: {current} -> {wanted}")
+                if not opts.dry_run:
+                    target, copied = remap(sink.es, index, mappings[kind])
+                    print(f"{index}: copied {copied} document(s) into {target}")
+        finally:
+            sink.close()
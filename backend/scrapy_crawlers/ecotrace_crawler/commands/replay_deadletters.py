@@ -0,0 +1,161 @@
+"""
+Replay failed datastore writes from the dead-letter log
+
+    scrapy replay_deadletters [--sink elasticsearch] [--batch-size 500] [--keep]
+
+Each rotated segment is bulk-written back to the sinks its records failed
+on, then deleted. Records that fail again are spooled to a new segment.
+
+Elasticsearch and Neo4j records are replayed from the document MongoDB
+holds now, not the spooled copy, so a replay never overwrites a newer
+version written by a later crawl or projection.
+"""
+
+import logging
+import os
+import time
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from ecotrace_crawler.deadletter import DeadLetterLog, read_segment, segments
+from ecotrace_crawler.projector import PROJECTION_SINKS
+from ecotrace_crawler.storage import SINKS, StorageRecord, connect_sink
+
+logger = logging.getLogger(__name__)
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Replay failed datastore writes from the dead-letter log"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument("--sink", action="append", dest="sinks", choices=list(SINKS),
+                            help="only replay writes for this sink (repeatable)")
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="records per bulk write (default: 500)")
+        parser.add_argument("--keep", action="store_true",
+                            help="keep replayed segments instead of deleting them")
+
+    def run(self, args, opts):
+        if opts.batch_size < 1:
+            raise UsageError("--batch-size must be positive")
+
+        directory = self.settings.get("DEADLETTER_DIR", "deadletter")
+        paths = segments(directory)
+        if not paths:
+            print(f"No dead-letter segments in {directory}")
+            return
+
+        retry = DeadLetterLog(
+            directory,
+            max_bytes=self.settings.getint("DEADLETTER_MAX_BYTES", 64 * 1024 * 1024),
+            name="replay",
+        )
+        replay = Replay(retry, opts.batch_size, self.settings.getint("EMBEDDING_DIMS", 384))
+        started = time.time()
+
+        try:
+            for path in paths:
+                for sink_name, record, reason in read_segment(path):
+                    if opts.sinks and sink_name not in opts.sinks:
+                        # Not ours to replay; carry it over unchanged
+                        retry.append(sink_name, [record], reason)
+                    else:
+                        replay.add(sink_name, record)
+                replay.flush()
+
+                if opts.keep:
+                    os.rename(path, path[:-len(".jsonl.gz")] + ".replayed.jsonl.gz")
+                else:
+                    os.remove(path)
+                print(f"Replayed {path}")
+        finally:
+            replay.close()
+            retry.close()
+
+        elapsed = max(time.time() - started, 1e-6)
+        for sink_name, (written, failed) in sorted(replay.counts.items()):
+            print(f"{sink_name}: {written} written, {failed} failed ({written / elapsed:.0f} docs/sec)")
+
+
+class Replay:
+    """Buffers records per sink and writes them back in bulk"""
+
+    def __init__(self, retry, batch_size, embedding_dims):
+        self.retry = retry
+        self.batch_size = batch_size
+        self.embedding_dims = embedding_dims
+        self.sinks = {}
+        self.buffers = {}
+        self.counts = {}
+
+    def sink(self, name):
+        if name not in self.sinks:
+            self.sinks[name] = connect_sink(name, self.embedding_dims)
+        return self.sinks[name]
+
+    def add(self, sink_name, record):
+        buffer = self.buffers.setdefault(sink_name, [])
+        buffer.append(record)
+        if len(buffer) >= self.batch_size:
+            self.write(sink_name)
+
+    def flush(self):
+        for sink_name in list(self.buffers):
+            self.write(sink_name)
+
+    def write(self, sink_name):
+        records = self.buffers.pop(sink_name, [])
+        if not records:
+            return
+
+        written, failed = self.counts.get(sink_name, (0, 0))
+        sink = self.sink(sink_name)
+        if sink is not None and sink_name in PROJECTION_SINKS:
+            records = self.current(records)
+        if sink is None:
+            self.retry.append(sink_name, records, f"{sink_name} unavailable")
+            self.counts[sink_name] = (written, failed + len(records))
+            return
+
+        try:
+            sink.write_batch(records)
+            lost = 0
+        except Exception as e:
+            self.retry.spool_failure(sink_name, records, e)
+            lost = len(getattr(e, "failed", None) or records)
+        self.counts[sink_name] = (written + len(records) - lost, failed + lost)
+
+    def current(self, records):
+        """Records with the document MongoDB stores now, where it has one
+
+        Mongo holds the latest version of every document, while a spooled
+        copy may predate later writes. Records Mongo does not have are
+        replayed as spooled.
+        """
+        mongo = self.sink("mongodb")
+        if mongo is None:
+            logger.warning("MongoDB unavailable - replaying spooled documents as they are")
+            return records
+
+        ids_by_kind = {}
+        for record in records:
+            if record.doc_id:
+                ids_by_kind.setdefault(record.kind, set()).add(record.doc_id)
+        stored = {kind: mongo.find(kind, doc_ids) for kind, doc_ids in ids_by_kind.items()}
+
+        return [
+            StorageRecord(record.kind, record.doc_id, stored[record.kind][record.doc_id])
+            if record.doc_id in stored.get(record.kind, {}) else record
+            for record in records
+        ]
+
+    def close(self):
+        for sink in self.sinks.values():
+            if sink:
+                sink.close()
@@ -0,0 +1,54 @@
+"""
+Update the daily rollup index
+
+    scrapy rollup [--kind claims ...] [--since 2024-01-01T00:00:00] [--full]
+
+Rebuilds the days with documents written since the last run (or since
+--since); --full rebuilds every day. Meant to run on a schedule when the
+crawl does not keep rollups current itself, e.g. with STORAGE_PROJECTION.
+"""
+
+from scrapy.commands import ScrapyCommand
+from scrapy.exceptions import UsageError
+from ecotrace_crawler.dates import DateNormalizer
+from ecotrace_crawler.rollups import ROLLUP_KINDS, DailyRollup
+from ecotrace_crawler.storage import connect_sink
+
+
+class Command(ScrapyCommand):
+    requires_project = True
+
+    def syntax(self):
+        return "[options]"
+
+    def short_desc(self):
+        return "Recompute daily claim and news counters for the trend endpoints"
+
+    def add_options(self, parser):
+        super().add_options(parser)
+        parser.add_argument("--kind", action="append", dest="kinds", choices=list(ROLLUP_KINDS),
+                            help="kind to roll up (repeatable, default: all)")
+        parser.add_argument("--since", default=None,
+                            help="rebuild days with documents written after this date (default: last run)")
+        parser.add_argument("--full", action="store_true",
+                            help="rebuild every day")
+
+    def run(self, args, opts):
+        since = None
+        if opts.since:
+            since = DateNormalizer()("since", opts.since)
+            if since is None:
+                raise UsageError(f"Cannot parse --since date: {opts.since}")
+
+        sink = connect_sink("elasticsearch", self.settings.getint("EMBEDDING_DIMS", 384))
+        if sink is None:
+            print("Cannot roll up: elasticsearch is unavailable")
+            self.exitcode = 1
+            return
+
+        rollup = DailyRollup(sink.es, sink.index_prefix, lateness=self.settings.getint("ROLLUP_LATENESS", 3600))
+        try:
+            for kind, days in rollup.update(opts.kinds, since=since, full=opts.full).items():
+                print(f"{kind}: rebuilt {days} day(s)")
+        finally:
+            sink.close()
@@ -0,0 +1,161 @@
+"""
+Date normalisation
+Spiders store dates as their sources print them - RSS pubDate strings,
+PubMed citation text, EDGAR table cells. These helpers turn them into
+ISO-8601 UTC timestamps that Elasticsearch indexes as dates.
+"""
+
+import re
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+# Date fields per item kind
+DATE_FIELDS = {
+    'companies': ['crawled_at'],
+    'claims': ['published_date', 'extracted_at'],
+    'regulatory': ['filed_date', 'crawled_at'],
+    'publications': ['publication_date', 'crawled_at'],
+    'news': ['published_date', 'crawled_at'],
+}
+
+# Elasticsearch mapping for normalised dates; epoch millis are accepted too
+DATE_MAPPING = {
+    'type': 'date',
+    'format': 'strict_date_optional_time||epoch_millis',
+    'ignore_malformed': True,
+}
+
+# Formats tried after ISO-8601 and RFC 2822, most common first
+STRPTIME_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%m/%d/%Y',
+    '%B %d, %Y',
+    '%b %d, %Y',
+    '%d %B %Y',
+    '%d %b %Y',
+    '%Y/%m/%d',
+]
+
+# PubMed citations start with the date: "2023 Mar 15;14(1):1234", "2021 Dec;...",
+# "2020 Spring;...", "2019 Jul-Aug;..."
+CITATION_DATE = re.compile(r'^\s*(\d{4})(?:\s+([A-Za-z]+))?(?:\s+(\d{1,2}))?(?!\w|-\d{1,2}\b)')
+YEAR_ONLY = re.compile(r'^\s*(\d{4})\s*$')
+YEAR_MONTH = re.compile(r'^\s*(\d{4})-(\d{1,2})\s*$')
+
+# Integers in this range are years; other numbers are epoch milliseconds
+MIN_YEAR, MAX_YEAR = 1800, 2100
+
+# First month of the seasons PubMed prints instead of a month
+SEASONS = {'spring': 3, 'summer': 6, 'fall': 9, 'autumn': 9, 'winter': 12}
+
+
+def parse_iso(text):
+    return datetime.fromisoformat(text.replace('Z', '+00:00'))
+
+
+def parse_rfc2822(text):
+    parsed = parsedate_to_datetime(text)
+    if parsed is None:
+        raise ValueError(text)
+    return parsed
+
+
+def parse_citation(text):
+    match = CITATION_DATE.match(text)
+    if not match:
+        raise ValueError(text)
+    year, month, day = match.groups()
+    if not month:
+        month_number = 1
+    elif month.lower() in SEASONS:
+        month_number = SEASONS[month.lower()]
+    else:
+        month_number = datetime.strptime(month[:3].title(), '%b').month
+    return datetime(int(year), month_number, int(day) if day else 1)
+
+
+def strptime_parser(fmt):
+    return lambda text: datetime.strptime(text, fmt)
+
+
+PARSERS = (
+    [('iso', parse_iso), ('rfc2822', parse_rfc2822)]
+    + [(fmt, strptime_parser(fmt)) for fmt in STRPTIME_FORMATS]
+    + [('citation', parse_citation)]
+)
+
+
+def to_iso(parsed):
+    """ISO-8601 in UTC with millisecond precision; naive times are taken as UTC"""
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime('%Y-%m-%dT%H:%M:%S.') + f'{parsed.microsecond // 1000:03d}Z'
+
+
+def raw_field(field):
+    """Field keeping a date's source text when it was not already ISO-8601"""
+    return f'{field}_raw'
+
+
+class DateNormalizer:
+    """Parses date strings, trying first the format that last worked per field
+
+    Sources rarely mix formats within a field, so the remembered parser
+    usually succeeds on the first attempt.
+    """
+
+    def __init__(self):
+        self.preferred = {}
+        self.normalize = lru_cache(maxsize=4096)(self._normalize)
+
+    def _normalize(self, field, text):
+        """(ISO-8601 string or None, whether text was ISO-8601 already)"""
+        text = text.strip()
+        if not text:
+            return None, False
+        if YEAR_ONLY.match(text):
+            return to_iso(datetime(int(text), 1, 1)), False
+        year_month = YEAR_MONTH.match(text)
+        if year_month:
+            try:
+                return to_iso(datetime(int(year_month.group(1)), int(year_month.group(2)), 1)), False
+            except ValueError:
+                return None, False
+
+        first = self.preferred.get(field, 0)
+        order = [first] + [i for i in range(len(PARSERS)) if i != first]
+        for index in order:
+            name, parser = PARSERS[index]
+            try:
+                parsed = parser(text)
+            except (ValueError, TypeError, OverflowError, IndexError):
+                continue
+            self.preferred[field] = index
+            return to_iso(parsed), name == 'iso'
+        return None, False
+
+    def parse(self, field, value):
+        """(ISO-8601 string or None, source text worth keeping or None)
+
+        The source text is kept unless it was ISO-8601 already: a month,
+        season or citation reads as a precise day once normalised, and
+        unparseable text would otherwise be lost.
+        """
+        if value is None or value == '':
+            return None, None
+        if isinstance(value, datetime):
+            return to_iso(value), None
+        if isinstance(value, int) and not isinstance(value, bool) and MIN_YEAR <= value <= MAX_YEAR:
+            # A bare year (reporting_year, citation years), not a few seconds after 1970
+            return self.parse(field, str(value))
+        if isinstance(value, (int, float)):
+            # Epoch millis
+            return to_iso(datetime.fromtimestamp(value / 1000, tz=timezone.utc)), None
+        text = str(value)
+        normalized, is_iso = self.normalize(field, text)
+        return normalized, None if is_iso or not text.strip() else text
+
+    def __call__(self, field, value):
+        """ISO-8601 string for a date value, or None if it cannot be parsed"""
+        return self.parse(field, value)[0]
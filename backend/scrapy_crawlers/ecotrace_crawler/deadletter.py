@@ -0,0 +1,128 @@
+"""
+EcoTrace dead-letter log
+Append-only JSONL spool of datastore writes that failed, so they can be
+replayed with `scrapy replay_deadletters` instead of recrawling.
+
+Each writer appends to its own active segment (<name>.jsonl), which is
+rotated to a timestamped, gzip-compressed deadletter-<name>-*.jsonl.gz
+segment once it reaches max_bytes and when the spider closes. Only rotated
+segments are replayed.
+"""
+
+import glob
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+from ecotrace_crawler.storage import StorageRecord
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetterLog:
+    """Thread-safe writer for the dead-letter spool"""
+
+    def __init__(self, directory='deadletter', max_bytes=64 * 1024 * 1024, name='storage'):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.name = name
+        self.path = os.path.join(directory, f'{name}.jsonl')
+        self.file = None
+        self.spooled = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings, name='storage'):
+        if not settings.getbool('DEADLETTER_ENABLED', True):
+            return None
+        return cls(
+            directory=settings.get('DEADLETTER_DIR', 'deadletter'),
+            max_bytes=settings.getint('DEADLETTER_MAX_BYTES', 64 * 1024 * 1024),
+            name=name,
+        )
+
+    def append(self, sink, records, reason):
+        """Spool records that could not be written to sink"""
+        failed_at = datetime.utcnow().isoformat()
+        lines = [
+            json.dumps({
+                'sink': sink,
+                'kind': record.kind,
+                'doc_id': record.doc_id,
+                'doc': record.doc,
+                'reason': str(reason),
+                'failed_at': failed_at,
+            }, default=str) + '\n'
+            for record in records
+        ]
+
+        with self._lock:
+            if self.file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self.file = open(self.path, 'a', encoding='utf-8')
+            self.file.writelines(lines)
+            self.file.flush()
+            self.spooled += len(lines)
+            if self.file.tell() >= self.max_bytes:
+                self._rotate()
+
+    def spool_failure(self, sink, records, error):
+        """Spool the records a failed write lost
+
+        A SinkError names the records that failed; any other error means the
+        whole batch was lost.
+        """
+        failed = getattr(error, 'failed', None)
+        if failed:
+            by_reason = {}
+            for record, reason in failed:
+                by_reason.setdefault(reason, []).append(record)
+            for reason, reason_records in by_reason.items():
+                self.append(sink, reason_records, reason)
+        else:
+            self.append(sink, records, error)
+
+    def _rotate(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        segment = os.path.join(self.directory, f'deadletter-{self.name}-{stamp}.jsonl.gz')
+        with open(self.path, 'rb') as source, gzip.open(segment, 'wb') as target:
+            shutil.copyfileobj(source, target)
+        os.remove(self.path)
+        logger.info(f"Rotated dead-letter log to {segment}")
+
+    def close(self):
+        with self._lock:
+            self._rotate()
+        if self.spooled:
+            logger.warning(
+                f"{self.spooled} failed write(s) spooled to {self.directory} - "
+                f"replay with `scrapy replay_deadletters`"
+            )
+
+
+def segments(directory):
+    """Rotated segments of every writer, each writer's oldest first"""
+    return sorted(glob.glob(os.path.join(directory, 'deadletter-*.jsonl.gz')))
+
+
+def read_segment(path):
+    """Yield (sink, StorageRecord, reason) tuples from a segment"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping corrupt line {line_number} in {path}")
+                continue
+            yield entry['sink'], StorageRecord(entry['kind'], entry['doc_id'], entry['doc']), entry.get('reason')
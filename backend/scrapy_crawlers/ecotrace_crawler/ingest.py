@@ -0,0 +1,264 @@
+"""
+EcoTrace offline bulk ingest
+Loads JSON Lines / JSON feed exports (plain or gzipped) straight into the
+datastores, bypassing the crawl. Records are routed like the storage
+pipelines route items, get the same date and unit normalisation, and are
+written with the sinks' bulk APIs from a pool of worker processes. Progress
+is checkpointed per file, so an interrupted ingest resumes where it stopped.
+"""
+
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from ecotrace_crawler.dates import DATE_FIELDS, DateNormalizer, raw_field
+from ecotrace_crawler.deadletter import DeadLetterLog
+from ecotrace_crawler.projector import ParallelWriter
+from ecotrace_crawler.storage import StorageRecord, connect_sink, route_record
+from ecotrace_crawler.units import QUANTITY_FIELDS, normalized_fields
+
+logger = logging.getLogger(__name__)
+
+# Per-process writer, set up by init_worker
+_writer = None
+_deadletter = None
+
+
+def open_dump(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def iter_dump(path, skip=0):
+    """Yield (position, record) for the records of a dump after the first skip
+
+    JSON Lines are streamed; a JSON array (Scrapy's `json` feed format) has
+    to be loaded whole.
+    """
+    with open_dump(path) as f:
+        first = f.read(1)
+        while first.isspace():
+            first = f.read(1)
+
+        if first == '[':
+            records = json.loads(first + f.read())
+            for position, record in enumerate(records[skip:], skip + 1):
+                yield position, record
+            return
+
+        position = 0
+        for line_number, line in enumerate(_prepend(first, f), 1):
+            if not line.strip():
+                continue
+            position += 1
+            if position <= skip:
+                continue
+            try:
+                yield position, json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping invalid JSON on line {line_number} of {path}")
+                yield position, None
+
+
+def _prepend(first, f):
+    """Lines of f with the character already read put back"""
+    lines = iter(f)
+    yield first + next(lines, '')
+    yield from lines
+
+
+def init_worker(sink_names, embedding_dims, deadletter_dir, max_pending):
+    global _writer, _deadletter
+
+    sinks = {}
+    for name in sink_names:
+        sink = connect_sink(name, embedding_dims)
+        if sink is None:
+            raise RuntimeError(f"{name} unavailable")
+        sinks[name] = sink
+
+    if deadletter_dir:
+        _deadletter = DeadLetterLog(deadletter_dir, name=f'ingest-{os.getpid()}')
+    _writer = ParallelWriter(sinks, _deadletter, max_pending)
+
+
+def write_chunk(records):
+    """Write (kind, id, doc) tuples to every sink, returning (written, failed)
+
+    A record counts as failed when any sink lost it; it was dead-lettered
+    for replay rather than written.
+    """
+    records = [StorageRecord(*record) for record in records]
+    _writer.submit(records)
+    failures = _writer.drain()
+    if not failures:
+        return len(records), 0
+    if _deadletter is None:
+        raise RuntimeError(f"Bulk write failed for {', '.join(name for name, _, _ in failures)}")
+    # Rotate now - pool workers may be killed without a chance to close
+    _deadletter.close()
+
+    lost = set()
+    for _, failed_records, error in failures:
+        failed = getattr(error, 'failed', None)
+        if failed:
+            lost.update(id(record) for record, _ in failed)
+        else:
+            lost.update(id(record) for record in failed_records)
+    return len(records) - len(lost), len(lost)
+
+
+class Checkpoint:
+    """Records ingested per file, saved atomically as JSON"""
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.files = json.load(f)
+
+    def position(self, key):
+        return self.files.get(key, {}).get('position', 0)
+
+    def is_done(self, key):
+        return self.files.get(key, {}).get('done', False)
+
+    def update(self, key, position, done=False):
+        self.files[key] = {'position': position, 'done': done}
+        if not self.path:
+            return
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.files, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class Progress:
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self.started = time.perf_counter()
+        self.last_report = self.started
+        self.written = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.written / elapsed if elapsed else 0.0
+
+    def maybe_report(self, path, position):
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            logger.info(
+                f"{path}: record {position}, {self.written} written, {self.failed} dead-lettered, "
+                f"{self.rate():.0f} docs/sec"
+            )
+
+    def summary(self):
+        return {
+            'written': self.written,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'seconds': round(time.perf_counter() - self.started, 1),
+            'docs_per_sec': round(self.rate()),
+        }
+
+
+def ingest(paths, sink_names, workers=4, batch_size=500, checkpoint_path=None,
+           embedding_dims=384, deadletter_dir=None, max_pending=2):
+    """Bulk-load dumps into the sinks, returning throughput figures
+
+    Chunks are written out of order by the pool; a file's checkpoint only
+    advances past chunks that, together with every chunk before them, have
+    been written.
+    """
+    checkpoint = Checkpoint(checkpoint_path)
+    progress = Progress()
+    normalize_date = DateNormalizer()
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker,
+        initargs=(sink_names, embedding_dims, deadletter_dir, max_pending),
+    )
+
+    try:
+        for path in paths:
+            key = os.path.abspath(path)
+            if checkpoint.is_done(key):
+                logger.info(f"Skipping {path} - already ingested")
+                continue
+
+            start = checkpoint.position(key)
+            if start:
+                logger.info(f"Resuming {path} after record {start}")
+
+            submitted = deque()     # chunk end positions, in file order
+            finished = set()
+            in_flight = set()
+            position = start
+
+            def settle(futures):
+                nonlocal position
+                for future in futures:
+                    in_flight.discard(future)
+                    written, failed = future.result()
+                    progress.written += written
+                    progress.failed += failed
+                    finished.add(future.end)
+                while submitted and submitted[0] in finished:
+                    position = submitted.popleft()
+                    finished.discard(position)
+                checkpoint.update(key, position)
+                progress.maybe_report(path, position)
+
+            chunk = []
+            last = start
+            for last, record in iter_dump(path, start):
+                route = route_record(record) if record else None
+                if route is None:
+                    progress.skipped += 1
+                else:
+                    kind, id_field = route
+                    record.pop('item_type', None)
+                    record.pop('_type', None)
+                    # Dumps of older crawls predate date normalisation
+                    for field in DATE_FIELDS[kind]:
+                        if field in record:
+                            record[field], source_text = normalize_date.parse(field, record[field])
+                            if source_text:
+                                record[raw_field(field)] = source_text
+                    if kind in QUANTITY_FIELDS and 'normalized_value' not in record:
+                        record.update(normalized_fields(kind, record))
+                    chunk.append((kind, record.get(id_field), record))
+
+                if len(chunk) >= batch_size:
+                    if len(in_flight) >= workers * 2:
+                        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                        settle(done)
+                    future = pool.submit(write_chunk, chunk)
+                    future.end = last
+                    submitted.append(last)
+                    in_flight.add(future)
+                    chunk = []
+
+            if chunk:
+                future = pool.submit(write_chunk, chunk)
+                future.end = last
+                submitted.append(last)
+                in_flight.add(future)
+
+            settle(list(in_flight))
+            checkpoint.update(key, last, done=True)
+            logger.info(f"Ingested {path}: {last} record(s)")
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    return progress.summary()
@@ -31,6 +31,8 @@ class SustainabilityClaimItem(scrapy.Item):
     claim_category = Field()  # target, achievement, initiative, policy
     numerical_value = Field()  # extracted number if applicable
     unit = Field()  # metric (tons CO2, %, MW, etc.)
+    normalized_value = Field()  # numerical_value in normalized_unit
+    normalized_unit = Field()  # canonical unit (tCO2e, percent, MW, ...)
     target_year = Field()  # if future target
     baseline_year = Field()  # comparison year
     confidence_score = Field()  # NLP confidence
@@ -38,8 +40,10 @@ class SustainabilityClaimItem(scrapy.Item):
     source_url = Field()
     source_document = Field()
     published_date = Field()
+    published_date_raw = Field()  # source text when not ISO-8601
     extracted_at = Field()
     raw_context = Field()  # surrounding text for verification
+    embedding = Field()  # sentence embedding of claim_text
 
 
 class RegulatoryDataItem(scrapy.Item):
@@ -52,12 +56,15 @@ class RegulatoryDataItem(scrapy.Item):
     metric = Field()
     value = Field()
     unit = Field()
+    normalized_value = Field()  # value in normalized_unit
+    normalized_unit = Field()  # canonical unit (tCO2e, percent, MW, ...)
     reporting_year = Field()
     facility_name = Field()
     facility_location = Field()
     source_url = Field()
     document_id = Field()
     filed_date = Field()
+    filed_date_raw = Field()  # source text when not ISO-8601
     crawled_at = Field()
 
 
@@ -71,12 +78,14 @@ class ScientificPublicationItem(scrapy.Item):
     related_companies = Field()  # companies mentioned
     related_industries = Field()
     publication_date = Field()
+    publication_date_raw = Field()  # citation text when not ISO-8601
     journal = Field()
     doi = Field()
     url = Field()
     key_findings = Field()  # extracted findings
     relevance_score = Field()
     crawled_at = Field()
+    embedding = Field()  # sentence embedding of title + abstract
 
 
 class NewsArticleItem(scrapy.Item):
@@ -91,9 +100,11 @@ class NewsArticleItem(scrapy.Item):
     source = Field()  # news outlet
     author = Field()
     published_date = Field()
+    published_date_raw = Field()  # source text when not ISO-8601
     url = Field()
     credibility_rating = Field()
     crawled_at = Field()
+    embedding = Field()  # sentence embedding of title + summary
 
 
 class VerificationEvidenceItem(scrapy.Item):
@@ -0,0 +1,161 @@
+"""
+Elasticsearch index mappings
+Explicit mappings for fields that dynamic mapping cannot infer
+"""
+
+import logging
+from datetime import datetime
+from ecotrace_crawler.dates import DATE_FIELDS, DATE_MAPPING, raw_field
+from ecotrace_crawler.partitions import reindex_into
+
+logger = logging.getLogger(__name__)
+
+
+class MappingConflictError(Exception):
+    """An existing index maps fields with other types than index_mappings()
+
+    put_mapping cannot change a field's type, so the index has to be copied
+    into one created with the current mappings.
+    """
+
+    def __init__(self, index, conflicts, command):
+        self.index = index
+        self.conflicts = conflicts  # {field: (current type, mapped type)}
+        fields = ', '.join(f"{field} ({current} -> {wanted})" for field, (current, wanted) in sorted(conflicts.items()))
+        super().__init__(f"{index} maps {fields}; run `scrapy {command}` to reindex it")
+
+
+def embedding_field(dims):
+    """Sentence embedding indexed for approximate kNN search"""
+    return {
+        "type": "dense_vector",
+        "dims": dims,
+        "index": True,
+        "similarity": "cosine"
+    }
+
+
+def suggest_text_field():
+    """Text field with the default .keyword sub-field plus a completion
+    sub-field backing /api/search/suggest"""
+    return {
+        "type": "text",
+        "fields": {
+            "keyword": {"type": "keyword", "ignore_above": 256},
+            "suggest": {"type": "completion"}
+        }
+    }
+
+
+NUMERIC_FIELDS = {
+    'claims': {
+        'normalized_value': 'double',
+        'normalized_unit': 'keyword',
+        'target_year': 'integer',
+        'baseline_year': 'integer',
+    },
+    'regulatory': {
+        'normalized_value': 'double',
+        'normalized_unit': 'keyword',
+        'reporting_year': 'integer',
+    },
+}
+
+
+def numeric_field(field_type):
+    """Numeric (or unit keyword) field; unparseable values are skipped, not rejected"""
+    if field_type == 'keyword':
+        return {"type": "keyword"}
+    return {"type": field_type, "ignore_malformed": True}
+
+
+def index_mappings(embedding_dims=384):
+    """Mappings per index name (without the ecotrace_ prefix)"""
+    mappings = {
+        'companies': {
+            'properties': {
+                'name': suggest_text_field(),
+            }
+        },
+        'claims': {
+            'properties': {
+                'claim_type': suggest_text_field(),
+                'embedding': embedding_field(embedding_dims),
+            }
+        },
+        'news': {
+            'properties': {
+                'title': suggest_text_field(),
+                'embedding': embedding_field(embedding_dims),
+            }
+        },
+        'publications': {
+            'properties': {
+                'title': suggest_text_field(),
+                'embedding': embedding_field(embedding_dims),
+            }
+        },
+        'regulatory': {
+            'properties': {}
+        },
+    }
+
+    # Normalised quantities, and years, as numbers for range queries and
+    # aggregations; dynamic mapping would index the extracted strings as text
+    for index_name, fields in NUMERIC_FIELDS.items():
+        for field, field_type in fields.items():
+            mappings[index_name]['properties'][field] = numeric_field(field_type)
+
+    # Normalised dates; dynamic mapping would index RSS/citation text as text.
+    # The source text beside them is kept for display, not searched.
+    for index_name, fields in DATE_FIELDS.items():
+        for field in fields:
+            mappings[index_name]['properties'][field] = dict(DATE_MAPPING)
+            mappings[index_name]['properties'][raw_field(field)] = {"type": "keyword", "index": False}
+
+    # When a claim was first stored - re-crawls reset extracted_at
+    mappings['claims']['properties']['first_seen_at'] = dict(DATE_MAPPING)
+
+    return mappings
+
+
+# Numbers index and query alike whatever their width, e.g. years that
+# dynamic mapping made long
+NUMERIC_TYPES = {'long', 'integer', 'short', 'byte', 'double', 'float', 'half_float', 'scaled_float'}
+
+
+def mapping_conflicts(es, index, properties):
+    """{field: (current type, mapped type)} for fields the index already maps differently"""
+    current = {}
+    for info in es.indices.get_mapping(index=index).values():
+        current.update(info['mappings'].get('properties', {}))
+
+    conflicts = {}
+    for field, spec in properties.items():
+        if field not in current:
+            continue
+        types = (current[field].get('type', 'object'), spec.get('type', 'object'))
+        if types[0] != types[1] and not set(types) <= NUMERIC_TYPES:
+            conflicts[field] = types
+    return conflicts
+
+
+def remap(es, name, mappings):
+    """Copy an index into a new one with the current mappings, and give it the name
+
+    The name becomes an alias of the copy, replacing the old index (or the
+    index an earlier remap aliased). Fields are mapped as in a new index;
+    documents written during the copy are lost, so stop the crawlers first.
+    """
+    sources = list(es.indices.get_alias(name=name)) if es.indices.exists_alias(name=name) else [name]
+    target = f"{name}-r{datetime.utcnow():%Y%m%d%H%M%S}"
+    es.indices.create(index=target, mappings=mappings)
+    total = reindex_into(es, name, target)
+
+    # Swap the old index for the alias in one step
+    es.indices.update_aliases(actions=[
+        {'add': {'index': target, 'alias': name, 'is_write_index': True}},
+        *({'remove_index': {'index': index}} for index in sources),
+    ])
+    logger.info(f"Copied {total} document(s) from {name} into {target}")
+    return target, total
@@ -0,0 +1,90 @@
+"""
+NLP extraction helpers
+Run in worker processes so spaCy never blocks the crawl reactor; the same
+functions fall back to regex extraction when no model is loaded
+"""
+
+import re
+from ecotrace_crawler.matching import KeywordMatcher
+
+# Components not needed to find like_num tokens
+DEFAULT_EXCLUDED_COMPONENTS = [
+    'tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner', 'senter'
+]
+
+NUMBER_PATTERN = re.compile(r'\d+(?:[.,]\d+)*')
+PERCENT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)%')
+
+# Claim classification keywords in priority order (matched as word prefixes)
+CLAIM_TYPE_KEYWORDS = [
+    ('emissions', ['emission', 'carbon', 'co2', 'ghg']),
+    ('renewable_energy', ['renewable', 'solar', 'wind', 'clean energy']),
+    ('waste', ['waste', 'recycl', 'circular']),
+    ('water', ['water', 'h2o']),
+]
+
+CLAIM_CATEGORY_KEYWORDS = [
+    ('target', ['target', 'goal', 'aim', 'by 20']),
+    ('achievement', ['achiev', 'reach', 'accomplish']),
+    ('initiative', ['initiat', 'program', 'project']),
+]
+
+claim_matcher = KeywordMatcher()
+for _label, _keywords in CLAIM_TYPE_KEYWORDS + CLAIM_CATEGORY_KEYWORDS:
+    claim_matcher.add(_label, _keywords, prefix=True)
+
+# spaCy pipeline loaded once per worker process
+_nlp = None
+
+
+def init_worker(model_name, exclude):
+    """Process pool initializer - load a trimmed spaCy pipeline"""
+    global _nlp
+    import spacy
+    _nlp = spacy.load(model_name, exclude=exclude)
+
+
+def extract_batch(texts, batch_size=64):
+    """Extract claim fields for a batch of claim texts
+
+    Uses nlp.pipe when a model is loaded in this process, otherwise the
+    regex extractor.
+    """
+    if _nlp is not None:
+        numbers = [
+            [token.text for token in doc if token.like_num]
+            for doc in _nlp.pipe(texts, batch_size=batch_size)
+        ]
+    else:
+        numbers = [NUMBER_PATTERN.findall(text) for text in texts]
+
+    return [extract_claim_fields(text, nums) for text, nums in zip(texts, numbers)]
+
+
+def extract_claim_fields(claim_text, numbers):
+    """Derive target year, percentage and claim classes from a claim"""
+    fields = {}
+
+    # Extract years (4-digit numbers starting with 20)
+    years = [num for num in numbers if len(num) == 4 and num.startswith('20')]
+    if years:
+        fields['target_year'] = years[0]
+
+    # Extract percentage values
+    percentages = PERCENT_PATTERN.findall(claim_text)
+    if percentages:
+        fields['numerical_value'] = percentages[0]
+        fields['unit'] = 'percent'
+
+    # Classify claim type and category based on keywords
+    hits = claim_matcher.scan(claim_text)
+    for claim_type, _ in CLAIM_TYPE_KEYWORDS:
+        if claim_type in hits:
+            fields['claim_type'] = claim_type
+            break
+    for category, _ in CLAIM_CATEGORY_KEYWORDS:
+        if category in hits:
+            fields['claim_category'] = category
+            break
+
+    return fields
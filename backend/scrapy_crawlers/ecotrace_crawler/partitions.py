@@ -0,0 +1,175 @@
+"""
+Time-partitioned Elasticsearch indices
+News and regulatory records are append-mostly and grow without bound, so
+each is stored in a series of indices (ecotrace_news-000001, -000002, ...)
+behind an alias of the old index name. The alias reads every partition
+and writes to the newest one; ILM rolls it over by size or age, then
+shrinks, force-merges and write-blocks partitions once they are no longer
+being written.
+"""
+
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_KINDS = ['news', 'regulatory']
+
+LIFECYCLE_POLICY = 'ecotrace-partitions'
+
+ROLLOVER_MAX_SIZE = os.getenv('ES_ROLLOVER_MAX_SIZE', '20gb')   # per primary shard
+ROLLOVER_MAX_AGE = os.getenv('ES_ROLLOVER_MAX_AGE', '30d')
+WARM_AFTER = os.getenv('ES_WARM_AFTER', '7d')                   # after rollover
+PARTITION_SHARDS = int(os.getenv('ES_PARTITION_SHARDS', 2))
+
+# Partition names, including the shrink-<id>- prefix ILM gives shrunken
+# copies, and the -r<timestamp> copies made by `scrapy remap_indices`
+PARTITION_NAME = re.compile(r'^(?:shrink-[a-z0-9]+-)?(?P<alias>.+)-(?:(?P<generation>\d{6})|r(?P<copied>\d{14}))$')
+
+
+def lifecycle_policy():
+    return {
+        'phases': {
+            'hot': {
+                'actions': {
+                    'rollover': {
+                        'max_primary_shard_size': ROLLOVER_MAX_SIZE,
+                        'max_age': ROLLOVER_MAX_AGE,
+                    },
+                    'set_priority': {'priority': 100},
+                }
+            },
+            'warm': {
+                'min_age': WARM_AFTER,
+                'actions': {
+                    'shrink': {'number_of_shards': 1},
+                    'forcemerge': {'max_num_segments': 1},
+                    'readonly': {},
+                    'set_priority': {'priority': 50},
+                }
+            },
+        }
+    }
+
+
+def first_partition(alias):
+    return f'{alias}-000001'
+
+
+def logical_index(index):
+    """Alias name for a partition name; other names are returned unchanged"""
+    match = PARTITION_NAME.match(index)
+    return match.group('alias') if match else index
+
+
+def partition_generation(index):
+    """Sort key ordering the partitions of one alias by when they were created
+
+    Rollover generations order by number, whatever prefix ILM added;
+    -r<timestamp> copies cannot be rolled over and sort before them.
+    """
+    match = PARTITION_NAME.match(index)
+    if not match:
+        return (-1, '')
+    return (int(match.group('generation') or 0), match.group('copied') or '')
+
+
+def ensure_template(es, alias, mappings):
+    """Lifecycle policy and index template applied to every partition of an alias"""
+    es.ilm.put_lifecycle(name=LIFECYCLE_POLICY, policy=lifecycle_policy())
+    es.indices.put_index_template(
+        name=alias,
+        index_patterns=[f'{alias}-*'],
+        priority=200,
+        template={
+            'settings': {
+                'number_of_shards': PARTITION_SHARDS,
+                'index.lifecycle.name': LIFECYCLE_POLICY,
+                'index.lifecycle.rollover_alias': alias,
+            },
+            'mappings': mappings or {},
+        },
+    )
+
+
+def ensure_partitioned(es, alias, mappings):
+    """Create the first partition and write alias if neither the alias nor an index exists
+
+    Returns 'created', 'alias', or 'index' when an unpartitioned index still
+    has the name and needs `scrapy partition_indices`.
+    """
+    ensure_template(es, alias, mappings)
+    if es.indices.exists_alias(name=alias):
+        return 'alias'
+    if es.indices.exists(index=alias):
+        logger.warning(f"{alias} is not partitioned - migrate it with `scrapy partition_indices`")
+        return 'index'
+
+    es.indices.create(index=first_partition(alias), aliases={alias: {'is_write_index': True}})
+    logger.info(f"Created Elasticsearch partition {first_partition(alias)} behind {alias}")
+    return 'created'
+
+
+def write_index(es, alias):
+    """Partition the alias currently writes to"""
+    for index, info in es.indices.get_alias(name=alias).items():
+        if info['aliases'][alias].get('is_write_index'):
+            return index
+    return None
+
+
+def partitions(es, alias):
+    """{partition: {'docs': n, 'write': bool}} behind an alias, oldest first"""
+    aliases = es.indices.get_alias(name=alias)
+    counts = {
+        row['index']: int(row['docs.count'] or 0)
+        for row in es.cat.indices(index=alias, format='json', h='index,docs.count')
+    }
+    return {
+        index: {
+            'docs': counts.get(index, 0),
+            'write': bool(aliases[index]['aliases'][alias].get('is_write_index')),
+        }
+        for index in sorted(aliases)
+    }
+
+
+def migrate(es, alias, mappings):
+    """Move an unpartitioned index into the first partition behind an alias of its name
+
+    Documents written to the old index while it is being copied are lost,
+    so run this with the crawlers stopped.
+    """
+    if es.indices.exists_alias(name=alias) or not es.indices.exists(index=alias):
+        return 0
+
+    ensure_template(es, alias, mappings)
+    target = first_partition(alias)
+    if not es.indices.exists(index=target):
+        # No lifecycle until the alias points at it - rollover needs the alias
+        es.indices.create(index=target, settings={'index.lifecycle.name': ''})
+
+    total = reindex_into(es, alias, target)
+
+    # Swap the index for the alias in one step
+    es.indices.update_aliases(actions=[
+        {'add': {'index': target, 'alias': alias, 'is_write_index': True}},
+        {'remove_index': {'index': alias}},
+    ])
+    es.indices.put_settings(index=target, settings={'index.lifecycle.name': LIFECYCLE_POLICY})
+    logger.info(f"Moved {total} document(s) from {alias} into {target}")
+    return total
+
+
+def reindex_into(es, source, target):
+    """Copy every document of source into target, returning how many were copied"""
+    result = es.options(request_timeout=3600).reindex(
+        source={'index': source},
+        dest={'index': target},
+        wait_for_completion=True,
+        refresh=True,
+    )
+    if result.get('failures'):
+        raise RuntimeError(f"Copying {source} into {target} failed: {result['failures'][0]}")
+    return result.get('total', 0)
@@ -3,15 +3,23 @@ EcoTrace Data Processing Pipelines
 Handles validation, NLP extraction, and storage to multiple databases
 """
 
-import os
 import re
 import json
+from abc import ABC, abstractmethod
 from datetime import datetime
 from itemadapter import ItemAdapter
-from elasticsearch import Elasticsearch
-from neo4j import GraphDatabase
-from pymongo import MongoClient
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from twisted.internet.defer import Deferred, DeferredList, DeferredSemaphore, maybeDeferred, succeed
+from twisted.internet.task import LoopingCall
+from ecotrace_crawler.nlp import DEFAULT_EXCLUDED_COMPONENTS, init_worker, extract_batch
+from ecotrace_crawler.dates import DATE_FIELDS, DateNormalizer, raw_field
+from ecotrace_crawler.deadletter import DeadLetterLog
+from ecotrace_crawler.units import QUANTITY_FIELDS, normalized_fields
+from ecotrace_crawler.rollups import ROLLUP_KINDS, DailyRollup, rollup_day
+from ecotrace_crawler.watchlist import WATCH_KINDS, Watchlist, WebhookPusher
+from ecotrace_crawler.storage import SINKS, SinkStats, connect_sink, make_record, route_item, timed_write
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +31,12 @@ except ImportError:
     SPACY_AVAILABLE = False
     logger.warning("spacy not available - NLP features will be limited")
 
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
+
 
 class DataValidationPipeline:
     """Validates and cleans scraped data"""
@@ -37,10 +51,16 @@ class DataValidationPipeline:
             'relevance_score': 0.5
         }
 
+        # Fields filled by later pipelines that must stay unset rather than ''
+        deferred_fields = {'embedding'}
+
         # Remove None values and set defaults for numeric fields
         for field in adapter.field_names():
             value = adapter.get(field)
 
+            if field in deferred_fields:
+                continue
+
             # Handle numeric fields
             if field in numeric_fields:
                 if value is None or value == '' or value == 'None':
@@ -65,345 +85,709 @@ class DataValidationPipeline:
         return item
 
 
-class NLPExtractionPipeline:
-    """Extracts entities, numbers, and semantic information using NLP"""
+class DateNormalizationPipeline:
+    """Normalises date fields to ISO-8601 UTC so they index as dates
 
-    def __init__(self):
-        self.nlp = None
+    Dates that cannot be parsed are unset rather than stored as free text;
+    source text that was not ISO-8601 is kept in <field>_raw.
+    """
 
-    def open_spider(self, spider):
-        """Load spaCy model"""
-        try:
-            self.nlp = spacy.load('en_core_web_sm')
-            logger.info("SpaCy model loaded successfully")
-        except Exception as e:
-            logger.error(f"Failed to load spaCy model: {e}")
-            self.nlp = None
+    def __init__(self):
+        self.normalizer = DateNormalizer()
 
     def process_item(self, item, spider):
-        if not self.nlp:
+        route = route_item(item)
+        if route is None:
             return item
 
         adapter = ItemAdapter(item)
+        kind, _ = route
+        for field in DATE_FIELDS[kind]:
+            if field not in adapter.field_names():
+                continue
+            raw = adapter.get(field)
+            adapter[field], source_text = self.normalizer.parse(field, raw)
+            if source_text and raw_field(field) in adapter.field_names():
+                adapter[raw_field(field)] = source_text
+            if raw and adapter[field] is None:
+                logger.debug(f"Unparseable {field} {raw!r} - left unset")
+
+        return item
+
+
+class UnitNormalizationPipeline:
+    """Converts claim and regulatory quantities to canonical numeric units
 
-        # Process claim text
-        if 'claim_text' in adapter.field_names() and adapter.get('claim_text'):
-            claim_text = adapter['claim_text']
-            doc = self.nlp(claim_text)
-
-            # Extract numbers and units
-            numbers = []
-            for token in doc:
-                if token.like_num:
-                    numbers.append(token.text)
-
-            # Extract years (4-digit numbers starting with 20)
-            years = [num for num in numbers if len(num) == 4 and num.startswith('20')]
-            if years and 'target_year' not in adapter.keys():
-                adapter['target_year'] = years[0]
-
-            # Extract percentage values
-            percentages = re.findall(r'(\d+(?:\.\d+)?)%', claim_text)
-            if percentages and 'numerical_value' not in adapter.keys():
-                adapter['numerical_value'] = percentages[0]
-                adapter['unit'] = 'percent'
-
-            # Classify claim type based on keywords
-            claim_lower = claim_text.lower()
-            if any(word in claim_lower for word in ['emission', 'carbon', 'co2', 'ghg']):
-                adapter['claim_type'] = 'emissions'
-            elif any(word in claim_lower for word in ['renewable', 'solar', 'wind', 'clean energy']):
-                adapter['claim_type'] = 'renewable_energy'
-            elif any(word in claim_lower for word in ['waste', 'recycl', 'circular']):
-                adapter['claim_type'] = 'waste'
-            elif any(word in claim_lower for word in ['water', 'h2o']):
-                adapter['claim_type'] = 'water'
-
-            # Classify claim category
-            if any(word in claim_lower for word in ['target', 'goal', 'aim', 'by 20']):
-                adapter['claim_category'] = 'target'
-            elif any(word in claim_lower for word in ['achiev', 'reach', 'accomplish']):
-                adapter['claim_category'] = 'achievement'
-            elif any(word in claim_lower for word in ['initiat', 'program', 'project']):
-                adapter['claim_category'] = 'initiative'
-
-        # Process article content for sentiment
-        if 'content' in adapter.field_names() and adapter.get('content'):
-            content = adapter['content']
-            # Sentiment is already processed in spider, but we could enhance it here
-            pass
+    Fills normalized_value / normalized_unit from the extracted value and
+    unit, falling back to the first quantity with a known unit in the
+    claim text.
+    """
 
+    def process_item(self, item, spider):
+        route = route_item(item)
+        if route is None or route[0] not in QUANTITY_FIELDS:
+            return item
+
+        adapter = ItemAdapter(item)
+        adapter.update(normalized_fields(route[0], adapter))
         return item
 
 
-class ElasticsearchPipeline:
-    """Stores items in Elasticsearch for full-text search"""
+class BatchingPipeline(ABC):
+    """Base for pipelines that process items in batches off the reactor thread
 
-    def __init__(self):
-        self.es = None
-        self.index_prefix = 'ecotrace'
+    Items accepted by wants() are buffered; a batch is flushed when
+    batch_size items are waiting or max_latency seconds after the first one
+    arrived. Each item's Deferred fires once its batch has been processed.
+    """
 
-    def open_spider(self, spider):
-        """Connect to Elasticsearch"""
-        try:
-            es_host = os.getenv('ELASTICSEARCH_HOST', 'localhost')
-            es_port = int(os.getenv('ELASTICSEARCH_PORT', 9200))
+    def __init__(self, batch_size=64, max_latency=2.0):
+        self.batch_size = batch_size
+        self.max_latency = max_latency
+        self.pending = []
+        self.flush_call = None
+
+    @abstractmethod
+    def wants(self, adapter):
+        """Return True if the item should be batched"""
+
+    @abstractmethod
+    def process_batch(self, adapters):
+        """Process a batch of adapters in place, returning a Deferred or None"""
+
+    def close_spider(self, spider):
+        """Flush buffered items"""
+        return self.flush()
+
+    def process_item(self, item, spider):
+        adapter = ItemAdapter(item)
+        if not self.wants(adapter):
+            return item
+
+        d = Deferred()
+        self.pending.append((adapter, d))
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+        elif self.flush_call is None:
+            from twisted.internet import reactor
+            self.flush_call = reactor.callLater(self.max_latency, self.flush)
+
+        return d
+
+    def flush(self):
+        """Process buffered items, firing each item's Deferred"""
+        if self.flush_call is not None and self.flush_call.active():
+            self.flush_call.cancel()
+        self.flush_call = None
+
+        batch, self.pending = self.pending, []
+        if not batch:
+            return succeed(None)
+
+        d = maybeDeferred(self.process_batch, [adapter for adapter, _ in batch])
+
+        def release(result):
+            for adapter, item_d in batch:
+                item_d.callback(adapter.item)
+
+        def release_failed(failure):
+            logger.error(f"{self.__class__.__name__} batch failed: {failure.value}")
+            release(None)
+
+        d.addCallbacks(release, release_failed)
+        return d
+
+
+def defer_to_executor(executor, fn, *args):
+    """Run fn in a concurrent.futures executor, resolving on the reactor thread"""
+    from twisted.internet import reactor
 
-            self.es = Elasticsearch([f'http://{es_host}:{es_port}'])
+    d = Deferred()
+    future = executor.submit(fn, *args)
 
-            # Create indices if they don't exist
-            indices = [
-                'companies', 'claims', 'regulatory',
-                'publications', 'news'
-            ]
+    def done(future):
+        error = future.exception()
+        if error is not None:
+            reactor.callFromThread(d.errback, error)
+        else:
+            reactor.callFromThread(d.callback, future.result())
 
-            for index_name in indices:
-                full_index = f'{self.index_prefix}_{index_name}'
-                if not self.es.indices.exists(index=full_index):
-                    self.es.indices.create(index=full_index)
-                    logger.info(f"Created Elasticsearch index: {full_index}")
+    future.add_done_callback(done)
+    return d
 
-            logger.info("Connected to Elasticsearch")
+
+class NLPExtractionPipeline(BatchingPipeline):
+    """Extracts numbers, years and claim classes using NLP
+
+    Claims are sent through nlp.pipe in batches inside a process pool, so
+    spaCy never runs on the reactor thread. Without spaCy, or once the pool
+    has broken, the regex extractor runs inline and items are not held.
+    The NLP claim classes replace the spider's; other fields only fill
+    what the spider left empty.
+    """
+
+    # Fields the NLP classification always sets when it finds a class
+    CLASS_FIELDS = {'claim_type', 'claim_category'}
+
+    def __init__(self, model_name='en_core_web_sm', batch_size=64, max_latency=2.0,
+                 workers=1, exclude=None):
+        super().__init__(batch_size, max_latency)
+        self.model_name = model_name
+        self.workers = workers
+        self.exclude = exclude if exclude is not None else DEFAULT_EXCLUDED_COMPONENTS
+        self.executor = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            model_name=settings.get('SPACY_MODEL', 'en_core_web_sm'),
+            batch_size=settings.getint('NLP_BATCH_SIZE', 64),
+            max_latency=settings.getfloat('NLP_MAX_LATENCY', 2.0),
+            workers=settings.getint('NLP_WORKERS', 1),
+            exclude=settings.getlist('NLP_EXCLUDED_COMPONENTS') or None,
+        )
+
+    def open_spider(self, spider):
+        """Start the spaCy worker pool"""
+        if not SPACY_AVAILABLE:
+            logger.warning("spacy not available - using regex claim extraction")
+            return
+
+        try:
+            # Spawn rather than fork the reactor process
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker,
+                initargs=(self.model_name, self.exclude)
+            )
+            logger.info(f"Started {self.workers} NLP worker(s) with {self.model_name}")
         except Exception as e:
-            logger.error(f"Failed to connect to Elasticsearch: {e}")
-            self.es = None
+            logger.error(f"Failed to start NLP workers: {e}")
+            self.executor = None
 
     def close_spider(self, spider):
-        """Close Elasticsearch connection"""
-        if self.es:
-            self.es.close()
+        """Flush buffered claims and stop the worker pool"""
+        d = self.flush()
+        d.addBoth(self._shutdown)
+        return d
+
+    def _shutdown(self, result):
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        return result
+
+    def wants(self, adapter):
+        return 'claim_text' in adapter.field_names() and bool(adapter.get('claim_text'))
 
     def process_item(self, item, spider):
-        if not self.es:
+        if self.executor is None:
+            adapter = ItemAdapter(item)
+            if self.wants(adapter):
+                self._apply([adapter], extract_batch([adapter['claim_text']]))
             return item
+        return super().process_item(item, spider)
 
-        adapter = ItemAdapter(item)
-        item_dict = dict(adapter)
+    def process_batch(self, adapters):
+        texts = [adapter['claim_text'] for adapter in adapters]
+        if self.executor is None:
+            self._apply(adapters, extract_batch(texts))
+            return None
 
         try:
-            # Determine index based on item type
-            item_class = item.__class__.__name__
-
-            if 'CompanyItem' in item_class:
-                index = f'{self.index_prefix}_companies'
-                doc_id = item_dict.get('company_id')
-            elif 'SustainabilityClaimItem' in item_class:
-                index = f'{self.index_prefix}_claims'
-                doc_id = item_dict.get('claim_id')
-            elif 'RegulatoryDataItem' in item_class:
-                index = f'{self.index_prefix}_regulatory'
-                doc_id = item_dict.get('record_id')
-            elif 'ScientificPublicationItem' in item_class:
-                index = f'{self.index_prefix}_publications'
-                doc_id = item_dict.get('publication_id')
-            elif 'NewsArticleItem' in item_class:
-                index = f'{self.index_prefix}_news'
-                doc_id = item_dict.get('article_id')
-            else:
-                logger.warning(f"Unknown item type: {item_class}")
-                return item
-
-            # Index document
-            self.es.index(index=index, id=doc_id, document=item_dict)
-            logger.debug(f"Indexed {item_class} to {index}")
+            d = defer_to_executor(self.executor, extract_batch, texts, self.batch_size)
+        except Exception as e:
+            # submit() raises BrokenProcessPool at once when a worker has died
+            self._fallback(adapters, texts, e)
+            return None
+        d.addCallbacks(
+            lambda results: self._apply(adapters, results),
+            lambda failure: self._fallback(adapters, texts, failure.value)
+        )
+        return d
+
+    def _fallback(self, adapters, texts, error):
+        """Worker pool broke (e.g. model missing) - switch to regex extraction"""
+        logger.error(f"NLP worker failed, falling back to regex extraction: {error}")
+        self._shutdown(None)
+        self._apply(adapters, extract_batch(texts))
+
+    def _apply(self, adapters, results):
+        for adapter, fields in zip(adapters, results):
+            for field, value in fields.items():
+                if field in adapter.field_names() and (field in self.CLASS_FIELDS or not adapter.get(field)):
+                    adapter[field] = value
+
+
+class EmbeddingPipeline(BatchingPipeline):
+    """Batch-encodes claims, news and publications into sentence embeddings
+
+    Vectors are stored in the item's embedding field and indexed in
+    Elasticsearch as a dense_vector for similarity search.
+    Encoding runs in a worker thread on CPU.
+    """
+
+    def __init__(self, model_name='all-MiniLM-L6-v2', batch_size=32, max_latency=2.0):
+        super().__init__(batch_size, max_latency)
+        self.model_name = model_name
+        self.model = None
+        self.executor = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            model_name=settings.get('EMBEDDING_MODEL', 'all-MiniLM-L6-v2'),
+            batch_size=settings.getint('EMBEDDING_BATCH_SIZE', 32),
+            max_latency=settings.getfloat('EMBEDDING_MAX_LATENCY', 2.0),
+        )
 
+    def open_spider(self, spider):
+        """Load the sentence-transformers model"""
+        if not SENTENCE_TRANSFORMERS_AVAILABLE:
+            logger.warning("sentence-transformers not available - embeddings disabled")
+            return
+
+        try:
+            self.model = SentenceTransformer(self.model_name, device='cpu')
+            self.executor = ThreadPoolExecutor(max_workers=1)
+            logger.info(f"Embedding model {self.model_name} loaded")
         except Exception as e:
-            logger.error(f"Error indexing to Elasticsearch: {e}")
+            logger.error(f"Failed to load embedding model: {e}")
+            self.model = None
 
-        return item
+    def close_spider(self, spider):
+        """Flush buffered items and stop the encoder thread"""
+        d = self.flush()
 
+        def shutdown(result):
+            if self.executor:
+                self.executor.shutdown(wait=False)
+            return result
 
-class Neo4jPipeline:
-    """Stores items in Neo4j knowledge graph"""
+        d.addBoth(shutdown)
+        return d
 
-    def __init__(self):
-        self.driver = None
+    def wants(self, adapter):
+        return (self.model is not None and 'embedding' in adapter.field_names()
+                and bool(embedding_text(adapter)))
 
-    def open_spider(self, spider):
-        """Connect to Neo4j"""
-        try:
-            uri = os.getenv('NEO4J_URI', 'bolt://localhost:7687')
-            user = os.getenv('NEO4J_USER', 'neo4j')
-            password = os.getenv('NEO4J_PASSWORD', 'changeme')
+    def process_batch(self, adapters):
+        texts = [embedding_text(adapter) for adapter in adapters]
+        d = defer_to_executor(self.executor, self._encode, texts)
 
-            self.driver = GraphDatabase.driver(uri, auth=(user, password))
-            logger.info("Connected to Neo4j")
+        def store(vectors):
+            for adapter, vector in zip(adapters, vectors):
+                adapter['embedding'] = vector
 
-            # Create constraints
-            with self.driver.session() as session:
-                session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (c:Company) REQUIRE c.company_id IS UNIQUE")
-                session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (cl:Claim) REQUIRE cl.claim_id IS UNIQUE")
-                session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (p:Publication) REQUIRE p.publication_id IS UNIQUE")
+        d.addCallback(store)
+        return d
 
-        except Exception as e:
-            logger.error(f"Failed to connect to Neo4j: {e}")
-            self.driver = None
+    def _encode(self, texts):
+        vectors = self.model.encode(texts, batch_size=self.batch_size,
+                                    normalize_embeddings=True, show_progress_bar=False)
+        return [vector.tolist() for vector in vectors]
+
+
+def embedding_text(adapter):
+    """Text that represents an item in embedding space"""
+    if adapter.get('claim_text'):
+        return adapter['claim_text']
+    title = adapter.get('title') or ''
+    body = adapter.get('summary') or adapter.get('abstract') or ''
+    return f"{title}. {body}".strip('. ')
+
+
+class SinkPipeline:
+    """Writes each item to a single datastore as it arrives
+
+    Writes that fail, or that arrive while the datastore is unreachable,
+    go to the dead-letter log.
+    """
+
+    sink_name = None
+
+    def __init__(self, embedding_dims=384, deadletter=None):
+        self.sink = None
+        self.embedding_dims = embedding_dims
+        self.deadletter = deadletter
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            embedding_dims=settings.getint('EMBEDDING_DIMS', 384),
+            deadletter=DeadLetterLog.from_settings(settings, name=cls.sink_name),
+        )
+
+    def open_spider(self, spider):
+        self.sink = connect_sink(self.sink_name, self.embedding_dims)
+        if self.sink is None and self.deadletter:
+            logger.warning(f"{self.sink_name} unavailable - spooling writes to the dead-letter log")
 
     def close_spider(self, spider):
-        """Close Neo4j connection"""
-        if self.driver:
-            self.driver.close()
+        if self.sink:
+            self.sink.close()
+        if self.deadletter:
+            self.deadletter.close()
 
     def process_item(self, item, spider):
-        if not self.driver:
+        if route_item(item) is None:
+            logger.warning(f"Unknown item type: {item.__class__.__name__}")
             return item
 
-        adapter = ItemAdapter(item)
-        item_class = item.__class__.__name__
+        record = make_record(item, dict(ItemAdapter(item)))
+        if not self.sink:
+            if self.deadletter:
+                self.deadletter.append(self.sink_name, [record], f"{self.sink_name} unavailable")
+            return item
 
         try:
-            with self.driver.session() as session:
-                if 'CompanyItem' in item_class:
-                    self.create_company_node(session, adapter)
-                elif 'SustainabilityClaimItem' in item_class:
-                    self.create_claim_node(session, adapter)
-                elif 'ScientificPublicationItem' in item_class:
-                    self.create_publication_node(session, adapter)
-                elif 'NewsArticleItem' in item_class:
-                    self.create_news_node(session, adapter)
-
+            self.sink.write_batch([record])
         except Exception as e:
-            logger.error(f"Error writing to Neo4j: {e}")
+            logger.error(f"Error writing to {self.sink_name}: {e}")
+            if self.deadletter:
+                self.deadletter.spool_failure(self.sink_name, [record], e)
 
         return item
 
-    def create_company_node(self, session, adapter):
-        """Create or update company node"""
-        query = """
-        MERGE (c:Company {company_id: $company_id})
-        SET c.name = $name,
-            c.website = $website,
-            c.industry = $industry,
-            c.updated_at = $crawled_at
-        """
-        session.run(query, dict(adapter))
-
-    def create_claim_node(self, session, adapter):
-        """Create claim node and relationship to company"""
-        query = """
-        MERGE (c:Company {company_id: $company_id})
-        CREATE (cl:Claim {
-            claim_id: $claim_id,
-            claim_text: $claim_text,
-            claim_type: $claim_type,
-            source_type: $source_type,
-            source_url: $source_url,
-            extracted_at: $extracted_at
-        })
-        CREATE (c)-[:MAKES_CLAIM]->(cl)
-        """
-        session.run(query, dict(adapter))
-
-    def create_publication_node(self, session, adapter):
-        """Create publication node and link to mentioned companies"""
-        companies = adapter.get('related_companies', [])
-
-        query = """
-        MERGE (p:Publication {publication_id: $publication_id})
-        SET p.title = $title,
-            p.journal = $journal,
-            p.url = $url,
-            p.published_date = $publication_date
-        """
-        session.run(query, dict(adapter))
-
-        # Link to companies
-        for company_name in companies:
-            link_query = """
-            MATCH (p:Publication {publication_id: $publication_id})
-            MERGE (c:Company {name: $company_name})
-            CREATE (p)-[:MENTIONS]->(c)
-            """
-            session.run(link_query, {'publication_id': adapter.get('publication_id'), 'company_name': company_name})
-
-    def create_news_node(self, session, adapter):
-        """Create news node and link to mentioned companies"""
-        companies = adapter.get('company_mentions', [])
-
-        query = """
-        CREATE (n:NewsArticle {
-            article_id: $article_id,
-            title: $title,
-            source: $source,
-            url: $url,
-            published_date: $published_date,
-            sentiment: $sentiment
-        })
-        """
-        session.run(query, dict(adapter))
-
-        # Link to companies
-        for company_name in companies:
-            link_query = """
-            MATCH (n:NewsArticle {article_id: $article_id})
-            MERGE (c:Company {name: $company_name})
-            CREATE (n)-[:MENTIONS]->(c)
-            """
-            session.run(link_query, {'article_id': adapter.get('article_id'), 'company_name': company_name})
-
-
-class MongoDBPipeline:
+
+class ElasticsearchPipeline(SinkPipeline):
+    """Stores items in Elasticsearch for full-text search"""
+
+    sink_name = 'elasticsearch'
+
+
+class Neo4jPipeline(SinkPipeline):
+    """Stores items in Neo4j knowledge graph"""
+
+    sink_name = 'neo4j'
+
+
+class MongoDBPipeline(SinkPipeline):
     """Stores raw data in MongoDB for backup and analysis"""
 
-    def __init__(self):
-        self.client = None
-        self.db = None
+    sink_name = 'mongodb'
+
+
+class StorageFanoutPipeline(BatchingPipeline):
+    """Writes batches of items to Elasticsearch, Neo4j and MongoDB concurrently
+
+    Each sink has its own writer thread and a DeferredSemaphore capping the
+    batches in flight to it. When a sink falls behind, further batches queue
+    for it and their items stay unreleased; Scrapy then stops feeding new
+    responses to the spider once the scraper slot fills, so a slow sink
+    throttles the crawl without blocking the reactor or the other sinks.
+
+    Failed writes, and writes for sinks that were unreachable when the
+    spider opened, go to the dead-letter log for later replay.
+
+    With outbox=True only MongoDB is written, and Elasticsearch and Neo4j
+    are built from it by `scrapy project_outbox`.
+    """
+
+    def __init__(self, sinks=None, batch_size=100, max_latency=1.0, max_pending=2,
+                 embedding_dims=384, crawler_stats=None, deadletter=None, outbox=False):
+        super().__init__(batch_size, max_latency)
+        self.sink_names = ['mongodb'] if outbox else list(sinks or SINKS)
+        self.outbox = outbox
+        self.max_pending = max_pending
+        self.embedding_dims = embedding_dims
+        self.crawler_stats = crawler_stats
+        self.deadletter = deadletter
+        self.sinks = {}
+        self.unavailable = []
+        self.executors = {}
+        self.semaphores = {}
+        self.stats = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            sinks=settings.getlist('STORAGE_SINKS') or None,
+            batch_size=settings.getint('STORAGE_BATCH_SIZE', 100),
+            max_latency=settings.getfloat('STORAGE_MAX_LATENCY', 1.0),
+            max_pending=settings.getint('STORAGE_MAX_PENDING', 2),
+            embedding_dims=settings.getint('EMBEDDING_DIMS', 384),
+            crawler_stats=crawler.stats,
+            deadletter=DeadLetterLog.from_settings(settings),
+            outbox=settings.getbool('STORAGE_PROJECTION', False),
+        )
+
+    def open_spider(self, spider):
+        """Connect every sink and start its writer thread"""
+        for name in self.sink_names:
+            sink = connect_sink(name, self.embedding_dims, outbox=self.outbox)
+            if sink is None:
+                if self.deadletter:
+                    logger.warning(f"{name} unavailable - spooling its writes to the dead-letter log")
+                    self.unavailable.append(name)
+                continue
+            self.sinks[name] = sink
+            self.executors[name] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'storage-{name}')
+            self.semaphores[name] = DeferredSemaphore(self.max_pending)
+            self.stats[name] = SinkStats()
+
+    def close_spider(self, spider):
+        """Flush buffered items, then report per-sink latency"""
+        d = self.flush()
+        d.addBoth(self._shutdown)
+        return d
+
+    def _shutdown(self, result):
+        for name, sink in self.sinks.items():
+            self.executors[name].shutdown(wait=True)
+            sink.close()
+
+            summary = self.stats[name].summary()
+            logger.info(f"Storage sink {name}: {summary}")
+            if self.crawler_stats is not None:
+                for key, value in summary.items():
+                    self.crawler_stats.set_value(f'storage/{name}/{key}', value)
+
+        self.sinks = {}
+        if self.deadletter:
+            self.deadletter.close()
+        return result
+
+    def wants(self, adapter):
+        if route_item(adapter.item) is None:
+            logger.warning(f"Unknown item type: {adapter.item.__class__.__name__}")
+            return False
+        return bool(self.sinks or self.unavailable)
+
+    def process_batch(self, adapters):
+        records = [make_record(adapter.item, dict(adapter)) for adapter in adapters]
+        for name in self.unavailable:
+            self.deadletter.append(name, records, f"{name} unavailable")
+        return DeferredList(
+            [self._dispatch(name, records) for name in self.sinks],
+            consumeErrors=True
+        )
+
+    def _dispatch(self, name, records):
+        d = self.semaphores[name].run(
+            defer_to_executor, self.executors[name],
+            timed_write, self.sinks[name], self.stats[name], records
+        )
+        d.addErrback(self._write_failed, name, records)
+        return d
+
+    def _write_failed(self, failure, name, records):
+        logger.error(f"Error writing {len(records)} item(s) to {name}: {failure.value}")
+        if self.deadletter:
+            self.deadletter.spool_failure(name, records, failure.value)
+
+
+class WatchlistPipeline(BatchingPipeline):
+    """Percolates crawled records against the saved searches in batches
+
+    One percolate request per batch finds every watch a batch matches, off
+    the reactor thread. A batch is released once its new matches are
+    recorded; pushing them to the watches' webhooks is left to a
+    WebhookPusher, so a slow webhook never holds back the crawl. Items are
+    released whether or not alerting succeeds.
+    """
+
+    def __init__(self, enabled=True, batch_size=100, max_latency=2.0, embedding_dims=384,
+                 max_watches=1000, push_timeout=5.0, push_queue_size=100, retry_interval=300.0,
+                 retry_max_age=86400.0, crawler_stats=None):
+        super().__init__(batch_size, max_latency)
+        self.enabled = enabled
+        self.embedding_dims = embedding_dims
+        self.max_watches = max_watches
+        self.push_timeout = push_timeout
+        self.push_queue_size = push_queue_size
+        self.retry_interval = retry_interval
+        self.retry_max_age = retry_max_age
+        self.crawler_stats = crawler_stats
+        self.sink = None
+        self.watchlist = None
+        self.pusher = None
+        self.executor = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            enabled=settings.getbool('WATCHLIST_ENABLED', True),
+            batch_size=settings.getint('WATCHLIST_BATCH_SIZE', 100),
+            max_latency=settings.getfloat('WATCHLIST_MAX_LATENCY', 2.0),
+            embedding_dims=settings.getint('EMBEDDING_DIMS', 384),
+            max_watches=settings.getint('WATCHLIST_MAX_WATCHES', 1000),
+            push_timeout=settings.getfloat('WATCHLIST_PUSH_TIMEOUT', 5.0),
+            push_queue_size=settings.getint('WATCHLIST_PUSH_QUEUE_SIZE', 100),
+            retry_interval=settings.getfloat('WATCHLIST_RETRY_INTERVAL', 300.0),
+            retry_max_age=settings.getfloat('WATCHLIST_RETRY_MAX_AGE', 86400.0),
+            crawler_stats=crawler.stats,
+        )
 
     def open_spider(self, spider):
-        """Connect to MongoDB"""
+        if not self.enabled:
+            return
+
+        self.sink = connect_sink('elasticsearch', self.embedding_dims)
+        if self.sink is None:
+            logger.warning("Elasticsearch unavailable - watchlist alerts disabled")
+            return
         try:
-            mongo_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
-            self.client = MongoClient(mongo_uri)
-            self.db = self.client[os.getenv('MONGODB_DB', 'ecotrace')]
-            logger.info("Connected to MongoDB")
+            self.watchlist = Watchlist(self.sink.es, self.sink.index_prefix, self.max_watches, self.push_timeout)
+            self.watchlist.ensure_index()
         except Exception as e:
-            logger.error(f"Failed to connect to MongoDB: {e}")
-            self.client = None
+            logger.error(f"Failed to create watch match index: {e}")
+            self.watchlist = None
+            return
+
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='watchlist')
+        self.pusher = WebhookPusher(self.watchlist, self.push_queue_size, self.retry_interval, self.retry_max_age)
+        self.pusher.start()
 
     def close_spider(self, spider):
-        """Close MongoDB connection"""
-        if self.client:
-            self.client.close()
+        d = self.flush()
+        d.addBoth(self._shutdown)
+        return d
+
+    def _shutdown(self, result):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        if self.pusher is not None:
+            # Matches still queued after one push timeout are retried next crawl
+            self.pusher.close(timeout=self.push_timeout)
+            if self.crawler_stats is not None:
+                self.crawler_stats.set_value('watchlist/pushed', self.pusher.delivered)
+                self.crawler_stats.set_value('watchlist/push_deferred', self.pusher.deferred)
+        if self.sink is not None:
+            self.sink.close()
+        return result
+
+    def wants(self, adapter):
+        if self.watchlist is None:
+            return False
+        route = route_item(adapter.item)
+        return route is not None and route[0] in WATCH_KINDS
+
+    def process_batch(self, adapters):
+        records = [make_record(adapter.item, dict(adapter)) for adapter in adapters]
+        d = defer_to_executor(self.executor, self.watchlist.process, records)
+        d.addCallback(self._recorded)
+        return d
+
+    def _recorded(self, result):
+        matched, new_matches = result
+        if new_matches:
+            self.pusher.submit(new_matches)
+        if self.crawler_stats is not None:
+            self.crawler_stats.inc_value('watchlist/matched', matched)
+            self.crawler_stats.inc_value('watchlist/new', len(new_matches))
+        return result
+
+
+class RollupPipeline:
+    """Keeps the daily rollup index current for the days crawled items fall on
+
+    Runs after the storage fan-out, so an item arrives once its batch is in
+    Elasticsearch. The days touched by claims and news are collected and
+    recomputed off the reactor thread every ROLLUP_INTERVAL seconds and
+    when the spider closes. With STORAGE_PROJECTION on, Elasticsearch is
+    written later by the projector and rollups are left to `scrapy rollup`.
+    """
+
+    def __init__(self, enabled=True, interval=60.0, embedding_dims=384):
+        self.enabled = enabled
+        self.interval = interval
+        self.embedding_dims = embedding_dims
+        self.sink = None
+        self.rollup = None
+        self.executor = None
+        self.loop = None
+        self.running = None
+        self.dirty = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        sinks = settings.getlist('STORAGE_SINKS') or list(SINKS)
+        return cls(
+            enabled=(
+                settings.getbool('ROLLUP_ENABLED', True)
+                and 'elasticsearch' in sinks
+                and not settings.getbool('STORAGE_PROJECTION', False)
+            ),
+            interval=settings.getfloat('ROLLUP_INTERVAL', 60.0),
+            embedding_dims=settings.getint('EMBEDDING_DIMS', 384),
+        )
+
+    def open_spider(self, spider):
+        if not self.enabled:
+            return
+
+        self.sink = connect_sink('elasticsearch', self.embedding_dims)
+        if self.sink is None:
+            logger.warning("Elasticsearch unavailable - rollups are left to `scrapy rollup`")
+            return
+        try:
+            self.rollup = DailyRollup(self.sink.es, self.sink.index_prefix)
+            self.rollup.ensure_index()
+        except Exception as e:
+            logger.error(f"Failed to create rollup index: {e}")
+            self.rollup = None
+            return
+
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rollup')
+        self.loop = LoopingCall(self.flush)
+        self.loop.start(self.interval, now=False)
+
+    def close_spider(self, spider):
+        if self.loop is not None and self.loop.running:
+            self.loop.stop()
+        d = self.running or succeed(None)
+        d.addBoth(lambda _: self.flush())
+        d.addBoth(self._shutdown)
+        return d
+
+    def _shutdown(self, result):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        if self.sink is not None:
+            self.sink.close()
+        return result
 
     def process_item(self, item, spider):
-        if self.db is None:
+        if self.rollup is None:
             return item
 
-        adapter = ItemAdapter(item)
-        item_dict = dict(adapter)
-        item_class = item.__class__.__name__
+        route = route_item(item)
+        if route is not None and route[0] in ROLLUP_KINDS:
+            kind = route[0]
+            spec = ROLLUP_KINDS[kind]
+            day = rollup_day(ItemAdapter(item).get(spec.get('item_date_field', spec['date_field'])))
+            if day:
+                self.dirty.setdefault(kind, set()).add(day)
+        return item
 
-        try:
-            # Determine collection based on item type
-            if 'CompanyItem' in item_class:
-                collection = self.db['companies']
-            elif 'SustainabilityClaimItem' in item_class:
-                collection = self.db['claims']
-            elif 'RegulatoryDataItem' in item_class:
-                collection = self.db['regulatory']
-            elif 'ScientificPublicationItem' in item_class:
-                collection = self.db['publications']
-            elif 'NewsArticleItem' in item_class:
-                collection = self.db['news']
-            else:
-                logger.warning(f"Unknown item type: {item_class}")
-                return item
-
-            # Insert or update
-            id_field = next((f for f in ['company_id', 'claim_id', 'record_id',
-                                          'publication_id', 'article_id']
-                            if f in item_dict), None)
-
-            if id_field:
-                collection.update_one(
-                    {id_field: item_dict[id_field]},
-                    {'$set': item_dict},
-                    upsert=True
-                )
-            else:
-                collection.insert_one(item_dict)
+    def flush(self):
+        """Recompute the days touched since the last flush"""
+        if self.running is not None or not self.dirty:
+            return succeed(None)
 
-        except Exception as e:
-            logger.error(f"Error writing to MongoDB: {e}")
+        dirty, self.dirty = self.dirty, {}
+        d = defer_to_executor(self.executor, self.rollup.refresh, dirty)
 
-        return item
+        def failed(failure):
+            logger.error(f"Rollup update failed: {failure.value}")
+            # Retry these days with the next flush
+            for kind, days in dirty.items():
+                self.dirty.setdefault(kind, set()).update(days)
+
+        def done(result):
+            self.running = None
+            return result
+
+        d.addErrback(failed)
+        d.addBoth(done)
+        self.running = d
+        return d
@@ -0,0 +1,205 @@
+"""
+EcoTrace outbox projector
+With STORAGE_PROJECTION on, MongoDB is the system of record: the crawl only
+upserts Mongo and queues each written document in the outbox collection.
+The projector drains the outbox into Elasticsearch and Neo4j in bulk, and
+can rebuild both from the Mongo collections from scratch.
+"""
+
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from ecotrace_crawler.storage import ID_FIELDS, KINDS, OUTBOX_COLLECTION, SinkStats, StorageRecord, timed_write
+
+logger = logging.getLogger(__name__)
+
+PROJECTION_SINKS = ['elasticsearch', 'neo4j']
+
+# Progress and lag of the projector, read by /api/metrics/projection
+STATE_COLLECTION = 'projector_state'
+
+
+class ParallelWriter:
+    """Writes batches to several sinks at once
+
+    Each sink has a writer thread and at most max_pending batches in
+    flight, so reading the next batch from Mongo overlaps with writing the
+    previous ones.
+    """
+
+    def __init__(self, sinks, deadletter=None, max_pending=2):
+        self.sinks = sinks
+        self.deadletter = deadletter
+        self.max_pending = max_pending
+        self.stats = {name: SinkStats() for name in sinks}
+        self.executors = {name: ThreadPoolExecutor(max_workers=1) for name in sinks}
+        self.in_flight = {name: deque() for name in sinks}
+        self.failures = []
+
+    def submit(self, records):
+        for name, sink in self.sinks.items():
+            queue = self.in_flight[name]
+            while len(queue) >= self.max_pending:
+                self._settle(name, *queue.popleft())
+            queue.append((records, self.executors[name].submit(timed_write, sink, self.stats[name], records)))
+
+    def drain(self):
+        """Wait for every batch in flight, returning [(sink, records, error)] for failed writes"""
+        for name, queue in self.in_flight.items():
+            while queue:
+                self._settle(name, *queue.popleft())
+        failures, self.failures = self.failures, []
+        return failures
+
+    def _settle(self, name, records, future):
+        try:
+            future.result()
+        except Exception as e:
+            logger.error(f"Error writing {len(records)} document(s) to {name}: {e}")
+            if self.deadletter:
+                self.deadletter.spool_failure(name, records, e)
+            self.failures.append((name, records, e))
+
+    def close(self):
+        self.drain()
+        for executor in self.executors.values():
+            executor.shutdown(wait=True)
+
+
+class OutboxProjector:
+    """Projects Mongo documents into the Elasticsearch and Neo4j sinks"""
+
+    def __init__(self, db, sinks, deadletter=None, batch_size=1000, max_pending=2):
+        self.db = db
+        self.deadletter = deadletter
+        self.batch_size = batch_size
+        self.writer = ParallelWriter(sinks, deadletter, max_pending)
+        self.projected = 0
+
+    def load(self, entries):
+        """Current Mongo documents for a batch of outbox entries
+
+        Entries for the same document collapse into one record; documents
+        deleted since they were queued are skipped.
+        """
+        records = []
+        ids_by_kind = {}
+        for entry in entries:
+            if entry.get('doc') is not None:
+                records.append(StorageRecord(entry['kind'], None, entry['doc']))
+            else:
+                ids_by_kind.setdefault(entry['kind'], set()).add(entry['doc_id'])
+
+        for kind, doc_ids in ids_by_kind.items():
+            id_field = ID_FIELDS[kind]
+            for doc in self.db[kind].find({id_field: {'$in': list(doc_ids)}}, {'_id': 0}):
+                records.append(StorageRecord(kind, doc[id_field], doc))
+        return records
+
+    def project_once(self):
+        """Project the oldest batch of outbox entries, returning how many were processed"""
+        outbox = self.db[OUTBOX_COLLECTION]
+        entries = list(outbox.find().sort('_id', 1).limit(self.batch_size))
+        if not entries:
+            self.report(0)
+            return 0
+
+        started = time.perf_counter()
+        records = self.load(entries)
+        if records:
+            self.writer.submit(records)
+        failures = self.writer.drain()
+        if failures and not self.deadletter:
+            # Leave the entries queued and retry them on the next poll
+            raise RuntimeError(f"Projection failed for {', '.join(name for name, _, _ in failures)}")
+
+        outbox.delete_many({'_id': {'$in': [entry['_id'] for entry in entries]}})
+        self.projected += len(records)
+        self.report(len(records), time.perf_counter() - started)
+        return len(entries)
+
+    def run(self, interval=2.0, once=False):
+        """Drain the outbox, polling every interval seconds when it is empty"""
+        while True:
+            try:
+                processed = self.project_once()
+            except Exception as e:
+                logger.error(f"Outbox projection failed: {e}")
+                processed = 0
+            if not processed:
+                if once:
+                    return
+                time.sleep(interval)
+
+    def rebuild(self, kinds=None):
+        """Re-project every document in the Mongo collections
+
+        Outbox entries queued before the rebuild started are covered by it
+        and dropped; later ones are projected as usual. The cutoff is the
+        entries' created_at, since ObjectIds from different writers are not
+        ordered within a second.
+        """
+        outbox = self.db[OUTBOX_COLLECTION]
+        cutoff = datetime.utcnow()
+        started = time.perf_counter()
+        total = 0
+
+        for kind in kinds or KINDS:
+            id_field = ID_FIELDS[kind]
+            batch = []
+            for doc in self.db[kind].find({}, {'_id': 0}, batch_size=self.batch_size):
+                batch.append(StorageRecord(kind, doc.get(id_field), doc))
+                if len(batch) >= self.batch_size:
+                    self.writer.submit(batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                self.writer.submit(batch)
+                total += len(batch)
+            logger.info(f"Rebuild: queued {kind} ({total} documents so far)")
+
+        failures = self.writer.drain()
+        outbox.delete_many({'created_at': {'$lt': cutoff}})
+
+        elapsed = time.perf_counter() - started
+        self.projected += total
+        self.report(total, elapsed)
+        return {
+            'documents': total,
+            'failed_batches': len(failures),
+            'seconds': round(elapsed, 1),
+            'docs_per_sec': round(total / elapsed) if elapsed else None,
+        }
+
+    def lag(self):
+        """Outbox backlog and the age of its oldest entry"""
+        outbox = self.db[OUTBOX_COLLECTION]
+        oldest = outbox.find_one(sort=[('_id', 1)], projection={'created_at': 1})
+        return {
+            'backlog': outbox.estimated_document_count(),
+            'lag_seconds': round((datetime.utcnow() - oldest['created_at']).total_seconds(), 1) if oldest else 0.0,
+        }
+
+    def report(self, projected, seconds=None):
+        state = {
+            **self.lag(),
+            'updated_at': datetime.utcnow(),
+            'projected_total': self.projected,
+            'sinks': {name: stats.summary() for name, stats in self.writer.stats.items()},
+        }
+        if projected and seconds:
+            state['last_batch'] = {
+                'documents': projected,
+                'docs_per_sec': round(projected / seconds),
+            }
+            logger.info(
+                f"Projected {projected} document(s) at {state['last_batch']['docs_per_sec']} docs/sec, "
+                f"backlog {state['backlog']}, lag {state['lag_seconds']}s"
+            )
+        self.db[STATE_COLLECTION].update_one({'_id': 'outbox'}, {'$set': state}, upsert=True)
+        return state
+
+    def close(self):
+        self.writer.close()
@@ -0,0 +1,199 @@
+"""
+EcoTrace cross-store reconciler
+Checks that MongoDB, Elasticsearch and Neo4j hold the same documents.
+
+Every store is streamed once and folded into a fixed number of buckets
+(by id hash), each keeping a document count and an order-independent sum
+of id+content hashes, so memory does not grow with the corpus. Only the
+buckets whose digests disagree with MongoDB are streamed again at document
+level to find the differing ids. MongoDB is the system of record: repairs
+rewrite Elasticsearch/Neo4j from it and delete what it does not have.
+"""
+
+import hashlib
+import json
+import logging
+from elasticsearch import helpers
+from ecotrace_crawler.storage import ID_FIELDS, StorageRecord
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = 4096
+
+# Fields compared per kind - what every store holding the kind keeps
+RECONCILE_FIELDS = {
+    'companies': ['name', 'website', 'industry', 'crawled_at'],
+    'claims': ['company_id', 'claim_text', 'claim_type', 'source_type', 'source_url', 'extracted_at'],
+    'regulatory': ['company_id', 'agency', 'record_type', 'metric', 'value', 'unit',
+                   'reporting_year', 'filed_date', 'source_url'],
+    'publications': ['title', 'journal', 'url', 'publication_date'],
+    'news': ['title', 'source', 'url', 'published_date', 'sentiment'],
+}
+
+# Neo4j reads, returning the compared fields under their document names.
+# Companies created only from news/publication mentions have no
+# company_id, and placeholders created by claims have no name; neither is
+# a stored company document.
+NEO4J_SCANS = {
+    'companies': """
+        MATCH (n:Company) WHERE n.company_id IS NOT NULL AND n.name IS NOT NULL
+        RETURN n.company_id AS id, n.name AS name, n.website AS website,
+               n.industry AS industry, n.updated_at AS crawled_at
+    """,
+    'claims': """
+        MATCH (n:Claim) WHERE n.claim_id IS NOT NULL
+        RETURN n.claim_id AS id,
+               COLLECT { MATCH (c:Company)-[:MAKES_CLAIM]->(n) RETURN c.company_id }[0] AS company_id,
+               n.claim_text AS claim_text, n.claim_type AS claim_type, n.source_type AS source_type,
+               n.source_url AS source_url, n.extracted_at AS extracted_at
+    """,
+    'publications': """
+        MATCH (n:Publication) WHERE n.publication_id IS NOT NULL
+        RETURN n.publication_id AS id, n.title AS title, n.journal AS journal,
+               n.url AS url, n.published_date AS publication_date
+    """,
+    'news': """
+        MATCH (n:NewsArticle) WHERE n.article_id IS NOT NULL
+        RETURN n.article_id AS id, n.title AS title, n.source AS source, n.url AS url,
+               n.published_date AS published_date, n.sentiment AS sentiment
+    """,
+}
+
+
+def canonical(value):
+    """Comparable text for a field value; unset and empty are the same"""
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, sort_keys=True, default=str)
+    return str(value)
+
+
+def doc_hash(doc_id, doc, fields):
+    payload = '\x1f'.join([str(doc_id)] + [canonical(doc.get(field)) for field in fields])
+    return int(hashlib.sha1(payload.encode()).hexdigest()[:16], 16)
+
+
+def bucket_of(doc_id, buckets):
+    return int(hashlib.md5(str(doc_id).encode()).hexdigest()[:8], 16) % buckets
+
+
+def chunked(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class Reconciler:
+    """Diffs and repairs one kind at a time across the connected sinks"""
+
+    def __init__(self, sinks, buckets=DEFAULT_BUCKETS, batch_size=1000):
+        if 'mongodb' not in sinks:
+            raise ValueError("Reconciling needs MongoDB, the system of record")
+        self.sinks = sinks
+        self.buckets = buckets
+        self.batch_size = batch_size
+
+    def stores(self, kind):
+        """Stores other than MongoDB that hold this kind"""
+        return [
+            name for name in self.sinks
+            if name == 'elasticsearch' or (name == 'neo4j' and kind in NEO4J_SCANS)
+        ]
+
+    def scan(self, store, kind):
+        """Yield (id, document) for every document of a kind in a store"""
+        fields = RECONCILE_FIELDS[kind]
+        id_field = ID_FIELDS[kind]
+
+        if store == 'mongodb':
+            projection = {field: 1 for field in fields + [id_field]}
+            projection['_id'] = 0
+            for doc in self.sinks['mongodb'].db[kind].find({}, projection, batch_size=self.batch_size):
+                if doc.get(id_field):
+                    yield doc[id_field], doc
+
+        elif store == 'elasticsearch':
+            sink = self.sinks['elasticsearch']
+            for hit in helpers.scan(
+                sink.es,
+                index=sink.index_name(kind),
+                query={'query': {'match_all': {}}, '_source': fields},
+                size=self.batch_size,
+                ignore_unavailable=True,
+            ):
+                yield hit['_id'], hit.get('_source') or {}
+
+        elif store == 'neo4j':
+            with self.sinks['neo4j'].driver.session(fetch_size=self.batch_size) as session:
+                for record in session.run(NEO4J_SCANS[kind]):
+                    doc = record.data()
+                    yield doc.pop('id'), doc
+
+    def digests(self, store, kind):
+        """Per-bucket (count, hash sum) for a store"""
+        fields = RECONCILE_FIELDS[kind]
+        counts = [0] * self.buckets
+        sums = [0] * self.buckets
+        for doc_id, doc in self.scan(store, kind):
+            bucket = bucket_of(doc_id, self.buckets)
+            counts[bucket] += 1
+            sums[bucket] = (sums[bucket] + doc_hash(doc_id, doc, fields)) & 0xFFFFFFFFFFFFFFFF
+        return list(zip(counts, sums))
+
+    def bucket_hashes(self, store, kind, buckets):
+        """{id: hash} for the documents in the given buckets"""
+        fields = RECONCILE_FIELDS[kind]
+        return {
+            doc_id: doc_hash(doc_id, doc, fields)
+            for doc_id, doc in self.scan(store, kind)
+            if bucket_of(doc_id, self.buckets) in buckets
+        }
+
+    def diff(self, kind):
+        """{store: {'missing': [...], 'extra': [...], 'changed': [...]}} against MongoDB"""
+        stores = self.stores(kind)
+        reference = self.digests('mongodb', kind)
+
+        mismatched = {}
+        for store in stores:
+            digests = self.digests(store, kind)
+            buckets = {i for i in range(self.buckets) if digests[i] != reference[i]}
+            logger.info(f"{kind}: {len(buckets)}/{self.buckets} bucket(s) differ between mongodb and {store}")
+            if buckets:
+                mismatched[store] = buckets
+
+        differences = {store: {'missing': [], 'extra': [], 'changed': []} for store in stores}
+        if not mismatched:
+            return differences
+
+        expected = self.bucket_hashes('mongodb', kind, set().union(*mismatched.values()))
+        for store, buckets in mismatched.items():
+            actual = self.bucket_hashes(store, kind, buckets)
+            wanted = {
+                doc_id: value for doc_id, value in expected.items()
+                if bucket_of(doc_id, self.buckets) in buckets
+            }
+            differences[store] = {
+                'missing': sorted(set(wanted) - set(actual)),
+                'extra': sorted(set(actual) - set(wanted)),
+                'changed': sorted(doc_id for doc_id in set(wanted) & set(actual) if wanted[doc_id] != actual[doc_id]),
+            }
+        return differences
+
+    def repair(self, kind, differences):
+        """Rewrite missing/changed documents from MongoDB and delete extras"""
+        id_field = ID_FIELDS[kind]
+        collection = self.sinks['mongodb'].db[kind]
+        repaired = {}
+
+        for store, found in differences.items():
+            sink = self.sinks[store]
+            rewrite = found['missing'] + found['changed']
+            for ids in chunked(rewrite, self.batch_size):
+                docs = collection.find({id_field: {'$in': ids}}, {'_id': 0})
+                sink.write_batch([StorageRecord(kind, doc[id_field], doc) for doc in docs])
+            for ids in chunked(found['extra'], self.batch_size):
+                sink.delete_batch(kind, ids)
+            repaired[store] = {'rewritten': len(rewrite), 'deleted': len(found['extra'])}
+
+        return repaired
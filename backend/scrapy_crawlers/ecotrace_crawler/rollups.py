@@ -0,0 +1,252 @@
+"""
+EcoTrace daily rollups
+Per-day counters of claims by type and news by sentiment, overall and per
+company, kept in a small rollup index so trend endpoints cost O(days)
+instead of aggregating the raw indices on every call.
+
+A day's counters are recomputed from the raw index whenever documents
+dated on it are written, so re-crawled documents are never counted twice.
+Claims are counted on the day they were first stored: re-crawls reset
+extracted_at, which would move them to a day that is rebuilt while the
+day they left is not.
+"""
+
+import hashlib
+import logging
+import re
+from datetime import datetime, timedelta
+from elasticsearch import helpers
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_INDEX = 'rollups_daily'
+
+# Kinds rolled up: the date a document is counted on (and the one used for
+# documents stored before it existed), the field that records when it was
+# (re)written, and the counted dimensions. Crawled items are marked dirty on
+# the day of item_date_field, which they carry themselves.
+ROLLUP_KINDS = {
+    'claims': {
+        'date_field': 'first_seen_at',
+        'fallback_date_field': 'extracted_at',
+        'item_date_field': 'extracted_at',
+        'changed_field': 'extracted_at',
+        'company_field': 'company_name.keyword',
+        'dimensions': {'claim_type': 'claim_type.keyword'},
+    },
+    'news': {
+        'date_field': 'published_date',
+        'changed_field': 'crawled_at',
+        'company_field': 'company_mentions.keyword',
+        'dimensions': {'sentiment': 'sentiment.keyword'},
+    },
+}
+
+# One document per (kind, day, company, dimension, value). Overall counters
+# have no company.
+ROLLUP_MAPPING = {
+    'properties': {
+        'dataset': {'type': 'keyword'},
+        'date': {'type': 'date', 'format': 'yyyy-MM-dd'},
+        'company': {'type': 'keyword'},
+        'dimension': {'type': 'keyword'},
+        'value': {'type': 'keyword'},
+        'count': {'type': 'long'},
+        'rolled_at': {'type': 'date'},
+    }
+}
+
+# Documents without a value for a dimension are counted under this
+UNKNOWN_VALUE = 'unknown'
+
+# Per-kind progress of the rollup command, stored in the rollup index
+WATERMARK_DATASET = '_watermark'
+
+DAY_PREFIX = re.compile(r'^\d{4}-\d{2}-\d{2}')
+
+
+def rollup_day(value):
+    """yyyy-MM-dd day of a normalised date, or None"""
+    if not isinstance(value, str):
+        return None
+    match = DAY_PREFIX.match(value)
+    return match.group(0) if match else None
+
+
+def day_query(spec, day):
+    """Documents of a kind counted on a day"""
+    bounds = {'gte': f'{day}||/d', 'lte': f'{day}||/d'}
+    query = {'range': {spec['date_field']: bounds}}
+    fallback = spec.get('fallback_date_field')
+    if not fallback:
+        return query
+    return {'bool': {'should': [
+        query,
+        {'bool': {
+            'must_not': [{'exists': {'field': spec['date_field']}}],
+            'filter': [{'range': {fallback: bounds}}],
+        }},
+    ], 'minimum_should_match': 1}}
+
+
+def rollup_id(kind, day, company, dimension, value):
+    key = '\x1f'.join([kind, day, company or '', dimension, value])
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+class DailyRollup:
+    """Recomputes the rollup documents of given days from the raw indices"""
+
+    def __init__(self, es, index_prefix='ecotrace', page_size=1000, lateness=3600):
+        self.es = es
+        self.index_prefix = index_prefix
+        self.page_size = page_size
+        # Documents can reach Elasticsearch well after their changed_field
+        # was set (batching, outbox projection); the watermark trails by this
+        # many seconds so they are still picked up
+        self.lateness = lateness
+
+    @property
+    def index(self):
+        return f'{self.index_prefix}_{ROLLUP_INDEX}'
+
+    def source_index(self, kind):
+        return f'{self.index_prefix}_{kind}'
+
+    def ensure_index(self):
+        if not self.es.indices.exists(index=self.index):
+            self.es.indices.create(index=self.index, mappings=ROLLUP_MAPPING)
+            logger.info(f"Created Elasticsearch index: {self.index}")
+
+    def composite(self, kind, query, sources):
+        """Yield every bucket of a composite aggregation over a raw index"""
+        after = None
+        while True:
+            composite = {'size': self.page_size, 'sources': sources}
+            if after:
+                composite['after'] = after
+            response = self.es.search(
+                index=self.source_index(kind),
+                query=query,
+                size=0,
+                aggs={'rows': {'composite': composite}},
+                ignore_unavailable=True,
+            )
+            rows = (response.get('aggregations') or {}).get('rows')
+            if not rows or not rows['buckets']:
+                return
+            yield from rows['buckets']
+            after = rows.get('after_key')
+            if not after:
+                return
+
+    def rows(self, kind, day):
+        """Rollup documents for one day of a kind"""
+        spec = ROLLUP_KINDS[kind]
+        query = day_query(spec, day)
+
+        for dimension, field in spec['dimensions'].items():
+            value_source = {'value': {'terms': {'field': field, 'missing_bucket': True}}}
+            company_source = {'company': {'terms': {'field': spec['company_field']}}}
+
+            for bucket in self.composite(kind, query, [value_source]):
+                yield self.row(kind, day, None, dimension, bucket)
+            for bucket in self.composite(kind, query, [company_source, value_source]):
+                yield self.row(kind, day, bucket['key']['company'], dimension, bucket)
+
+    def row(self, kind, day, company, dimension, bucket):
+        value = bucket['key']['value'] or UNKNOWN_VALUE
+        doc = {
+            'dataset': kind,
+            'date': day,
+            'dimension': dimension,
+            'value': value,
+            'count': bucket['doc_count'],
+        }
+        if company:
+            doc['company'] = company
+        return rollup_id(kind, day, company, dimension, value), doc
+
+    def rebuild_day(self, kind, day):
+        """Replace a day's rollup documents, returning how many there are"""
+        stamp = datetime.utcnow().isoformat()
+        actions = [
+            {'_index': self.index, '_id': doc_id, '_source': {**doc, 'rolled_at': stamp}}
+            for doc_id, doc in self.rows(kind, day)
+        ]
+        if actions:
+            helpers.bulk(self.es, actions)
+        self.es.indices.refresh(index=self.index)
+
+        # Counters whose documents are all gone were not rewritten above
+        self.es.delete_by_query(
+            index=self.index,
+            query={'bool': {'filter': [
+                {'term': {'dataset': kind}},
+                {'term': {'date': day}},
+                {'range': {'rolled_at': {'lt': stamp}}},
+            ]}},
+            conflicts='proceed',
+            refresh=True,
+        )
+        return len(actions)
+
+    def refresh(self, days_by_kind):
+        """Rebuild the given {kind: days}, returning rollup documents written"""
+        written = 0
+        for kind, days in days_by_kind.items():
+            if not days:
+                continue
+            # Make the latest writes to the raw index visible first
+            self.es.indices.refresh(index=self.source_index(kind), ignore_unavailable=True)
+            for day in sorted(days):
+                written += self.rebuild_day(kind, day)
+            logger.info(f"Rolled up {len(days)} day(s) of {kind}")
+        return written
+
+    def changed_days(self, kind, since=None):
+        """Days with documents of a kind written since a time (all days if None)"""
+        spec = ROLLUP_KINDS[kind]
+        changed = [{'range': {spec['changed_field']: {'gte': since}}}] if since else []
+
+        def days_of(field, query):
+            day_source = {'day': {'date_histogram': {
+                'field': field, 'calendar_interval': 'day', 'format': 'yyyy-MM-dd'
+            }}}
+            return {bucket['key']['day'] for bucket in self.composite(kind, query, [day_source])}
+
+        days = days_of(spec['date_field'], {'bool': {'filter': changed}})
+        if spec.get('fallback_date_field'):
+            days |= days_of(spec['fallback_date_field'], {'bool': {
+                'filter': changed,
+                'must_not': [{'exists': {'field': spec['date_field']}}],
+            }})
+        return sorted(days)
+
+    def watermark(self, kind):
+        try:
+            return self.es.get(index=self.index, id=f'{WATERMARK_DATASET}|{kind}')['_source']['rolled_at']
+        except Exception:
+            return None
+
+    def update(self, kinds=None, since=None, full=False):
+        """Roll up the days touched since the last update, returning days rebuilt per kind"""
+        self.ensure_index()
+        rebuilt = {}
+        for kind in kinds or ROLLUP_KINDS:
+            started = datetime.utcnow()
+            start = None if full else (since or self.watermark(kind))
+            days = self.changed_days(kind, start)
+            self.refresh({kind: days})
+            rebuilt[kind] = len(days)
+
+            self.es.index(
+                index=self.index,
+                id=f'{WATERMARK_DATASET}|{kind}',
+                document={
+                    'dataset': WATERMARK_DATASET,
+                    'value': kind,
+                    'rolled_at': (started - timedelta(seconds=self.lateness)).isoformat(),
+                },
+            )
+        return rebuilt
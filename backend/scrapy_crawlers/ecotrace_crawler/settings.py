@@ -10,6 +10,7 @@ BOT_NAME = "ecotrace_crawler"
 
 SPIDER_MODULES = ["ecotrace_crawler.spiders"]
 NEWSPIDER_MODULE = "ecotrace_crawler.spiders"
+COMMANDS_MODULE = "ecotrace_crawler.commands"
 
 # Crawl responsibly by identifying yourself
 USER_AGENT = "Mozilla/5.0 (compatible; EcoTrace-Bot/1.0; +https://ecotrace.ai/bot)"
@@ -79,12 +80,63 @@ PLAYWRIGHT_DEFAULT_NAVIGATION_TIMEOUT = 30000  # 30 seconds
 # Configure item pipelines
 ITEM_PIPELINES = {
     "ecotrace_crawler.pipelines.DataValidationPipeline": 100,
-    # "ecotrace_crawler.pipelines.NLPExtractionPipeline": 200,  # Disabled - requires spacy
-    "ecotrace_crawler.pipelines.ElasticsearchPipeline": 300,
-    "ecotrace_crawler.pipelines.Neo4jPipeline": 400,
-    "ecotrace_crawler.pipelines.MongoDBPipeline": 500,
+    "ecotrace_crawler.pipelines.DateNormalizationPipeline": 150,
+    "ecotrace_crawler.pipelines.NLPExtractionPipeline": 200,
+    "ecotrace_crawler.pipelines.UnitNormalizationPipeline": 220,
+    "ecotrace_crawler.pipelines.EmbeddingPipeline": 250,
+    "ecotrace_crawler.pipelines.StorageFanoutPipeline": 300,
+    "ecotrace_crawler.pipelines.WatchlistPipeline": 320,
+    "ecotrace_crawler.pipelines.RollupPipeline": 350,
 }
 
+# NLP extraction (falls back to regex extraction when spacy is not installed)
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+NLP_BATCH_SIZE = 64       # claims per nlp.pipe call
+NLP_MAX_LATENCY = 2.0     # seconds a claim may wait for its batch to fill
+NLP_WORKERS = 1           # spaCy worker processes
+NLP_EXCLUDED_COMPONENTS = [
+    "tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner", "senter"
+]
+
+# Sentence embeddings for claim/evidence similarity search
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_DIMS = int(os.getenv("EMBEDDING_DIMS", 384))  # must match the model
+EMBEDDING_BATCH_SIZE = 32
+EMBEDDING_MAX_LATENCY = 2.0
+
+# Storage fan-out: each batch is written to every sink concurrently
+STORAGE_SINKS = ["elasticsearch", "neo4j", "mongodb"]
+STORAGE_BATCH_SIZE = 100    # items per bulk write
+STORAGE_MAX_LATENCY = 1.0   # seconds an item may wait for its batch to fill
+STORAGE_MAX_PENDING = 2     # batches in flight per sink before the crawl is held back
+# Write only MongoDB and project it into Elasticsearch/Neo4j with
+# `scrapy project_outbox` instead of writing all three stores directly
+STORAGE_PROJECTION = os.getenv("STORAGE_PROJECTION", "false").lower() == "true"
+PROJECTOR_BATCH_SIZE = 1000
+PROJECTOR_INTERVAL = 2.0    # seconds between polls when the outbox is empty
+
+# Saved-search alerts: crawled records are percolated against /api/watchlist
+# searches in batches and new matches pushed to their webhooks in the background
+WATCHLIST_ENABLED = True
+WATCHLIST_BATCH_SIZE = 100
+WATCHLIST_MAX_LATENCY = 2.0
+WATCHLIST_MAX_WATCHES = 1000    # matching watches read per batch
+WATCHLIST_PUSH_TIMEOUT = 5.0    # seconds per webhook call
+WATCHLIST_PUSH_QUEUE_SIZE = 100     # batches of matches waiting to be pushed
+WATCHLIST_RETRY_INTERVAL = 300.0    # seconds between pushes of undelivered matches
+WATCHLIST_RETRY_MAX_AGE = 86400.0   # seconds undelivered matches keep being retried
+
+# Daily claim/news counters for the trend endpoints; refreshed during the
+# crawl, or with `scrapy rollup` (e.g. from cron) when projecting
+ROLLUP_ENABLED = True
+ROLLUP_INTERVAL = 60.0      # seconds between rollup refreshes during a crawl
+ROLLUP_LATENESS = 3600      # seconds `scrapy rollup` looks back past its last run
+
+# Failed storage writes are spooled here; replay with `scrapy replay_deadletters`
+DEADLETTER_ENABLED = True
+DEADLETTER_DIR = os.getenv("DEADLETTER_DIR", "deadletter")
+DEADLETTER_MAX_BYTES = 64 * 1024 * 1024  # rotate and gzip the active segment at this size
+
 # Enable and configure the AutoThrottle extension
 AUTOTHROTTLE_ENABLED = True
 AUTOTHROTTLE_START_DELAY = 2
@@ -9,6 +9,7 @@ import hashlib
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
 from ecotrace_crawler.items import CompanyItem, SustainabilityClaimItem
+from ecotrace_crawler.matching import KeywordMatcher
 
 
 class CorporateSpider(scrapy.Spider):
@@ -50,6 +51,21 @@ class CorporateSpider(scrapy.Spider):
         'sustainable', 'responsibility', 'impact report'
     ]
 
+    # Claim type keywords in classification priority order
+    claim_type_keywords = [
+        ('net_zero', ['net zero', 'carbon neutral', 'climate neutral']),
+        ('renewable_energy', ['renewable', 'clean energy']),
+        ('waste_reduction', ['waste']),
+        ('water', ['water']),
+        ('emission_reduction', ['emission', 'carbon', 'ghg']),
+    ]
+
+    # Single-pass matcher for the relevance filter and claim classification
+    matcher = KeywordMatcher().add('keyword', sustainability_keywords, prefix=True)
+    for claim_type, keywords in claim_type_keywords:
+        matcher.add(claim_type, keywords, prefix=True)
+    del claim_type, keywords
+
     def __init__(self, start_urls=None, company_name=None, *args, **kwargs):
         """Initialize spider with optional custom URL and company name"""
         super(CorporateSpider, self).__init__(*args, **kwargs)
@@ -238,8 +254,9 @@ class CorporateSpider(scrapy.Spider):
                 continue
 
             # Check if text contains sustainability keywords
-            text_lower = text.lower()
-            if any(keyword in text_lower for keyword in self.sustainability_keywords):
+            hits = self.matcher.scan(text)
+            if 'keyword' in hits:
+                claim_type = self.classify_claim_type(hits)
 
                 # Try to match claim patterns
                 for pattern in claim_patterns:
@@ -279,22 +296,18 @@ class CorporateSpider(scrapy.Spider):
                                 claim_item['unit'] = 'percent'
 
                         # Classify claim type
-                        if any(word in text_lower for word in ['net zero', 'carbon neutral', 'climate neutral']):
-                            claim_item['claim_type'] = 'net_zero'
-                        elif any(word in text_lower for word in ['renewable', 'clean energy']):
-                            claim_item['claim_type'] = 'renewable_energy'
-                        elif 'waste' in text_lower:
-                            claim_item['claim_type'] = 'waste_reduction'
-                        elif 'water' in text_lower:
-                            claim_item['claim_type'] = 'water'
-                        elif any(word in text_lower for word in ['emission', 'carbon', 'ghg']):
-                            claim_item['claim_type'] = 'emission_reduction'
-                        else:
-                            claim_item['claim_type'] = 'sustainability'
+                        claim_item['claim_type'] = claim_type
 
                         claim_count += 1
                         yield claim_item
 
+    def classify_claim_type(self, hits):
+        """Pick the highest-priority claim type found by the matcher"""
+        for claim_type, _ in self.claim_type_keywords:
+            if claim_type in hits:
+                return claim_type
+        return 'sustainability'
+
     def is_sustainability_related(self, url):
         """Check if URL is likely related to sustainability"""
         url_lower = url.lower()
@@ -10,6 +10,7 @@ import hashlib
 from datetime import datetime, timedelta
 from urllib.parse import urljoin, quote
 from ecotrace_crawler.items import NewsArticleItem
+from ecotrace_crawler.matching import KeywordMatcher
 
 
 class NewsSpider(scrapy.Spider):
@@ -29,6 +30,42 @@ class NewsSpider(scrapy.Spider):
         'environmental claim', 'climate target', 'carbon offset'
     ]
 
+    # Sentiment keywords (matched as word prefixes)
+    positive_keywords = [
+        'achieve', 'success', 'leader', 'innovative', 'commit',
+        'progress', 'milestone', 'award', 'recognized', 'certified'
+    ]
+
+    negative_keywords = [
+        'greenwash', 'fail', 'mislead', 'accuse', 'lawsuit',
+        'violation', 'false', 'deceptive', 'controversy', 'scandal',
+        'criticize', 'penalty', 'fraud'
+    ]
+
+    # Single-pass matcher over companies, topics and sentiment words
+    matcher = (
+        KeywordMatcher()
+        .add('company', target_companies)
+        .add('topic', sustainability_keywords, prefix=True)
+        .add('positive', positive_keywords, prefix=True)
+        .add('negative', negative_keywords, prefix=True)
+    )
+
+    # Source credibility tiers
+    source_matcher = (
+        KeywordMatcher()
+        # Tier 1: High credibility sources
+        .add('tier1', [
+            'reuters', 'associated press', 'bloomberg', 'financial times',
+            'wall street journal', 'the guardian', 'bbc', 'npr'
+        ], prefix=True)
+        # Tier 2: Medium credibility
+        .add('tier2', [
+            'cnn', 'cnbc', 'forbes', 'business insider', 'washington post',
+            'new york times', 'time', 'the economist'
+        ], prefix=True)
+    )
+
     # News sources (using RSS feeds and public APIs where available)
     news_sources = [
         {
@@ -136,20 +173,19 @@ class NewsSpider(scrapy.Spider):
             if author:
                 break
 
+        # Scan title and content once for companies, topics and sentiment
+        hits = self.matcher.scan(title, content)
+
         # Detect all companies mentioned in the article
-        company_mentions = []
-        for comp in self.target_companies:
-            if comp.lower() in content.lower() or comp.lower() in title.lower():
-                company_mentions.append(comp)
+        mentioned = hits.get('company', {})
+        company_mentions = [comp for comp in self.target_companies if comp in mentioned]
 
         # Extract sustainability topics
-        topics = []
-        for kw in self.sustainability_keywords:
-            if kw in content.lower() or kw in title.lower():
-                topics.append(kw)
+        found_topics = hits.get('topic', {})
+        topics = [kw for kw in self.sustainability_keywords if kw in found_topics]
 
         # Determine sentiment (simple keyword-based)
-        sentiment = self.analyze_sentiment(title, content)
+        sentiment = self.analyze_sentiment(title, content, hits)
 
         # Calculate credibility rating based on source
         credibility = self.calculate_credibility(source)
@@ -176,25 +212,13 @@ class NewsSpider(scrapy.Spider):
 
             yield item
 
-    def analyze_sentiment(self, title, content):
+    def analyze_sentiment(self, title, content, hits=None):
         """Simple sentiment analysis based on keywords"""
-        text = (title + ' ' + content).lower()
-
-        # Positive keywords
-        positive_keywords = [
-            'achieve', 'success', 'leader', 'innovative', 'commit',
-            'progress', 'milestone', 'award', 'recognized', 'certified'
-        ]
-
-        # Negative keywords
-        negative_keywords = [
-            'greenwash', 'fail', 'mislead', 'accuse', 'lawsuit',
-            'violation', 'false', 'deceptive', 'controversy', 'scandal',
-            'criticize', 'penalty', 'fraud'
-        ]
+        if hits is None:
+            hits = self.matcher.scan(title, content)
 
-        positive_count = sum(1 for kw in positive_keywords if kw in text)
-        negative_count = sum(1 for kw in negative_keywords if kw in text)
+        positive_count = len(hits.get('positive', {}))
+        negative_count = len(hits.get('negative', {}))
 
         if negative_count > positive_count:
             return 'negative'
@@ -205,27 +229,13 @@ class NewsSpider(scrapy.Spider):
 
     def calculate_credibility(self, source):
         """Calculate source credibility rating"""
-        # Tier 1: High credibility sources
-        tier1 = [
-            'reuters', 'associated press', 'bloomberg', 'financial times',
-            'wall street journal', 'the guardian', 'bbc', 'npr'
-        ]
-
-        # Tier 2: Medium credibility
-        tier2 = [
-            'cnn', 'cnbc', 'forbes', 'business insider', 'washington post',
-            'new york times', 'time', 'the economist'
-        ]
-
-        source_lower = source.lower()
+        hits = self.source_matcher.scan(source)
 
-        for outlet in tier1:
-            if outlet in source_lower:
-                return 0.9
+        if 'tier1' in hits:
+            return 0.9
 
-        for outlet in tier2:
-            if outlet in source_lower:
-                return 0.7
+        if 'tier2' in hits:
+            return 0.7
 
         return 0.5  # Unknown or lower-tier sources
 
@@ -11,6 +11,7 @@ import json
 from datetime import datetime
 from urllib.parse import urljoin, urlencode
 from ecotrace_crawler.items import RegulatoryDataItem
+from ecotrace_crawler.units import QUANTITY_PATTERN
 
 
 class RegulatorySpider(scrapy.Spider):
@@ -217,8 +218,8 @@ class RegulatorySpider(scrapy.Spider):
                 for match in matches:
                     context = match.group(0)
 
-                    # Try to extract numerical data
-                    numbers = re.findall(r'\$?([\d,]+(?:\.\d+)?)\s*(?:million|billion|thousand|tons?|tonnes?|MW|GW)?', context)
+                    # Try to extract numerical data, keeping its scale and unit
+                    quantity = QUANTITY_PATTERN.search(context)
 
                     item = RegulatoryDataItem()
                     item['record_id'] = self.generate_id(f"{company['cik']}_{filing_date}_{keyword}")
@@ -232,8 +233,8 @@ class RegulatorySpider(scrapy.Spider):
                     item['filed_date'] = filing_date
                     item['crawled_at'] = datetime.utcnow().isoformat()
 
-                    if numbers:
-                        item['value'] = numbers[0]
+                    if quantity:
+                        item['value'] = quantity.group(0).strip()
 
                     yield item
 
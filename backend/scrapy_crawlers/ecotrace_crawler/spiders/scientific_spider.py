@@ -11,6 +11,7 @@ import json
 from datetime import datetime
 from urllib.parse import urljoin, urlencode, quote
 from ecotrace_crawler.items import ScientificPublicationItem
+from ecotrace_crawler.matching import KeywordMatcher
 
 
 class ScientificSpider(scrapy.Spider):
@@ -42,11 +43,34 @@ class ScientificSpider(scrapy.Spider):
         'Walmart', 'Ford', 'GM'
     ]
 
+    # Keywords that increase relevance (matched as word prefixes)
+    high_value_keywords = [
+        'greenwash', 'emission', 'carbon', 'climate', 'sustainability',
+        'corporate', 'esg', 'environmental', 'verification', 'disclosure'
+    ]
+
     custom_settings = {
         'CONCURRENT_REQUESTS_PER_DOMAIN': 2,
         'DOWNLOAD_DELAY': 3,
     }
 
+    def __init__(self, *args, **kwargs):
+        super(ScientificSpider, self).__init__(*args, **kwargs)
+        self._matchers = {}
+
+    def get_matcher(self, query):
+        """Return the cached single-pass matcher for a search query"""
+        matcher = self._matchers.get(query)
+        if matcher is None:
+            matcher = (
+                KeywordMatcher()
+                .add('company', self.target_companies)
+                .add('bonus', self.high_value_keywords, prefix=True)
+                .add('query', query.lower().split(), prefix=True)
+            )
+            self._matchers[query] = matcher
+        return matcher
+
     def start_requests(self):
         """Generate initial requests for academic sources"""
 
@@ -98,17 +122,18 @@ class ScientificSpider(scrapy.Spider):
             authors = entry.xpath('.//xmlns:author/xmlns:name/text()', namespaces={'xmlns': 'http://www.w3.org/2005/Atom'}).getall()
 
             if title and abstract:
+                hits = self.get_matcher(query).scan(title, abstract)
+
                 # Check relevance to companies
                 related_companies = []
                 if company:
                     related_companies.append(company)
                 else:
-                    for comp in self.target_companies:
-                        if comp.lower() in abstract.lower() or comp.lower() in title.lower():
-                            related_companies.append(comp)
+                    mentioned = hits.get('company', {})
+                    related_companies = [comp for comp in self.target_companies if comp in mentioned]
 
                 # Calculate relevance score
-                relevance_score = self.calculate_relevance(title, abstract, query)
+                relevance_score = self.calculate_relevance(title, abstract, query, hits)
 
                 if relevance_score > 0.3:  # Only save relevant publications
                     item = ScientificPublicationItem()
@@ -196,15 +221,14 @@ class ScientificSpider(scrapy.Spider):
         # Extract DOI
         doi = response.css('a.id-link::text').get()
 
+        hits = self.get_matcher(query).scan(title, abstract)
+
         # Check for company mentions
-        related_companies = []
-        content = title + ' ' + abstract
-        for company in self.target_companies:
-            if company.lower() in content.lower():
-                related_companies.append(company)
+        mentioned = hits.get('company', {})
+        related_companies = [company for company in self.target_companies if company in mentioned]
 
         # Calculate relevance
-        relevance_score = self.calculate_relevance(title, abstract, query)
+        relevance_score = self.calculate_relevance(title, abstract, query, hits)
 
         if relevance_score > 0.3:
             item = ScientificPublicationItem()
@@ -224,21 +248,17 @@ class ScientificSpider(scrapy.Spider):
 
             yield item
 
-    def calculate_relevance(self, title, abstract, query):
+    def calculate_relevance(self, title, abstract, query, hits=None):
         """Calculate relevance score based on keyword matching"""
-        text = (title + ' ' + abstract).lower()
+        if hits is None:
+            hits = self.get_matcher(query).scan(title, abstract)
         query_terms = query.lower().split()
 
         # Count matching terms
-        matches = sum(1 for term in query_terms if term in text)
-
-        # Keywords that increase relevance
-        high_value_keywords = [
-            'greenwash', 'emission', 'carbon', 'climate', 'sustainability',
-            'corporate', 'esg', 'environmental', 'verification', 'disclosure'
-        ]
+        matched_terms = hits.get('query', {})
+        matches = sum(1 for term in query_terms if term in matched_terms)
 
-        bonus_matches = sum(1 for keyword in high_value_keywords if keyword in text)
+        bonus_matches = len(hits.get('bonus', {}))
 
         # Calculate score (0 to 1)
         base_score = matches / len(query_terms) if query_terms else 0
@@ -0,0 +1,620 @@
+"""
+EcoTrace storage sinks
+Batched writers for Elasticsearch, Neo4j and MongoDB shared by the storage
+pipelines, with the item routing every store agrees on
+"""
+
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque, namedtuple
+from datetime import datetime
+from elasticsearch import Elasticsearch, helpers
+from neo4j import GraphDatabase
+from pymongo import InsertOne, MongoClient, UpdateOne
+from ecotrace_crawler.mappings import MappingConflictError, index_mappings, mapping_conflicts
+from ecotrace_crawler.partitions import PARTITIONED_KINDS, ensure_partitioned, logical_index, partition_generation, write_index
+
+logger = logging.getLogger(__name__)
+
+# Item class -> (kind, id field). The kind names the ES index suffix and
+# the Mongo collection.
+ITEM_ROUTES = {
+    'CompanyItem': ('companies', 'company_id'),
+    'SustainabilityClaimItem': ('claims', 'claim_id'),
+    'RegulatoryDataItem': ('regulatory', 'record_id'),
+    'ScientificPublicationItem': ('publications', 'publication_id'),
+    'NewsArticleItem': ('news', 'article_id'),
+}
+
+KINDS = [kind for kind, _ in ITEM_ROUTES.values()]
+ID_FIELDS = {kind: id_field for kind, id_field in ITEM_ROUTES.values()}
+
+StorageRecord = namedtuple('StorageRecord', ['kind', 'doc_id', 'doc'])
+
+# Id fields checked, in order, to route records that lost their item class
+RECORD_ID_PRECEDENCE = [
+    ('claims', 'claim_id'),
+    ('regulatory', 'record_id'),
+    ('publications', 'publication_id'),
+    ('news', 'article_id'),
+    ('companies', 'company_id'),
+]
+
+# Mongo collection queueing documents for projection into ES and Neo4j
+OUTBOX_COLLECTION = 'outbox'
+
+# Kinds whose Elasticsearch documents keep when they were first stored in
+# first_seen_at, taken from this field of the first write. Re-crawls reset
+# extracted_at, so rollups count claims on first_seen_at.
+FIRST_SEEN_FIELDS = {'claims': 'extracted_at'}
+
+
+def route_item(item):
+    """(kind, id field) for an item, or None for unknown item types"""
+    return ITEM_ROUTES.get(item.__class__.__name__)
+
+
+def route_record(doc):
+    """(kind, id field) for an exported item dict, or None if unrecognised
+
+    Feed exports drop the item class, so records are routed by an explicit
+    item_type (the class name) when present, else by their most specific
+    id field - claims and regulatory records also carry company_id.
+    """
+    item_type = doc.get('item_type') or doc.get('_type')
+    if item_type:
+        return ITEM_ROUTES.get(item_type)
+    for kind, id_field in RECORD_ID_PRECEDENCE:
+        if doc.get(id_field):
+            return kind, id_field
+    return None
+
+
+def make_record(item, doc):
+    kind, id_field = route_item(item)
+    return StorageRecord(kind, doc.get(id_field), doc)
+
+
+class SinkError(Exception):
+    """Some records in a batch could not be written"""
+
+    def __init__(self, sink, failed):
+        self.sink = sink
+        self.failed = failed  # [(record, reason)]
+        super().__init__(f"{len(failed)} record(s) failed in {sink}: {failed[0][1] if failed else ''}")
+
+
+class SinkStats:
+    """Batch write latencies for one sink"""
+
+    def __init__(self, window=10000):
+        self.latencies = deque(maxlen=window)
+        self.batches = 0
+        self.docs = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, ms, docs, failed=False):
+        with self._lock:
+            self.latencies.append(ms)
+            self.batches += 1
+            self.docs += docs
+            if failed:
+                self.errors += 1
+
+    def summary(self):
+        with self._lock:
+            ordered = sorted(self.latencies)
+        if not ordered:
+            return {'batches': 0, 'docs': 0, 'errors': 0}
+
+        def pct(p):
+            return round(ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))], 1)
+
+        return {
+            'batches': self.batches,
+            'docs': self.docs,
+            'errors': self.errors,
+            'mean_ms': round(sum(ordered) / len(ordered), 1),
+            'p50_ms': pct(50),
+            'p95_ms': pct(95),
+            'max_ms': round(ordered[-1], 1),
+        }
+
+
+class Sink(ABC):
+    """A datastore the storage pipelines write batches of records to"""
+
+    name = None
+
+    @abstractmethod
+    def write_batch(self, records):
+        """Write records, raising SinkError for records that failed"""
+
+    def close(self):
+        pass
+
+
+class ElasticsearchSink(Sink):
+    name = 'elasticsearch'
+
+    def __init__(self, es, index_prefix='ecotrace'):
+        self.es = es
+        self.index_prefix = index_prefix
+        # Kinds stored in time partitions behind a write alias, and the
+        # partition each was last seen writing to
+        self.partitioned = set()
+        self.write_partitions = {}
+
+    @classmethod
+    def connect(cls, embedding_dims=384, ensure_indices=True):
+        es_host = os.getenv('ELASTICSEARCH_HOST', 'localhost')
+        es_port = int(os.getenv('ELASTICSEARCH_PORT', 9200))
+        sink = cls(Elasticsearch([f'http://{es_host}:{es_port}']))
+        if ensure_indices:
+            sink.ensure_indices(embedding_dims)
+        return sink
+
+    def index_name(self, kind):
+        return f'{self.index_prefix}_{kind}'
+
+    def ensure_indices(self, embedding_dims):
+        """Create indices if needed, adding newly mapped fields to old ones
+
+        For partitioned kinds only the partition being written is updated;
+        later ones get new fields from the index template. Raises
+        MappingConflictError when an index maps a field with another type,
+        rather than writing documents the old mapping indexes wrongly.
+        """
+        mappings = index_mappings(embedding_dims)
+
+        for kind in KINDS:
+            full_index = self.index_name(kind)
+            if kind in PARTITIONED_KINDS:
+                try:
+                    if ensure_partitioned(self.es, full_index, mappings.get(kind)) != 'index':
+                        self.partitioned.add(kind)
+                        full_index = write_index(self.es, full_index)
+                        self.write_partitions[kind] = full_index
+                except Exception as e:
+                    logger.warning(f"Could not set up partitions for {full_index}: {e}")
+
+            if not self.es.indices.exists(index=full_index):
+                self.es.indices.create(index=full_index, mappings=mappings.get(kind))
+                logger.info(f"Created Elasticsearch index: {full_index}")
+            elif kind in mappings:
+                conflicts = mapping_conflicts(self.es, full_index, mappings[kind]['properties'])
+                if conflicts:
+                    if kind in self.partitioned:
+                        command = 'partition_indices --rollover'
+                    elif kind in PARTITIONED_KINDS:
+                        command = 'partition_indices'
+                    else:
+                        command = 'remap_indices'
+                    raise MappingConflictError(full_index, conflicts, command)
+                try:
+                    self.es.indices.put_mapping(
+                        index=full_index,
+                        properties=mappings[kind]['properties']
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not update mapping for {full_index}: {e}")
+
+    def locate(self, kind, doc_ids, index=None):
+        """{id: partition} for the documents of a partitioned kind already stored
+
+        Writes through the alias go to the newest partition, so documents
+        stored in an older one are rewritten there instead of duplicated.
+        One ids search per batch; see follow_rollover() for documents it
+        cannot see yet.
+        """
+        doc_ids = list({doc_id for doc_id in doc_ids if doc_id})
+        if kind not in self.partitioned or not doc_ids:
+            return {}
+        response = self.es.search(
+            index=index or self.index_name(kind),
+            query={'ids': {'values': doc_ids}},
+            source=False,
+            size=len(doc_ids),
+        )
+        return {hit['_id']: hit['_index'] for hit in response['hits']['hits']}
+
+    def first_seen(self, kind, records):
+        """{id: first_seen_at} for a batch, kept from the stored documents
+
+        Documents stored before first_seen_at was kept count from their
+        previous extracted_at; new ones from the one being written.
+        """
+        field = FIRST_SEEN_FIELDS[kind]
+        first_seen = {record.doc_id: record.doc.get(field) for record in records if record.doc_id}
+        if not first_seen:
+            return {}
+        response = self.es.mget(
+            index=self.index_name(kind),
+            ids=list(first_seen),
+            source=['first_seen_at', field],
+        )
+        for doc in response['docs']:
+            stored = doc.get('_source') or {}
+            if doc.get('found') and (stored.get('first_seen_at') or stored.get(field)):
+                first_seen[doc['_id']] = stored.get('first_seen_at') or stored[field]
+        return first_seen
+
+    def write_batch(self, records):
+        locations = {}
+        for kind in self.partitioned:
+            ids = [record.doc_id for record in records if record.kind == kind]
+            locations[kind] = self.locate(kind, ids) if ids else {}
+
+        first_seen = {}
+        for kind in FIRST_SEEN_FIELDS:
+            kind_records = [record for record in records if record.kind == kind]
+            first_seen[kind] = self.first_seen(kind, kind_records) if kind_records else {}
+
+        actions = []
+        for record in records:
+            source = record.doc
+            if record.doc_id in first_seen.get(record.kind, {}):
+                # A copy - the other sinks write the same record concurrently
+                source = {**record.doc, 'first_seen_at': first_seen[record.kind][record.doc_id]}
+            actions.append({
+                '_index': locations.get(record.kind, {}).get(record.doc_id) or self.index_name(record.kind),
+                '_id': record.doc_id,
+                '_source': source,
+            })
+        errors = []
+        written = {}
+        for ok, item in helpers.streaming_bulk(self.es, actions, raise_on_error=False, raise_on_exception=True):
+            detail = next(iter(item.values()))
+            if not ok:
+                errors.append(item)
+            elif self.partitioned:
+                written.setdefault(detail.get('_index'), []).append(detail.get('_id'))
+        self.follow_rollover(written)
+
+        if errors:
+            failed_ids = {}
+            kept = 0
+            for error in errors:
+                detail = next(iter(error.values()))
+                if (detail.get('error') or {}).get('type') == 'cluster_block_exception':
+                    # Partitions ILM made read-only keep documents as first stored
+                    kept += 1
+                    continue
+                failed_ids[(logical_index(detail.get('_index')), detail.get('_id'))] = str(detail.get('error'))
+            if kept:
+                logger.info(f"Kept {kept} document(s) already stored in read-only partitions")
+            if not failed_ids:
+                return
+            raise SinkError(self.name, [
+                (record, failed_ids[(self.index_name(record.kind), record.doc_id)])
+                for record in records
+                if (self.index_name(record.kind), record.doc_id) in failed_ids
+            ])
+
+    def follow_rollover(self, written):
+        """Catch up with a rollover seen in the partitions a batch was written to
+
+        locate() searches, so documents written to the previous partition
+        shortly before the rollover may not have been visible to it yet and
+        were written again to the new one. The previous partition is
+        refreshed, so later searches find what it holds, and its copies of
+        the documents just written to the new one are deleted.
+        """
+        for kind in self.partitioned:
+            previous = self.write_partitions.get(kind)
+            newer = [
+                index for index in written
+                if logical_index(index) == self.index_name(kind)
+                and (previous is None or partition_generation(index) > partition_generation(previous))
+            ]
+            if not newer:
+                continue
+            current = max(newer, key=partition_generation)
+            self.write_partitions[kind] = current
+            if previous is None:
+                continue
+
+            logger.info(f"{self.index_name(kind)} rolled over from {previous} to {current}")
+            self.es.indices.refresh(index=previous)
+            ids = [doc_id for index in newer for doc_id in written[index]]
+            stale = [
+                doc_id for doc_id, index in self.locate(kind, ids, index=previous).items()
+                if index == previous
+            ]
+            if stale:
+                helpers.bulk(self.es, [
+                    {'_op_type': 'delete', '_index': previous, '_id': doc_id} for doc_id in stale
+                ], raise_on_error=False)
+                logger.info(f"Removed {len(stale)} copies left in {previous} by the rollover")
+
+    def delete_batch(self, kind, doc_ids):
+        """Delete documents, ignoring ones that are already gone"""
+        if kind in self.partitioned:
+            # Deletes through the alias only reach the newest partition
+            locations = self.locate(kind, doc_ids)
+            actions = [
+                {'_op_type': 'delete', '_index': index, '_id': doc_id}
+                for doc_id, index in locations.items()
+            ]
+        else:
+            actions = [
+                {'_op_type': 'delete', '_index': self.index_name(kind), '_id': doc_id}
+                for doc_id in doc_ids
+            ]
+        _, errors = helpers.bulk(self.es, actions, raise_on_error=False, raise_on_exception=True)
+        errors = [error for error in errors if error['delete'].get('status') != 404]
+        if errors:
+            raise RuntimeError(f"{len(errors)} delete(s) failed in {self.index_name(kind)}: {errors[0]}")
+
+    def close(self):
+        self.es.close()
+
+
+def mention_list(value):
+    """Company names from a mentions field, skipping blanks"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    return [name for name in value if name]
+
+
+class Neo4jSink(Sink):
+    """Writes the knowledge graph with one UNWIND query per kind and batch
+
+    Nodes and relationships are MERGEd, so replaying a record is harmless.
+    """
+
+    name = 'neo4j'
+
+    QUERIES = {
+        'companies': """
+            UNWIND $rows AS row
+            MERGE (c:Company {company_id: row.company_id})
+            SET c.name = row.name,
+                c.website = row.website,
+                c.industry = row.industry,
+                c.updated_at = row.crawled_at
+        """,
+        'claims': """
+            UNWIND $rows AS row
+            MERGE (c:Company {company_id: row.company_id})
+            MERGE (cl:Claim {claim_id: row.claim_id})
+            SET cl.claim_text = row.claim_text,
+                cl.claim_type = row.claim_type,
+                cl.source_type = row.source_type,
+                cl.source_url = row.source_url,
+                cl.extracted_at = row.extracted_at
+            MERGE (c)-[:MAKES_CLAIM]->(cl)
+        """,
+        'publications': """
+            UNWIND $rows AS row
+            MERGE (p:Publication {publication_id: row.publication_id})
+            SET p.title = row.title,
+                p.journal = row.journal,
+                p.url = row.url,
+                p.published_date = row.publication_date
+            WITH p, row
+            UNWIND row.mentions AS company_name
+            MERGE (c:Company {name: company_name})
+            MERGE (p)-[:MENTIONS]->(c)
+        """,
+        'news': """
+            UNWIND $rows AS row
+            MERGE (n:NewsArticle {article_id: row.article_id})
+            SET n.title = row.title,
+                n.source = row.source,
+                n.url = row.url,
+                n.published_date = row.published_date,
+                n.sentiment = row.sentiment
+            WITH n, row
+            UNWIND row.mentions AS company_name
+            MERGE (c:Company {name: company_name})
+            MERGE (n)-[:MENTIONS]->(c)
+        """,
+    }
+
+    # Fields each kind's query reads
+    FIELDS = {
+        'companies': ['company_id', 'name', 'website', 'industry', 'crawled_at'],
+        'claims': ['company_id', 'claim_id', 'claim_text', 'claim_type', 'source_type',
+                   'source_url', 'extracted_at'],
+        'publications': ['publication_id', 'title', 'journal', 'url', 'publication_date'],
+        'news': ['article_id', 'title', 'source', 'url', 'published_date', 'sentiment'],
+    }
+
+    MENTION_FIELDS = {'publications': 'related_companies', 'news': 'company_mentions'}
+
+    LABELS = {
+        'companies': 'Company',
+        'claims': 'Claim',
+        'publications': 'Publication',
+        'news': 'NewsArticle',
+    }
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    @classmethod
+    def connect(cls):
+        uri = os.getenv('NEO4J_URI', 'bolt://localhost:7687')
+        user = os.getenv('NEO4J_USER', 'neo4j')
+        password = os.getenv('NEO4J_PASSWORD', 'changeme')
+        sink = cls(GraphDatabase.driver(uri, auth=(user, password)))
+        sink.ensure_constraints()
+        return sink
+
+    def ensure_constraints(self):
+        with self.driver.session() as session:
+            session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (c:Company) REQUIRE c.company_id IS UNIQUE")
+            session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (cl:Claim) REQUIRE cl.claim_id IS UNIQUE")
+            session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (p:Publication) REQUIRE p.publication_id IS UNIQUE")
+            session.run("CREATE CONSTRAINT IF NOT EXISTS FOR (n:NewsArticle) REQUIRE n.article_id IS UNIQUE")
+
+    def row(self, record):
+        row = {field: record.doc.get(field) for field in self.FIELDS[record.kind]}
+        if record.kind in self.MENTION_FIELDS:
+            row['mentions'] = mention_list(record.doc.get(self.MENTION_FIELDS[record.kind]))
+        return row
+
+    def write_batch(self, records):
+        by_kind = {}
+        for record in records:
+            if record.kind in self.QUERIES:
+                by_kind.setdefault(record.kind, []).append(record)
+
+        failed = []
+        with self.driver.session() as session:
+            for kind, kind_records in by_kind.items():
+                try:
+                    session.execute_write(
+                        lambda tx: tx.run(self.QUERIES[kind], rows=[self.row(r) for r in kind_records]).consume()
+                    )
+                except Exception as e:
+                    failed.extend((record, str(e)) for record in kind_records)
+
+        if failed:
+            raise SinkError(self.name, failed)
+
+    def delete_batch(self, kind, doc_ids):
+        """Detach and delete nodes by id"""
+        query = f"""
+            UNWIND $ids AS doc_id
+            MATCH (n:{self.LABELS[kind]} {{{ID_FIELDS[kind]}: doc_id}})
+            DETACH DELETE n
+        """
+        with self.driver.session() as session:
+            session.execute_write(lambda tx: tx.run(query, ids=list(doc_ids)).consume())
+
+    def close(self):
+        self.driver.close()
+
+
+class MongoSink(Sink):
+    """Upserts raw documents into one collection per kind
+
+    With outbox=True every written document is also queued in the outbox
+    collection, from which OutboxProjector builds Elasticsearch and Neo4j.
+    """
+
+    name = 'mongodb'
+
+    def __init__(self, client, db_name='ecotrace', outbox=False):
+        self.client = client
+        self.db = client[db_name]
+        self.outbox = outbox
+
+    @classmethod
+    def connect(cls, outbox=False):
+        mongo_uri = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
+        sink = cls(MongoClient(mongo_uri), os.getenv('MONGODB_DB', 'ecotrace'), outbox=outbox)
+        sink.ensure_indexes()
+        return sink
+
+    def ensure_indexes(self):
+        """Index the id fields that upserts and lookups filter on"""
+        for kind, id_field in ID_FIELDS.items():
+            self.db[kind].create_index(id_field)
+
+    def find(self, kind, doc_ids):
+        """{id: stored document} for the ids that exist"""
+        id_field = ID_FIELDS[kind]
+        return {
+            doc[id_field]: doc
+            for doc in self.db[kind].find({id_field: {'$in': list(doc_ids)}}, {'_id': 0})
+        }
+
+    def write_batch(self, records):
+        by_kind = {}
+        for record in records:
+            by_kind.setdefault(record.kind, []).append(record)
+
+        failed = []
+        written = []
+        for kind, kind_records in by_kind.items():
+            id_field = ID_FIELDS[kind]
+            operations = [
+                UpdateOne({id_field: record.doc_id}, {'$set': record.doc}, upsert=True)
+                if record.doc_id else InsertOne(dict(record.doc))
+                for record in kind_records
+            ]
+            try:
+                self.db[kind].bulk_write(operations, ordered=False)
+                written.extend(kind_records)
+            except Exception as e:
+                # BulkWriteError lists the failed operations by index
+                write_errors = getattr(e, 'details', None) or {}
+                indexes = {error['index']: error.get('errmsg') for error in write_errors.get('writeErrors', [])}
+                if indexes:
+                    failed.extend((kind_records[i], reason) for i, reason in indexes.items())
+                    written.extend(record for i, record in enumerate(kind_records) if i not in indexes)
+                else:
+                    failed.extend((record, str(e)) for record in kind_records)
+
+        if self.outbox and written:
+            try:
+                self.db[OUTBOX_COLLECTION].insert_many(
+                    [outbox_entry(record) for record in written], ordered=False
+                )
+            except Exception as e:
+                # Replaying the record rewrites the document and its outbox entry
+                failed.extend((record, f"outbox: {e}") for record in written)
+
+        if failed:
+            raise SinkError(self.name, failed)
+
+    def close(self):
+        self.client.close()
+
+
+def outbox_entry(record):
+    entry = {'kind': record.kind, 'doc_id': record.doc_id, 'created_at': datetime.utcnow()}
+    if not record.doc_id:
+        # Nothing to look the document up by - carry it in the entry
+        entry['doc'] = record.doc
+    return entry
+
+
+SINKS = {
+    'elasticsearch': ElasticsearchSink,
+    'neo4j': Neo4jSink,
+    'mongodb': MongoSink,
+}
+
+
+def connect_sink(name, embedding_dims=384, outbox=False, ensure_indices=True):
+    """Connect a sink by name, returning None if the datastore is unreachable
+
+    Mapping conflicts are raised - writing on would index fields wrongly.
+    """
+    try:
+        if name == 'elasticsearch':
+            sink = ElasticsearchSink.connect(embedding_dims, ensure_indices)
+        elif name == 'mongodb':
+            sink = MongoSink.connect(outbox=outbox)
+        else:
+            sink = SINKS[name].connect()
+        logger.info(f"Connected to {name}")
+        return sink
+    except MappingConflictError:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to connect to {name}: {e}")
+        return None
+
+
+def timed_write(sink, stats, records):
+    """Write a batch on the caller's thread, recording its latency"""
+    start = time.perf_counter()
+    failed = False
+    try:
+        sink.write_batch(records)
+    except Exception:
+        failed = True
+        raise
+    finally:
+        stats.record((time.perf_counter() - start) * 1000, len(records), failed)
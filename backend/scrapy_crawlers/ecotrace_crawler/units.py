@@ -0,0 +1,182 @@
+"""
+Quantity and unit normalisation
+Turns extracted quantities like "1,200 million tons" or "42%" into a
+numeric value in a canonical unit, so claims and regulatory records can be
+range-filtered and aggregated by magnitude.
+"""
+
+import re
+
+# Scale words -> multiplier
+MULTIPLIERS = {
+    'thousand': 1e3,
+    'k': 1e3,
+    'million': 1e6,
+    'mn': 1e6,
+    'billion': 1e9,
+    'bn': 1e9,
+}
+
+# Unit spelling (lower case, spaces collapsed) -> (canonical unit, factor).
+# "tons" are US short tons, as in SEC and EPA filings; "tonnes" and
+# "metric tons" are metric.
+UNIT_CONVERSIONS = {
+    # Greenhouse gases
+    'tco2e': ('tCO2e', 1.0),
+    'tco2': ('tCO2e', 1.0),
+    'ktco2e': ('tCO2e', 1e3),
+    'mtco2e': ('tCO2e', 1e6),
+    'kg co2e': ('tCO2e', 1e-3),
+    # Mass
+    'tonnes': ('tonnes', 1.0),
+    'tonne': ('tonnes', 1.0),
+    'metric tons': ('tonnes', 1.0),
+    'metric ton': ('tonnes', 1.0),
+    'tons': ('tonnes', 0.907185),
+    'ton': ('tonnes', 0.907185),
+    'kt': ('tonnes', 1e3),
+    'kg': ('tonnes', 1e-3),
+    'pounds': ('tonnes', 0.000453592),
+    'lbs': ('tonnes', 0.000453592),
+    # Power
+    'kw': ('MW', 1e-3),
+    'mw': ('MW', 1.0),
+    'gw': ('MW', 1e3),
+    # Energy
+    'kwh': ('MWh', 1e-3),
+    'mwh': ('MWh', 1.0),
+    'gwh': ('MWh', 1e3),
+    'twh': ('MWh', 1e6),
+    # Water
+    'm3': ('m3', 1.0),
+    'cubic meters': ('m3', 1.0),
+    'cubic metres': ('m3', 1.0),
+    'liters': ('m3', 1e-3),
+    'litres': ('m3', 1e-3),
+    'megaliters': ('m3', 1e3),
+    'megalitres': ('m3', 1e3),
+    'gallons': ('m3', 0.00378541),
+    # Shares and money
+    '%': ('percent', 1.0),
+    'percent': ('percent', 1.0),
+    'per cent': ('percent', 1.0),
+    'pct': ('percent', 1.0),
+    'usd': ('USD', 1.0),
+    'dollars': ('USD', 1.0),
+    '$': ('USD', 1.0),
+}
+
+# Item kind -> (value field, unit field, context field) holding its quantity
+QUANTITY_FIELDS = {
+    'claims': ('numerical_value', 'unit', 'claim_text'),
+    'regulatory': ('value', 'unit', None),
+}
+
+# Mass units followed by one of these are greenhouse gas quantities
+GHG_QUALIFIER = re.compile(r'^\s*(?:of\s+)?(?:co2e?|co₂e?|carbon dioxide|ghg|greenhouse gas|carbon)\b', re.I)
+
+_unit_alternatives = '|'.join(
+    re.escape(unit) for unit in sorted(UNIT_CONVERSIONS, key=len, reverse=True) if unit != '$'
+)
+_multiplier_alternatives = '|'.join(sorted(MULTIPLIERS, key=len, reverse=True))
+
+QUANTITY_PATTERN = re.compile(
+    r'(?P<currency>\$)?\s*'
+    r'(?P<number>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)'
+    rf'(?:\s*(?P<multiplier>{_multiplier_alternatives})\b)?'
+    rf'(?:\s*(?P<unit>{_unit_alternatives})(?![a-z0-9]))?',
+    re.I
+)
+
+
+def canonical_unit(unit, following=''):
+    """(canonical unit, factor) for a unit spelling, or None if unknown"""
+    key = re.sub(r'\s+', ' ', unit.strip().lower())
+    if key not in UNIT_CONVERSIONS:
+        return None
+    canonical, factor = UNIT_CONVERSIONS[key]
+    if canonical == 'tonnes' and GHG_QUALIFIER.match(following):
+        canonical = 'tCO2e'
+    return canonical, factor
+
+
+def quantities(text):
+    """(number, scale, value, canonical unit) for every quantity in text
+
+    number is as written, scale the multiplier of its scale word (1 without
+    one) and value the number scaled and converted; the unit is None for
+    bare numbers.
+    """
+    for match in QUANTITY_PATTERN.finditer(text):
+        number = float(match.group('number').replace(',', ''))
+        scale = MULTIPLIERS[match.group('multiplier').lower()] if match.group('multiplier') else 1.0
+        value = number * scale
+
+        unit = None
+        if match.group('unit'):
+            unit, factor = canonical_unit(match.group('unit'), text[match.end():])
+            value *= factor
+        elif match.group('currency'):
+            unit = 'USD'
+        yield number, scale, value, unit
+
+
+def parse_quantity(text, require_unit=False):
+    """(value, canonical unit) for the first quantity in text
+
+    Returns None if there is no number, or if require_unit is set and no
+    number in the text carries a known unit. The unit is None for bare
+    numbers.
+    """
+    if not text:
+        return None
+
+    for _, _, value, unit in quantities(str(text)):
+        if unit or not require_unit:
+            return value, unit
+    return None
+
+
+def normalize_quantity(value, unit=None, context=None):
+    """(value, canonical unit) for a stored value and its unit field
+
+    value may already carry its unit ("1,200 million tons"); otherwise the
+    unit field is appended. A bare number takes its unit (and scale) from
+    the same number in context, e.g. 42 in "cut emissions by 42% by 2030".
+    Falls back to the first quantity with a known unit in context (e.g.
+    the claim text).
+    """
+    found = None
+    if value not in (None, ''):
+        text = str(value)
+        if unit and not re.search(r'[a-z%$]', text, re.I):
+            # Unit fields may be identifiers like "metric_tons_co2e"
+            text = f"{text} {unit.replace('_', ' ')}"
+        found = next(quantities(text), None)
+        if found and (found[3] or not context):
+            return found[2], found[3]
+
+    if context:
+        if found:
+            number, scale, parsed_value, _ = found
+            # Numbers are compared as written; a scale word on the value must match the context's
+            for context_number, context_scale, context_value, context_unit in quantities(str(context)):
+                if context_unit and context_number == number and scale in (1.0, context_scale):
+                    return context_value, context_unit
+            return parsed_value, None
+        return parse_quantity(context, require_unit=True)
+    return None
+
+
+def normalized_fields(kind, doc):
+    """normalized_value/normalized_unit for a document of a kind with quantities"""
+    value_field, unit_field, context_field = QUANTITY_FIELDS[kind]
+    quantity = normalize_quantity(
+        doc.get(value_field),
+        doc.get(unit_field),
+        doc.get(context_field) if context_field else None
+    )
+    if not quantity:
+        return {'normalized_value': None, 'normalized_unit': None}
+    value, unit = quantity
+    return {'normalized_value': round(value, 6), 'normalized_unit': unit}
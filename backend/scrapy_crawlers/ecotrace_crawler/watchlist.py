@@ -0,0 +1,330 @@
+"""
+EcoTrace watchlist alerts
+Saved searches are stored as percolator queries (created through
+/api/watchlist). Crawled records are percolated against all of them in one
+request per batch, instead of every saved search being re-run by polling;
+new matches are recorded, then pushed to the watch's webhook from a
+background thread so slow webhooks never hold back the crawl.
+"""
+
+import ipaddress
+import logging
+import queue
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+from elasticsearch import helpers
+
+try:
+    import requests
+    REQUESTS_AVAILABLE = True
+except ImportError:
+    REQUESTS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+WATCHLIST_INDEX = 'watchlist'
+MATCHES_INDEX = 'watch_matches'
+
+# Kinds saved searches can watch
+WATCH_KINDS = ['claims', 'news', 'publications', 'regulatory']
+
+MATCHES_MAPPING = {
+    'properties': {
+        'watch_id': {'type': 'keyword'},
+        'kind': {'type': 'keyword'},
+        'doc_id': {'type': 'keyword'},
+        'title': {'type': 'text'},
+        'url': {'type': 'keyword'},
+        'company': {'type': 'keyword'},
+        'matched_at': {'type': 'date'},
+        'delivered': {'type': 'boolean'},
+    }
+}
+
+
+def is_public_url(url):
+    """Whether url is http(s) and its host resolves only to publicly routable addresses
+
+    Checked right before each push: a host may resolve differently than
+    when the watch was created.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return False
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, None)}
+    except (socket.gaierror, UnicodeError):
+        return False
+    return bool(addresses) and all(ipaddress.ip_address(address.split('%')[0]).is_global for address in addresses)
+
+
+def match_summary(record):
+    """Title, link and companies of a matched record"""
+    doc = record.doc
+    title = doc.get('title') or doc.get('claim_text') or doc.get('metric') or ''
+    company = doc.get('company_name') or doc.get('company_mentions') or doc.get('related_companies')
+    return {
+        'title': title[:300],
+        'url': doc.get('url') or doc.get('source_url'),
+        'company': company,
+    }
+
+
+class Watchlist:
+    """Percolates batches of records against the saved searches"""
+
+    # Seconds the percolator index's field list is reused before re-reading it
+    FIELDS_TTL = 60.0
+
+    def __init__(self, es, index_prefix='ecotrace', max_watches=1000, push_timeout=5.0):
+        self.es = es
+        self.index_prefix = index_prefix
+        self.max_watches = max_watches
+        self.push_timeout = push_timeout
+        self._fields = None
+        self._fields_read = 0.0
+
+    @property
+    def index(self):
+        return f'{self.index_prefix}_{WATCHLIST_INDEX}'
+
+    @property
+    def matches_index(self):
+        return f'{self.index_prefix}_{MATCHES_INDEX}'
+
+    def ensure_index(self):
+        if not self.es.indices.exists(index=self.matches_index):
+            self.es.indices.create(index=self.matches_index, mappings=MATCHES_MAPPING)
+            logger.info(f"Created Elasticsearch index: {self.matches_index}")
+
+    def fields(self):
+        """Top-level document fields the saved searches are mapped on, or None without watches
+
+        Only a field list is cached; until the first watch creates the index
+        it is looked for again on every batch.
+        """
+        now = time.monotonic()
+        if self._fields is None or now - self._fields_read >= self.FIELDS_TTL:
+            try:
+                mapping = self.es.indices.get_mapping(index=self.index)
+                properties = next(iter(mapping.values()))['mappings'].get('properties', {})
+                self._fields = set(properties) - {'query', 'watch'}
+                self._fields_read = now
+            except Exception:
+                self._fields = None
+        return self._fields
+
+    def percolate(self, records):
+        """[(watch id, watch, record)] for every saved search matching a record"""
+        fields = self.fields()
+        if not fields or not records:
+            return []
+
+        # Only fields queries can refer to are sent; embeddings and the like are dropped
+        documents = [
+            {**{key: value for key, value in record.doc.items() if key in fields}, 'doc_kind': record.kind}
+            for record in records
+        ]
+        response = self.es.search(
+            index=self.index,
+            query={'percolate': {'field': 'query', 'documents': documents}},
+            size=self.max_watches,
+            source=['watch'],
+        )
+
+        hits = response['hits']['hits']
+        if response['hits']['total']['value'] > len(hits):
+            logger.warning(f"More than {self.max_watches} saved searches matched one batch - some were skipped")
+
+        matches = []
+        for hit in hits:
+            watch = hit['_source'].get('watch', {})
+            for slot in hit.get('fields', {}).get('_percolator_document_slot', [0]):
+                matches.append((hit['_id'], watch, records[slot]))
+        return matches
+
+    def record(self, matches):
+        """Store matches, returning the ones not seen before"""
+        matched_at = datetime.utcnow().isoformat()
+        actions = []
+        watches = []
+        seen = set()
+        for watch_id, watch, record in matches:
+            match_id = f'{watch_id}:{record.kind}:{record.doc_id}'
+            if match_id in seen:
+                continue
+            seen.add(match_id)
+            watches.append(watch)
+            actions.append({
+                '_op_type': 'create',
+                '_index': self.matches_index,
+                '_id': match_id,
+                '_source': {
+                    'watch_id': watch_id,
+                    'kind': record.kind,
+                    'doc_id': record.doc_id,
+                    **match_summary(record),
+                    'matched_at': matched_at,
+                    'delivered': False,
+                },
+            })
+
+        _, errors = helpers.bulk(self.es, actions, raise_on_error=False, raise_on_exception=True)
+        # A conflict means the record matched this watch on an earlier crawl
+        existing = {error['create']['_id'] for error in errors if error['create'].get('status') == 409}
+        failed = [error for error in errors if error['create'].get('status') != 409]
+        if failed:
+            logger.error(f"Could not record {len(failed)} watch match(es): {failed[0]}")
+            existing |= {error['create']['_id'] for error in failed}
+
+        return [
+            (action['_id'], watch, action['_source'])
+            for action, watch in zip(actions, watches)
+            if action['_id'] not in existing
+        ]
+
+    def undelivered(self, older_than, max_age, limit=500):
+        """[(match id, watch, match)] still undelivered, matched between max_age and older_than seconds ago"""
+        now = datetime.utcnow()
+        response = self.es.search(
+            index=self.matches_index,
+            query={'bool': {'filter': [
+                {'term': {'delivered': False}},
+                {'range': {'matched_at': {
+                    'gte': (now - timedelta(seconds=max_age)).isoformat(),
+                    'lt': (now - timedelta(seconds=older_than)).isoformat(),
+                }}},
+            ]}},
+            size=limit,
+            sort=[{'matched_at': {'order': 'asc'}}],
+        )
+        hits = response['hits']['hits']
+        if not hits:
+            return []
+
+        watch_ids = sorted({hit['_source']['watch_id'] for hit in hits})
+        found = self.es.mget(index=self.index, ids=watch_ids, source=['watch'])['docs']
+        watches = {doc['_id']: doc['_source'].get('watch', {}) for doc in found if doc.get('found')}
+        return [
+            (hit['_id'], watches[hit['_source']['watch_id']], hit['_source'])
+            for hit in hits
+            if hit['_source']['watch_id'] in watches
+        ]
+
+    def push(self, new_matches):
+        """POST new matches to each watch's webhook, returning how many were delivered"""
+        if not REQUESTS_AVAILABLE:
+            return 0
+
+        by_watch = {}
+        for match_id, watch, match in new_matches:
+            if watch.get('webhook_url'):
+                by_watch.setdefault(match['watch_id'], (watch, []))[1].append((match_id, match))
+
+        delivered = []
+        for watch_id, (watch, matches) in by_watch.items():
+            if not is_public_url(watch['webhook_url']):
+                logger.warning(f"Not pushing {len(matches)} match(es) for watch {watch_id}: webhook is not a public host")
+                continue
+            try:
+                response = requests.post(
+                    watch['webhook_url'],
+                    json={
+                        'watch_id': watch_id,
+                        'name': watch.get('name'),
+                        'matches': [match for _, match in matches],
+                    },
+                    timeout=self.push_timeout,
+                    # A redirect could point anywhere, including private hosts
+                    allow_redirects=False,
+                )
+                response.raise_for_status()
+                if response.is_redirect:
+                    raise ValueError(f"webhook redirected to {response.headers.get('location')}")
+                delivered.extend(match_id for match_id, _ in matches)
+            except Exception as e:
+                logger.warning(f"Could not push {len(matches)} match(es) for watch {watch_id}: {e}")
+
+        if delivered:
+            helpers.bulk(self.es, [
+                {'_op_type': 'update', '_index': self.matches_index, '_id': match_id, 'doc': {'delivered': True}}
+                for match_id in delivered
+            ])
+        return len(delivered)
+
+    def process(self, records):
+        """Percolate and record a batch, returning (matched count, new matches)"""
+        records = [record for record in records if record.kind in WATCH_KINDS and record.doc_id]
+        matches = self.percolate(records)
+        if not matches:
+            return 0, []
+
+        new_matches = self.record(matches)
+        if new_matches:
+            logger.info(f"Watchlist: {len(new_matches)} new match(es)")
+        return len(matches), new_matches
+
+
+class WebhookPusher:
+    """Pushes new matches to their webhooks from a background thread
+
+    Batches wait in a bounded queue. Batches that do not fit, and pushes
+    that fail, stay undelivered in the matches index; every retry_interval
+    seconds those older than the interval (and younger than retry_max_age)
+    are pushed again, including ones left by earlier crawls. Delivery is
+    at least once.
+    """
+
+    def __init__(self, watchlist, queue_size=100, retry_interval=300.0, retry_max_age=86400.0):
+        self.watchlist = watchlist
+        self.retry_interval = retry_interval
+        self.retry_max_age = retry_max_age
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stopping = threading.Event()
+        self.thread = None
+        self.delivered = 0
+        self.deferred = 0
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name='watchlist-push', daemon=True)
+        self.thread.start()
+
+    def submit(self, new_matches):
+        """Queue matches without waiting; a full queue leaves them to the retry sweep"""
+        try:
+            self.queue.put_nowait(new_matches)
+        except queue.Full:
+            self.deferred += len(new_matches)
+
+    def run(self):
+        next_retry = time.monotonic()
+        while not (self.stopping.is_set() and self.queue.empty()):
+            if not self.stopping.is_set() and time.monotonic() >= next_retry:
+                self.retry()
+                next_retry = time.monotonic() + self.retry_interval
+            try:
+                self.push(self.queue.get(timeout=0.5))
+            except queue.Empty:
+                pass
+
+    def retry(self):
+        try:
+            self.push(self.watchlist.undelivered(self.retry_interval, self.retry_max_age))
+        except Exception as e:
+            logger.error(f"Could not read undelivered watch matches: {e}")
+
+    def push(self, new_matches):
+        try:
+            if new_matches:
+                self.delivered += self.watchlist.push(new_matches)
+        except Exception as e:
+            logger.error(f"Watchlist push failed: {e}")
+
+    def close(self, timeout=None):
+        """Push what is queued, waiting at most timeout seconds; the rest is retried later"""
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
@@ -0,0 +1,14 @@
+"""
+Shared pytest setup
+Makes the API package (backend/) and the crawler package
+(backend/scrapy_crawlers/) importable without installing either.
+"""
+
+import os
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (BACKEND, os.path.join(BACKEND, 'scrapy_crawlers')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
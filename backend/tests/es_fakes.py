@@ -0,0 +1,212 @@
+"""
+In-memory stand-in for the Elasticsearch calls the crawler makes
+Indices are dicts of {id: source}; an alias lists its indices, the last
+being its write index. Searches are visible at once unless hide_unrefreshed
+is set, when documents written since an index's last refresh are not.
+Queries cover match_all, term(s), ids, exists, range (ISO strings, with
+||/d day rounding) and bool; composite aggregations cover terms and daily
+date_histogram sources. Bulk creates of existing ids fail with a 409.
+patch_bulk() routes elasticsearch.helpers bulk writes to the fake.
+"""
+
+import itertools
+
+
+def field_values(source, field):
+    value = source.get(field.removesuffix('.keyword'))
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def in_range(value, bounds):
+    for op, bound in bounds.items():
+        if isinstance(bound, str) and bound.endswith('||/d'):
+            value, bound = str(value)[:10], bound[:-4][:10]
+        if not {'gte': value >= bound, 'gt': value > bound, 'lte': value <= bound, 'lt': value < bound}[op]:
+            return False
+    return True
+
+
+def matches(doc_id, source, query):
+    (kind, spec), = query.items()
+    if kind == 'match_all':
+        return True
+    if kind == 'ids':
+        return doc_id in spec['values']
+    if kind == 'exists':
+        return bool(field_values(source, spec['field']))
+    if kind == 'term':
+        (field, value), = spec.items()
+        return value in field_values(source, field)
+    if kind == 'terms':
+        (field, values), = spec.items()
+        return bool(set(field_values(source, field)) & set(values))
+    if kind == 'range':
+        (field, bounds), = spec.items()
+        return any(in_range(value, bounds) for value in field_values(source, field))
+    if kind == 'bool':
+        clauses = lambda name: spec.get(name, [])
+        listed = lambda name: clauses(name) if isinstance(clauses(name), list) else [clauses(name)]
+        if not all(matches(doc_id, source, q) for q in listed('filter') + listed('must')):
+            return False
+        if any(matches(doc_id, source, q) for q in listed('must_not')):
+            return False
+        should = listed('should')
+        needed = spec.get('minimum_should_match', 1 if should and not (listed('filter') or listed('must')) else 0)
+        return sum(matches(doc_id, source, q) for q in should) >= needed
+    raise NotImplementedError(kind)
+
+
+def source_keys(source, spec):
+    (kind, options), = spec.items()
+    values = field_values(source, options['field'])
+    if kind == 'date_histogram':
+        values = [str(value)[:10] for value in values]
+    if not values and options.get('missing_bucket'):
+        values = [None]
+    return values
+
+
+class Indices:
+    def __init__(self, es):
+        self.es = es
+        self.refreshes = []
+
+    def exists(self, index):
+        return index in self.es.data
+
+    def create(self, index, mappings=None, **kwargs):
+        self.es.data.setdefault(index, {})
+        self.es.mappings[index] = mappings or {}
+
+    def get_mapping(self, index):
+        if index not in self.es.mappings:
+            raise KeyError(index)
+        return {index: {'mappings': self.es.mappings[index]}}
+
+    def refresh(self, index, **kwargs):
+        self.refreshes.append(index)
+        self.es.unrefreshed.pop(index, None)
+
+    def rollover(self, alias):
+        current = self.es.aliases[alias][-1]
+        new_index = f'{alias}-{int(current[-6:]) + 1:06d}'
+        self.es.aliases[alias].append(new_index)
+        self.es.data[new_index] = {}
+        return {'new_index': new_index}
+
+
+class FakeElasticsearch:
+    def __init__(self, hide_unrefreshed=False):
+        self.data = {}
+        self.aliases = {}
+        self.mappings = {}
+        self.unrefreshed = {}
+        self.hide_unrefreshed = hide_unrefreshed
+        self.indices = Indices(self)
+        self.calls = []
+
+    def docs(self, index):
+        """Documents of an index, or of every index behind an alias"""
+        if index in self.aliases:
+            return {doc_id: source for name in self.aliases[index] for doc_id, source in self.docs(name).items()}
+        return self.data.get(index, {})
+
+    def searchable(self, index):
+        """[(index, id, source)] a search of an index or alias can see"""
+        names = self.aliases.get(index, [index])
+        return [
+            (name, doc_id, source)
+            for name in names
+            for doc_id, source in self.data.get(name, {}).items()
+            if not (self.hide_unrefreshed and doc_id in self.unrefreshed.get(name, set()))
+        ]
+
+    def streaming_bulk(self, actions):
+        """Apply bulk actions, yielding (ok, item) like helpers.streaming_bulk"""
+        for action in actions:
+            op = action.get('_op_type', 'index')
+            name = action['_index']
+            if name in self.aliases:
+                name = self.aliases[name][-1]
+            index = self.data.setdefault(name, {})
+            doc_id = action.get('_id') or str(next(_auto_ids))
+            if op == 'create' and doc_id in index:
+                yield False, {op: {'_index': name, '_id': doc_id, 'status': 409}}
+                continue
+            if op == 'delete':
+                index.pop(doc_id, None)
+            elif op == 'update':
+                index.setdefault(doc_id, {}).update(action['doc'])
+            else:
+                index[doc_id] = dict(action['_source'])
+                self.unrefreshed.setdefault(name, set()).add(doc_id)
+            yield True, {op: {'_index': name, '_id': doc_id}}
+
+    def bulk(self, actions):
+        """Apply bulk actions, returning (successes, errors) like helpers.bulk"""
+        results = list(self.streaming_bulk(actions))
+        return sum(ok for ok, _ in results), [item for ok, item in results if not ok]
+
+    def index(self, index, id, document, **kwargs):
+        self.data.setdefault(index, {})[id] = dict(document)
+
+    def get(self, index, id, **kwargs):
+        if id not in self.docs(index):
+            raise KeyError(id)
+        return {'_id': id, '_index': index, '_source': self.docs(index)[id]}
+
+    def mget(self, index, ids, **kwargs):
+        self.calls.append(('mget', index, list(ids)))
+        stored = self.docs(index)
+        return {'docs': [
+            {'_id': doc_id, '_index': index, 'found': True, '_source': stored[doc_id]}
+            if doc_id in stored else {'_id': doc_id, '_index': index, 'found': False}
+            for doc_id in ids
+        ]}
+
+    def search(self, index, query=None, aggs=None, size=10, **kwargs):
+        self.calls.append(('search', index, query))
+        found = [
+            (name, doc_id, source) for name, doc_id, source in self.searchable(index)
+            if matches(doc_id, source, query or {'match_all': {}})
+        ]
+        hits = [(doc_id, source) for _, doc_id, source in found]
+        response = {'hits': {
+            'total': {'value': len(hits)},
+            'hits': [{'_id': doc_id, '_index': name, '_source': source} for name, doc_id, source in found[:size]],
+        }}
+        if aggs:
+            (name, agg), = aggs.items()
+            response['aggregations'] = {name: self.composite(hits, agg['composite'])}
+        return response
+
+    def composite(self, hits, composite):
+        names = [next(iter(source)) for source in composite['sources']]
+        counts = {}
+        for _, source in hits:
+            keys = [source_keys(source, next(iter(spec.values()))) for spec in composite['sources']]
+            for key in itertools.product(*keys):
+                counts[key] = counts.get(key, 0) + 1
+        return {'buckets': [
+            {'key': dict(zip(names, key)), 'doc_count': count}
+            for key, count in sorted(counts.items(), key=lambda item: [str(k) for k in item[0]])
+        ]}
+
+    def delete_by_query(self, index, query, **kwargs):
+        stored = self.docs(index)
+        gone = [doc_id for doc_id, source in stored.items() if matches(doc_id, source, query)]
+        for doc_id in gone:
+            del stored[doc_id]
+        return {'deleted': len(gone)}
+
+
+_auto_ids = itertools.count(1)
+
+
+def patch_bulk(monkeypatch, es):
+    """Route elasticsearch.helpers bulk writes to the fake"""
+    from elasticsearch import helpers
+    monkeypatch.setattr(helpers, 'bulk', lambda client, actions, **kwargs: es.bulk(actions))
+    monkeypatch.setattr(helpers, 'streaming_bulk', lambda client, actions, **kwargs: es.streaming_bulk(actions))
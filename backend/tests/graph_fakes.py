@@ -0,0 +1,80 @@
+"""In-memory stand-in for the Neo4j sessions the graph traversal queries"""
+
+import re
+
+EXPAND = re.compile(
+    r'MATCH \(n:(?P<source>\w+)\).*?MATCH \(n\)(?:-\[:(?P<out>\w+)\]->|<-\[:(?P<in>\w+)\]-)\(m:(?P<target>\w+)\)'
+    r'.*?RETURN .* AS to_id, (?P<node>.*) AS m',
+    re.S
+)
+PROJECTION = re.compile(r'\.(\w+)')
+
+
+class Result(list):
+    def single(self):
+        return self[0] if self else None
+
+    def consume(self):
+        return None
+
+
+class FakeGraph:
+    """Nodes keyed by element id, plus (source, type, target) relationships
+
+    Relationships may repeat, as MENTIONS created with CREATE do.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.relationships = []
+        self.queries = []
+
+    def add(self, element_id, label, **properties):
+        self.nodes[element_id] = (label, properties)
+        return self
+
+    def relate(self, source, relationship, target):
+        self.relationships.append((source, relationship, target))
+        return self
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def project(self, expression, properties):
+        if '{' not in expression:
+            return dict(properties)
+        return {name: properties.get(name) for name in PROJECTION.findall(expression)}
+
+    def run(self, query, **params):
+        self.queries.append(query)
+        if 'company_id: $company_id' in query:
+            expression = query.split('RETURN ')[1].split(' AS c')[0]
+            return Result(
+                {'c': self.project(expression, properties), 'id': element_id}
+                for element_id, (label, properties) in self.nodes.items()
+                if label == 'Company' and properties.get('company_id') == params['company_id']
+            )
+
+        match = EXPAND.search(query)
+        relationship = match['out'] or match['in']
+        pairs = set()
+        for source, rel_type, target in self.relationships:
+            if rel_type != relationship:
+                continue
+            n, m = (source, target) if match['out'] else (target, source)
+            if (n in params['frontier'] and self.nodes[n][0] == match['source']
+                    and self.nodes[m][0] == match['target']):
+                pairs.add((n, m))
+
+        ordered = sorted(pairs, key=lambda pair: pair[1])
+        page = ordered[params['skip']:params['skip'] + params['limit']]
+        return Result(
+            {'from_id': n, 'to_id': m, 'm': self.project(match['node'], self.nodes[m][1])}
+            for n, m in page
+        )
@@ -0,0 +1,92 @@
+"""
+In-memory stand-ins for the pymongo calls the crawler makes
+Covers equality, $in and range filters, sorted/limited cursors, upserts
+and projections that exclude _id - enough for the projector and ingest
+tests without a MongoDB server.
+"""
+
+import itertools
+
+OPERATORS = {
+    '$in': lambda value, arg: value in arg,
+    '$lt': lambda value, arg: value is not None and value < arg,
+    '$lte': lambda value, arg: value is not None and value <= arg,
+    '$gt': lambda value, arg: value is not None and value > arg,
+    '$gte': lambda value, arg: value is not None and value >= arg,
+}
+
+
+def matches(doc, query):
+    for field, condition in (query or {}).items():
+        value = doc.get(field)
+        if isinstance(condition, dict):
+            if not all(OPERATORS[op](value, arg) for op, arg in condition.items()):
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def projected(doc, projection):
+    if projection and projection.get('_id') == 0:
+        return {key: value for key, value in doc.items() if key != '_id'}
+    return dict(doc)
+
+
+class Cursor(list):
+    def sort(self, key, direction=1):
+        keys = [(key, direction)] if isinstance(key, str) else key
+        for field, order in reversed(keys):
+            super().sort(key=lambda doc: doc.get(field), reverse=order < 0)
+        return self
+
+    def limit(self, n):
+        return Cursor(self[:n])
+
+
+class Collection:
+    _ids = itertools.count(1)
+
+    def __init__(self):
+        self.docs = []
+
+    def insert_one(self, doc):
+        doc.setdefault('_id', next(self._ids))
+        self.docs.append(doc)
+
+    def insert_many(self, docs, ordered=True):
+        for doc in docs:
+            self.insert_one(doc)
+
+    def find(self, query=None, projection=None, **kwargs):
+        return Cursor(projected(doc, projection) for doc in self.docs if matches(doc, query))
+
+    def find_one(self, query=None, projection=None, sort=None):
+        cursor = self.find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        return cursor[0] if cursor else None
+
+    def update_one(self, query, update, upsert=False):
+        found = next((doc for doc in self.docs if matches(doc, query)), None)
+        if found is None:
+            if not upsert:
+                return
+            found = dict(query)
+            self.insert_one(found)
+        found.update(update.get('$set', {}))
+
+    def delete_many(self, query):
+        self.docs = [doc for doc in self.docs if not matches(doc, query)]
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def create_index(self, *args, **kwargs):
+        pass
+
+
+class Database(dict):
+    def __missing__(self, name):
+        self[name] = Collection()
+        return self[name]
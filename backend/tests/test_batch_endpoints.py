@@ -0,0 +1,74 @@
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routes import claims, companies
+from api.routes.companies import score_from_response
+
+CLAIM = {'claim_id': 'c1', 'company_id': 'acme', 'company_name': 'Acme', 'claim_text': 'Net zero'}
+
+
+def claims_response(total, verified, contradicted):
+    return {
+        'hits': {'total': {'value': total}, 'hits': [{'_id': 'c1', '_source': CLAIM}]},
+        'aggregations': {
+            'verified': {'doc_count': verified},
+            'contradicted': {'doc_count': contradicted},
+            'by_type': {'buckets': [{'key': 'net_zero', 'doc_count': total, 'verified': {'doc_count': verified}}]},
+        },
+    }
+
+
+def test_score_from_aggregations():
+    score = score_from_response('acme', None, claims_response(8, 2, 5))
+    assert (score.company_name, score.overall_score, score.pending_claims) == ('Unknown', 25.0, 1)
+    assert score.score_breakdown == {'net_zero': 25.0}
+
+    empty = claims_response(0, 0, 0)
+    empty['aggregations']['by_type']['buckets'] = []
+    assert score_from_response('acme', 'Acme', empty).overall_score == 0.0
+
+
+class BatchES:
+    def __init__(self):
+        self.searches = None
+
+    def msearch(self, searches):
+        self.searches = searches
+        return {'responses': [
+            {'hits': {'hits': [{'_id': 'acme', '_source': {'company_id': 'acme', 'name': 'Acme'}}]}},
+            claims_response(4, 4, 0),
+            {'error': {'type': 'index_not_found_exception'}},
+        ]}
+
+    def mget(self, index, ids, **kwargs):
+        return {'docs': [{'_id': 'c1', 'found': True, '_source': CLAIM}, {'_id': 'c9', 'found': False}]}
+
+
+def test_company_batch_is_one_msearch(monkeypatch):
+    es = BatchES()
+    monkeypatch.setattr(companies, 'get_elasticsearch', lambda: es)
+
+    response = TestClient(app).post('/api/companies/batch', json={'ids': ['acme', 'ghost', 'acme']})
+
+    assert response.status_code == 200
+    body = response.json()
+    # One header/body pair for the companies plus one per distinct id
+    assert len(es.searches) == 6
+    assert [item['company']['company_id'] for item in body['companies']] == ['acme']
+    assert body['companies'][0]['score']['overall_score'] == 100.0
+    assert body['companies'][0]['latest_claims'][0]['claim_id'] == 'c1'
+    assert body['missing'] == ['ghost']
+
+
+def test_claim_batch_is_one_mget(monkeypatch):
+    monkeypatch.setattr(claims, 'get_elasticsearch', BatchES)
+
+    body = TestClient(app).post('/api/claims/batch', json={'ids': ['c1', 'c9']}).json()
+
+    assert [claim['claim_id'] for claim in body['claims']] == ['c1']
+    assert body['missing'] == ['c9']
+
+
+def test_batch_size_is_bounded():
+    response = TestClient(app).post('/api/claims/batch', json={'ids': [str(i) for i in range(101)]})
+    assert response.status_code == 422
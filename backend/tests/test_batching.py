@@ -0,0 +1,79 @@
+import pytest
+from itemadapter import ItemAdapter
+
+from ecotrace_crawler.items import NewsArticleItem, SustainabilityClaimItem
+from ecotrace_crawler.pipelines import BatchingPipeline, EmbeddingPipeline, embedding_text
+
+
+class Recorder(BatchingPipeline):
+    def __init__(self, batch_size, fail=False):
+        super().__init__(batch_size=batch_size)
+        self.batches = []
+        self.fail = fail
+
+    def wants(self, adapter):
+        return bool(adapter.get('claim_text'))
+
+    def process_batch(self, adapters):
+        self.batches.append([adapter['claim_text'] for adapter in adapters])
+        if self.fail:
+            raise RuntimeError('sink down')
+
+
+def test_subclasses_must_implement_hooks():
+    with pytest.raises(TypeError):
+        BatchingPipeline()
+
+    class Partial(BatchingPipeline):
+        def wants(self, adapter):
+            return True
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_items_released_after_their_batch():
+    pipeline = Recorder(batch_size=2)
+    released = []
+    first = SustainabilityClaimItem(claim_text='a')
+    second = SustainabilityClaimItem(claim_text='b')
+
+    pipeline.process_item(first, spider=None).addCallback(released.append)
+    assert released == []
+    assert pipeline.flush_call.active()
+
+    pipeline.process_item(second, spider=None).addCallback(released.append)
+
+    assert pipeline.batches == [['a', 'b']]
+    assert released == [first, second]
+    assert pipeline.flush_call is None
+
+
+def test_failed_batch_still_releases_items():
+    pipeline = Recorder(batch_size=1, fail=True)
+    item = SustainabilityClaimItem(claim_text='a')
+    released = []
+
+    pipeline.process_item(item, spider=None).addCallback(released.append)
+
+    assert released == [item]
+
+
+def test_unwanted_items_skip_the_batch():
+    pipeline = Recorder(batch_size=1)
+    item = SustainabilityClaimItem(claim_text='')
+    assert pipeline.process_item(item, spider=None) is item
+    assert pipeline.batches == []
+
+
+def test_embedding_text():
+    assert embedding_text(ItemAdapter(SustainabilityClaimItem(claim_text='Net zero'))) == 'Net zero'
+    assert embedding_text(ItemAdapter(NewsArticleItem(title='Title', summary='Body'))) == 'Title. Body'
+    assert embedding_text(ItemAdapter(NewsArticleItem(title='Title'))) == 'Title'
+
+
+def test_embedding_pipeline_skips_without_model():
+    pipeline = EmbeddingPipeline(batch_size=1)
+    item = NewsArticleItem(title='Title')
+    assert pipeline.process_item(item, spider=None) is item
+
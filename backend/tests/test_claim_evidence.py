@@ -0,0 +1,54 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routes import claims
+
+
+class FakeES:
+    def __init__(self):
+        self.threads = []
+        self.knn = None
+
+    def get(self, index, id, source_includes):
+        self.threads.append(threading.get_ident())
+        return {'_source': {'claim_text': 'Net zero by 2040', 'company_name': 'Acme'}}
+
+    def search(self, index, knn, size, source_includes):
+        self.knn = knn
+        return {'hits': {'hits': [
+            {'_id': 'n1', '_score': 0.9, '_source': {'article_id': 'n1', 'title': 'Acme sued', 'sentiment': 'negative'}},
+            {'_id': 'p1', '_score': 0.8, '_source': {'publication_id': 'p1', 'title': 'Acme study'}},
+        ]}}
+
+
+def test_evidence_encodes_off_the_event_loop(monkeypatch):
+    es = FakeES()
+    encoded_on = []
+
+    def encode(text):
+        encoded_on.append(threading.get_ident())
+        return [0.1, 0.2]
+
+    monkeypatch.setattr(claims, 'get_elasticsearch', lambda: es)
+    monkeypatch.setattr(claims, 'encode', encode)
+
+    response = TestClient(app).get('/api/claims/c1/evidence?k=5')
+
+    assert response.status_code == 200
+    assert encoded_on and encoded_on[0] != es.threads[0]
+    assert es.knn['query_vector'] == [0.1, 0.2]
+    assert es.knn['filter']['multi_match']['query'] == 'Acme'
+
+    body = response.json()
+    # A negative article is not evidence against the claim
+    assert body['supporting'] == body['contradicting'] == []
+    assert [(doc['document_id'], doc['sentiment']) for doc in body['related']] == [('n1', 'negative'), ('p1', None)]
+
+
+def test_evidence_without_model_is_unavailable(monkeypatch):
+    monkeypatch.setattr(claims, 'get_elasticsearch', FakeES)
+    monkeypatch.setattr(claims, 'encode', lambda text: None)
+
+    assert TestClient(app).get('/api/claims/c1/evidence').status_code == 503
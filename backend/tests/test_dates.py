@@ -0,0 +1,152 @@
+import pytest
+
+from ecotrace_crawler import storage
+from ecotrace_crawler.dates import DateNormalizer
+from ecotrace_crawler.items import NewsArticleItem, ScientificPublicationItem
+from ecotrace_crawler.mappings import MappingConflictError, index_mappings, mapping_conflicts, remap
+from ecotrace_crawler.partitions import logical_index
+from ecotrace_crawler.pipelines import DateNormalizationPipeline
+from ecotrace_crawler.storage import ElasticsearchSink
+
+
+@pytest.mark.parametrize('text, expected', [
+    # RSS pubDate, with and without a numeric zone
+    ('Mon, 02 Jan 2024 10:00:00 +0100', '2024-01-02T09:00:00.000Z'),
+    ('Tue, 05 Mar 2024 08:30:00 GMT', '2024-03-05T08:30:00.000Z'),
+    # PubMed citations
+    ('2023 Mar 15;14(1):1234', '2023-03-15T00:00:00.000Z'),
+    ('2021 Dec;12:e45', '2021-12-01T00:00:00.000Z'),
+    ('2020 Spring;8(2):1-9', '2020-03-01T00:00:00.000Z'),
+    ('2019 Jul-Aug;12(3)', '2019-07-01T00:00:00.000Z'),
+    ('2020 Dec-2021 Jan;5', '2020-12-01T00:00:00.000Z'),
+    # EDGAR filing dates
+    ('2023-02-28', '2023-02-28T00:00:00.000Z'),
+    ('02/28/2023', '2023-02-28T00:00:00.000Z'),
+    # Partial dates
+    ('2023-12', '2023-12-01T00:00:00.000Z'),
+    ('2023-3', '2023-03-01T00:00:00.000Z'),
+    ('2024', '2024-01-01T00:00:00.000Z'),
+    ('March 15, 2023', '2023-03-15T00:00:00.000Z'),
+    ('2024-01-05T10:00:00.123456+00:00', '2024-01-05T10:00:00.123Z'),
+])
+def test_formats(text, expected):
+    assert DateNormalizer()('published_date', text) == expected
+
+
+@pytest.mark.parametrize('text', ['2023-13', 'soon', '   '])
+def test_unparseable(text):
+    assert DateNormalizer()('published_date', text) is None
+
+
+def test_source_text_is_kept_unless_iso():
+    normalize = DateNormalizer()
+    assert normalize.parse('published_date', '2023-12') == ('2023-12-01T00:00:00.000Z', '2023-12')
+    assert normalize.parse('published_date', 'soon') == (None, 'soon')
+    assert normalize.parse('published_date', '2024-01-05T10:00:00Z') == ('2024-01-05T10:00:00.000Z', None)
+    assert normalize.parse('published_date', 1704067200000) == ('2024-01-01T00:00:00.000Z', None)
+
+
+def test_integer_years_are_years_not_epoch_millis():
+    normalize = DateNormalizer()
+    assert normalize.parse('publication_date', 2023) == ('2023-01-01T00:00:00.000Z', '2023')
+    assert normalize('publication_date', 1704067200000) == '2024-01-01T00:00:00.000Z'
+
+
+def test_preferred_parser_does_not_change_results():
+    normalize = DateNormalizer()
+    normalize('published_date', 'Mon, 02 Jan 2024 10:00:00 +0100')
+    assert normalize('published_date', '2023 Mar 15;14(1)') == '2023-03-15T00:00:00.000Z'
+
+
+def test_pipeline_keeps_raw_text_beside_the_date():
+    item = ScientificPublicationItem(publication_id='p1', title='T', publication_date='2020 Spring;8(2)',
+                                     crawled_at='2024-01-05T10:00:00')
+    item = DateNormalizationPipeline().process_item(item, None)
+    assert item['publication_date'] == '2020-03-01T00:00:00.000Z'
+    assert item['publication_date_raw'] == '2020 Spring;8(2)'
+    assert item['crawled_at'] == '2024-01-05T10:00:00.000Z'
+
+
+def test_pipeline_unsets_unparseable_dates():
+    item = NewsArticleItem(article_id='n1', title='T', url='u', published_date='yesterday')
+    item = DateNormalizationPipeline().process_item(item, None)
+    assert item['published_date'] is None
+    assert item['published_date_raw'] == 'yesterday'
+
+
+class Indices:
+    def __init__(self, properties, alias_of=None):
+        self.properties = properties
+        self.alias_of = alias_of
+        self.calls = []
+
+    def exists(self, index):
+        return True
+
+    def exists_alias(self, name):
+        return self.alias_of is not None
+
+    def get_alias(self, name):
+        return {index: {'aliases': {name: {}}} for index in self.alias_of}
+
+    def get_mapping(self, index):
+        return {index: {'mappings': {'properties': self.properties}}}
+
+    def put_mapping(self, **kwargs):
+        self.calls.append(('put_mapping', kwargs))
+
+    def create(self, **kwargs):
+        self.calls.append(('create', kwargs))
+
+    def update_aliases(self, actions):
+        self.calls.append(('update_aliases', actions))
+
+
+class ES:
+    def __init__(self, indices):
+        self.indices = indices
+
+    def options(self, **kwargs):
+        return self
+
+    def reindex(self, **kwargs):
+        return {'total': 7, 'failures': []}
+
+
+def test_text_dates_conflict_with_the_date_mapping():
+    es = ES(Indices({'published_date': {'type': 'text'}, 'title': {'type': 'text'}}))
+    properties = index_mappings()['claims']['properties']
+    assert mapping_conflicts(es, 'ecotrace_claims', properties) == {'published_date': ('text', 'date')}
+
+
+def test_ensure_indices_fails_on_conflicts_instead_of_logging(monkeypatch):
+    # Only unpartitioned kinds; partitions need more of the client
+    monkeypatch.setattr(storage, 'KINDS', ['companies', 'claims'])
+    sink = ElasticsearchSink(ES(Indices({'extracted_at': {'type': 'text'}})))
+
+    with pytest.raises(MappingConflictError) as error:
+        sink.ensure_indices(384)
+    assert 'remap_indices' in str(error.value)
+    assert error.value.conflicts == {'extracted_at': ('text', 'date')}
+
+
+def test_logical_index_of_a_remapped_copy():
+    assert logical_index('ecotrace_claims-r20240101000000') == 'ecotrace_claims'
+
+
+def test_remap_replaces_the_index_with_an_alias_of_the_copy():
+    indices = Indices({})
+    target, copied = remap(ES(indices), 'ecotrace_claims', {'properties': {}})
+
+    assert copied == 7 and target.startswith('ecotrace_claims-r')
+    assert indices.calls[0] == ('create', {'index': target, 'mappings': {'properties': {}}})
+    assert indices.calls[1] == ('update_aliases', [
+        {'add': {'index': target, 'alias': 'ecotrace_claims', 'is_write_index': True}},
+        {'remove_index': {'index': 'ecotrace_claims'}},
+    ])
+
+
+def test_remap_again_drops_the_previous_copy():
+    indices = Indices({}, alias_of=['ecotrace_claims-r20240101000000'])
+    remap(ES(indices), 'ecotrace_claims', {'properties': {}})
+    assert indices.calls[1][1][1] == {'remove_index': {'index': 'ecotrace_claims-r20240101000000'}}
@@ -0,0 +1,106 @@
+import gzip
+import os
+
+from ecotrace_crawler.commands.replay_deadletters import Replay
+from ecotrace_crawler.deadletter import DeadLetterLog, read_segment, segments
+from ecotrace_crawler.storage import SinkError, StorageRecord
+
+
+def record(doc_id, **doc):
+    return StorageRecord('news', doc_id, {'article_id': doc_id, **doc})
+
+
+def test_round_trip_through_a_rotated_segment(tmp_path):
+    log = DeadLetterLog(str(tmp_path), name='storage')
+    log.append('elasticsearch', [record('n1', title='A'), StorageRecord('news', None, {'title': 'B'})], 'timeout')
+    assert segments(str(tmp_path)) == []        # the active segment is not replayed
+
+    log.close()
+
+    paths = segments(str(tmp_path))
+    assert len(paths) == 1 and paths[0].endswith('.jsonl.gz')
+    assert not os.path.exists(tmp_path / 'storage.jsonl')
+    assert list(read_segment(paths[0])) == [
+        ('elasticsearch', record('n1', title='A'), 'timeout'),
+        ('elasticsearch', StorageRecord('news', None, {'title': 'B'}), 'timeout'),
+    ]
+
+
+def test_rotates_at_max_bytes(tmp_path):
+    log = DeadLetterLog(str(tmp_path), max_bytes=200, name='storage')
+    for i in range(5):
+        log.append('neo4j', [record(f'n{i}', title='x' * 100)], 'deadlock')
+    log.close()
+
+    paths = segments(str(tmp_path))
+    assert len(paths) == 5
+    assert log.spooled == 5
+    assert sum(len(list(read_segment(path))) for path in paths) == 5
+
+
+def test_partial_failures_spool_only_failed_records(tmp_path):
+    log = DeadLetterLog(str(tmp_path))
+    records = [record('n1'), record('n2'), record('n3')]
+    log.spool_failure('mongodb', records, SinkError('mongodb', [(records[0], 'dup'), (records[2], 'big')]))
+    log.spool_failure('neo4j', records[:1], RuntimeError('down'))
+    log.close()
+
+    entries = list(read_segment(segments(str(tmp_path))[0]))
+    assert [(sink, r.doc_id, reason) for sink, r, reason in entries] == [
+        ('mongodb', 'n1', 'dup'), ('mongodb', 'n3', 'big'), ('neo4j', 'n1', 'down'),
+    ]
+
+
+def test_corrupt_lines_are_skipped(tmp_path):
+    path = tmp_path / 'deadletter-storage-1.jsonl.gz'
+    with gzip.open(path, 'wt') as f:
+        f.write('{"sink": "neo4j", "kind": "news", "doc_id": "n1", "doc": {}}\n{truncated\n\n')
+    assert [r.doc_id for _, r, _ in read_segment(str(path))] == ['n1']
+
+
+class FakeSink:
+    def __init__(self, stored=None, fail=None):
+        self.stored = stored or {}
+        self.fail = fail
+        self.written = []
+
+    def find(self, kind, doc_ids):
+        return {doc_id: self.stored[doc_id] for doc_id in doc_ids if doc_id in self.stored}
+
+    def write_batch(self, records):
+        self.written.extend(records)
+        if self.fail:
+            raise SinkError('sink', [(records[0], self.fail)])
+
+    def close(self):
+        pass
+
+
+def test_replay_writes_the_current_mongo_document(tmp_path):
+    retry = DeadLetterLog(str(tmp_path), name='replay')
+    replay = Replay(retry, batch_size=10, embedding_dims=384)
+    es = FakeSink()
+    replay.sinks = {'elasticsearch': es, 'mongodb': FakeSink(stored={'n1': {'article_id': 'n1', 'title': 'New'}})}
+
+    replay.add('elasticsearch', record('n1', title='Old'))
+    replay.add('elasticsearch', record('n2', title='Only copy'))
+    replay.flush()
+
+    assert [r.doc['title'] for r in es.written] == ['New', 'Only copy']
+    assert replay.counts == {'elasticsearch': (2, 0)}
+
+
+def test_replay_respools_failures_and_unavailable_sinks(tmp_path):
+    retry = DeadLetterLog(str(tmp_path), name='replay')
+    replay = Replay(retry, batch_size=2, embedding_dims=384)
+    replay.sinks = {'mongodb': FakeSink(fail='dup'), 'neo4j': None}
+
+    replay.add('mongodb', record('n1'))
+    replay.add('mongodb', record('n2'))
+    replay.add('neo4j', record('n3'))
+    replay.flush()
+    retry.close()
+
+    assert replay.counts == {'mongodb': (1, 1), 'neo4j': (0, 1)}
+    entries = list(read_segment(segments(str(tmp_path))[0]))
+    assert [(sink, r.doc_id) for sink, r, _ in entries] == [('mongodb', 'n1'), ('neo4j', 'n3')]
@@ -0,0 +1,58 @@
+import csv
+import io
+import json
+
+import pyarrow.parquet as pq
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routes import export
+from api.routes.export import iter_csv, iter_ndjson, iter_parquet
+
+COLUMNS = ['claim_id', 'company_name', 'normalized_value']
+
+
+def hits(count):
+    return [
+        {'_source': {'claim_id': f'c{i}', 'company_name': ['Acme', 'Beta'] if i % 2 else 'Acme',
+                     'normalized_value': i * 1.5, 'embedding': [0.1]}}
+        for i in range(count)
+    ]
+
+
+def test_ndjson_keeps_only_export_columns():
+    lines = list(iter_ndjson(hits(2), COLUMNS))
+    assert [json.loads(line) for line in lines] == [
+        {'claim_id': 'c0', 'company_name': 'Acme', 'normalized_value': 0.0},
+        {'claim_id': 'c1', 'company_name': ['Acme', 'Beta'], 'normalized_value': 1.5},
+    ]
+
+
+def test_csv_streams_a_chunk_per_batch(monkeypatch):
+    monkeypatch.setattr(export, 'EXPORT_BATCH_SIZE', 2)
+    chunks = list(iter_csv(hits(5), COLUMNS))
+
+    assert len(chunks) == 3
+    rows = list(csv.reader(io.StringIO(''.join(chunks))))
+    assert rows[0] == COLUMNS
+    assert rows[2] == ['c1', 'Acme; Beta', '1.5']
+    assert len(rows) == 6
+
+
+def test_parquet_row_group_per_batch(monkeypatch):
+    monkeypatch.setattr(export, 'EXPORT_BATCH_SIZE', 2)
+    source = hits(5)
+    source[0]['_source']['normalized_value'] = 'n/a'
+
+    table_file = pq.ParquetFile(io.BytesIO(b''.join(iter_parquet(source, COLUMNS))))
+
+    assert table_file.metadata.num_row_groups == 3
+    table = table_file.read()
+    assert table.column('normalized_value').to_pylist() == [None, 1.5, 3.0, 4.5, 6.0]
+    assert table.column('company_name').to_pylist()[1] == 'Acme; Beta'
+
+
+def test_claim_type_only_filters_claims(monkeypatch):
+    monkeypatch.setattr(export, 'get_elasticsearch', lambda: object())
+    response = TestClient(app).get('/api/export/news?claim_type=net_zero')
+    assert response.status_code == 400
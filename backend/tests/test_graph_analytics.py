@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from api.graph_analytics import GraphAnalyticsJob
+
+from graph_fakes import Result
+
+RESULTS = {
+    'gds.graph.project': {'nodeCount': 10, 'relationshipCount': 20},
+    'gds.pageRank.write': {'nodePropertiesWritten': 10, 'ranIterations': 7},
+    'gds.louvain.write': {'communityCount': 3, 'modularity': 0.4},
+    'gds.nodeSimilarity.stream': {'nodesCompared': 4, 'relationshipsWritten': 6},
+}
+
+
+class GDSSession:
+    def __init__(self, fail_on=None, block=None):
+        self.calls = []
+        self.queries = []
+        self.fail_on = fail_on
+        self.block = block
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        procedure = next((name for name in RESULTS if name in query), None)
+        self.queries.append((query, params))
+        self.calls.append(procedure or query.split()[1].split('(')[0])
+        if self.block and procedure == 'gds.graph.project':
+            self.block.wait()
+        if self.fail_on and procedure == self.fail_on:
+            raise RuntimeError('out of memory')
+        return Result([RESULTS.get(procedure, {})])
+
+
+def test_run_records_the_outcome_and_drops_the_projection():
+    session = GDSSession()
+    result = GraphAnalyticsJob().run(session)
+
+    assert result['status'] == 'completed'
+    assert (result['communities'], result['similarities_written']) == (3, 6)
+    assert session.calls[0] == session.calls[-1] == 'gds.graph.drop'
+
+
+def test_failed_algorithm_still_drops_the_projection():
+    session = GDSSession(fail_on='gds.louvain.write')
+    job = GraphAnalyticsJob()
+
+    with pytest.raises(RuntimeError):
+        job.run(session)
+
+    assert job.last_run['status'] == 'failed'
+    assert 'gds.nodeSimilarity.stream' not in session.calls
+    assert session.calls[-1] == 'gds.graph.drop'
+
+
+def test_old_similarities_are_only_deleted_after_the_new_ones_are_written():
+    session = GDSSession(fail_on='gds.nodeSimilarity.stream')
+    with pytest.raises(RuntimeError):
+        GraphAnalyticsJob().run(session)
+    assert not any('DELETE' in query for query, _ in session.queries)
+
+    session = GDSSession()
+    GraphAnalyticsJob().run(session)
+    (written, write_params), (deleted, delete_params) = session.queries[-3:-1]
+    assert 'gds.nodeSimilarity.stream' in written and 'r.run < $run' in deleted
+    assert write_params['run'] == delete_params['run']
+
+
+def test_concurrent_runs_are_refused():
+    release = threading.Event()
+    job = GraphAnalyticsJob()
+    worker = threading.Thread(target=job.run, args=(GDSSession(block=release),))
+    worker.start()
+    try:
+        with pytest.raises(RuntimeError, match='already running'):
+            job.run(GDSSession())
+    finally:
+        release.set()
+        worker.join()
+    assert job.last_run['status'] == 'completed'
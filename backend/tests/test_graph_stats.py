@@ -0,0 +1,73 @@
+from api.graph_stats import DEGREE_QUERY, GraphStats, bucket_name
+
+from graph_fakes import Result
+
+
+class StatsSession:
+    """Answers the count-store and degree queries for a list of companies"""
+
+    def __init__(self, companies):
+        # (node id, company id, name, degree)
+        self.companies = companies
+        self.afters = []
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        if query == DEGREE_QUERY:
+            self.afters.append(params['after'])
+            page = sorted(c for c in self.companies if c[0] > params['after'])[:params['limit']]
+            return Result(
+                {'node_id': node_id, 'company_id': company_id, 'name': name, 'degree': degree}
+                for node_id, company_id, name, degree in page
+            )
+        if 'db.labels' in query:
+            return Result([{'label': 'Company'}])
+        if 'db.relationshipTypes' in query:
+            return Result([{'relationshipType': 'MENTIONS'}])
+        return Result([{'count': len(self.companies)}])
+
+
+def test_degree_buckets():
+    assert [bucket_name(d) for d in (0, 1, 3, 9, 10, 99, 100)] == ['0', '1', '2-4', '5-9', '10-49', '50-99', '100+']
+
+
+def test_degree_query_pages_by_node_id():
+    assert 'id(c) > $after' in DEGREE_QUERY
+    assert 'elementId' not in DEGREE_QUERY
+
+
+def test_degrees_converge_over_refreshes():
+    companies = [(3, 'acme', 'Acme', 12), (7, None, 'Beta', 1), (11, 'gamma', 'Gamma', 0)]
+    driver = StatsSession(companies)
+    stats = GraphStats(degree_batch_size=2, top_n=2)
+
+    first = stats.refresh(driver)
+    assert first['companies_scanned'] == 2
+    assert first['nodes'] == {'Company': 3}
+    assert first['relationships'] == {'MENTIONS': 3}
+
+    second = stats.refresh(driver)
+    assert driver.afters == [-1, 7]
+    assert second['companies_scanned'] == 3
+    assert second['top_hubs'] == [
+        {'id': 'acme', 'name': 'Acme', 'degree': 12},
+        {'id': 'Beta', 'name': 'Beta', 'degree': 1},
+    ]
+    assert second['degree_distribution'] == {'10-49': 1, '1': 1, '0': 1}
+
+
+def test_deleted_companies_dropped_after_a_full_pass():
+    driver = StatsSession([(1, 'a', 'A', 1), (2, 'b', 'B', 1)])
+    stats = GraphStats(degree_batch_size=5)
+    stats.refresh(driver)
+
+    driver.companies = [(1, 'a', 'A', 1)]
+    assert stats.refresh(driver)['companies_scanned'] == 1
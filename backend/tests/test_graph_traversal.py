@@ -0,0 +1,102 @@
+import pytest
+from fastapi import HTTPException
+
+from api.graph_traversal import GraphTraversal, decode_graph_cursor, encode_graph_cursor, node_projection
+
+from graph_fakes import FakeGraph
+
+
+def company_graph():
+    graph = FakeGraph().add('acme', 'Company', company_id='acme', name='Acme')
+    for i in range(3):
+        graph.add(f'claim{i}', 'Claim', claim_id=f'cl{i}', claim_text=f'Claim number {i}')
+        graph.relate('acme', 'MAKES_CLAIM', f'claim{i}')
+    graph.add('news0', 'NewsArticle', article_id='n0', title='Acme and Beta sued')
+    graph.add('beta', 'Company', name='Beta')
+    graph.add('beta_claim', 'Claim', claim_id='bc', claim_text='Beta is green')
+    graph.relate('news0', 'MENTIONS', 'acme').relate('news0', 'MENTIONS', 'acme')
+    graph.relate('news0', 'MENTIONS', 'beta')
+    graph.relate('beta', 'MAKES_CLAIM', 'beta_claim')
+    return graph
+
+
+def test_cursor_round_trip():
+    assert decode_graph_cursor(encode_graph_cursor({'a': 2, 'b': -1})) == {'a': 2, 'b': -1}
+    with pytest.raises(HTTPException):
+        decode_graph_cursor('???')
+
+
+def test_unknown_company():
+    assert GraphTraversal(FakeGraph()).run('ghost') == (False, None)
+
+
+def test_direct_neighbours_are_capped_and_paged():
+    graph = company_graph()
+    traversal = GraphTraversal(graph, depth=1, limit_per_type=2)
+    found, cursor = traversal.run('acme')
+
+    assert found
+    assert sorted(traversal.node_keys().values()) == ['acme', 'cl0', 'cl1', 'n0']
+    # The repeated MENTIONS relationship is one edge
+    assert ('news0', 'MENTIONS', 'acme') in traversal.edges
+    assert len(traversal.edges) == 3
+    assert decode_graph_cursor(cursor)['MAKES_CLAIM:out:Claim'] == 2
+
+    following = GraphTraversal(graph, depth=1, limit_per_type=2)
+    found, cursor = following.run('acme', cursor)
+    assert [key for key in following.node_keys().values() if key.startswith('cl')] == ['cl2']
+    assert cursor is None
+
+
+def test_deeper_hops_reach_co_mentioned_companies():
+    traversal = GraphTraversal(company_graph(), depth=3, limit_per_type=10)
+    traversal.run('acme')
+
+    keys = traversal.node_keys()
+    # Mention-only companies are identified by name
+    assert keys['beta'] == 'Beta'
+    assert keys['beta_claim'] == 'bc'
+    assert ('beta', 'MAKES_CLAIM', 'beta_claim') in traversal.edges
+
+
+def test_edges_to_nodes_reached_by_another_path_are_kept():
+    graph = company_graph()
+    graph.add('pub0', 'Publication', publication_id='p0', title='Acme and Beta study')
+    graph.relate('pub0', 'MENTIONS', 'acme').relate('pub0', 'MENTIONS', 'beta')
+    traversal = GraphTraversal(graph, depth=2, limit_per_type=10)
+    traversal.run('acme')
+
+    # Beta is first reached through the news article
+    assert {('news0', 'MENTIONS', 'beta'), ('pub0', 'MENTIONS', 'beta')} <= traversal.edges
+    assert list(traversal.node_keys().values()).count('Beta') == 1
+
+
+def test_compact_output_indexes_nodes_and_edges():
+    traversal = GraphTraversal(company_graph(), depth=1, limit_per_type=10)
+    traversal.run('acme')
+    compact = traversal.compact()
+
+    ids = compact['nodes']['id']
+    assert compact['edge_types'] == ['MAKES_CLAIM', 'MENTIONS']
+    edges = {
+        (ids[source], compact['edge_types'][kind], ids[target])
+        for source, target, kind in zip(*compact['edges'].values())
+    }
+    assert ('n0', 'MENTIONS', 'acme') in edges
+    assert compact['nodes']['label'][ids.index('cl0')] == 'Claim number 0...'
+    assert compact['node_types'][compact['nodes']['type'][ids.index('n0')]] == 'news'
+
+
+def test_compact_projection_lists_each_property_once():
+    assert node_projection('c', 'Company', False) == 'c {.company_id, .name}'
+    assert node_projection('m', 'NewsArticle', False) == 'm {.article_id, .title, .name}'
+    assert node_projection('m', 'Claim', True) == 'm'
+
+
+def test_compact_traversal_only_fetches_ids_and_labels():
+    traversal = GraphTraversal(company_graph(), depth=2, limit_per_type=10, properties=False)
+    traversal.run('acme')
+
+    label, node = traversal.nodes['acme']
+    assert node == {'company_id': 'acme', 'name': 'Acme'}
+    assert traversal.node_keys()['beta'] == 'Beta'
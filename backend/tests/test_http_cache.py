@@ -0,0 +1,61 @@
+from fastapi.testclient import TestClient
+
+from api.http_cache import document_validators, etag_matches, http_date, is_not_modified, make_etag
+from api.main import app
+from api.routes import companies
+
+
+def test_weak_etag_comparison():
+    etag = make_etag('a', 1)
+    assert etag.startswith('W/"')
+    assert etag_matches(etag[2:], etag)
+    assert etag_matches(f'W/"other", {etag}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches('W/"other"', etag)
+
+
+def test_document_validators_follow_the_version():
+    doc = {'_index': 'ecotrace_claims', '_id': 'c1', '_primary_term': 1, '_seq_no': 7,
+           '_source': {'extracted_at': '2024-03-01T12:00:00'}}
+    validators = document_validators(doc)
+
+    assert validators['Last-Modified'] == 'Fri, 01 Mar 2024 12:00:00 GMT'
+    assert document_validators({**doc, '_seq_no': 8})['ETag'] != validators['ETag']
+    assert document_validators(doc, ['claim_id'])['ETag'] != validators['ETag']
+
+
+def test_conditional_get_precedence():
+    validators = {'ETag': make_etag('x'), 'Last-Modified': http_date('2024-03-01T12:00:00Z')}
+    assert is_not_modified({'if-none-match': validators['ETag']}, validators)
+    # If-None-Match wins over a matching If-Modified-Since
+    assert not is_not_modified({'if-none-match': 'W/"y"', 'if-modified-since': validators['Last-Modified']}, validators)
+    assert is_not_modified({'if-modified-since': 'Sat, 02 Mar 2024 00:00:00 GMT'}, validators)
+    assert not is_not_modified({'if-modified-since': 'Thu, 29 Feb 2024 00:00:00 GMT'}, validators)
+
+
+class ScoreES:
+    def get(self, index, id, source_includes):
+        return {'_source': {'name': 'Acme'}}
+
+    def search(self, **kwargs):
+        return {
+            'hits': {'total': {'value': 4}},
+            'aggregations': {
+                'verified': {'doc_count': 2},
+                'contradicted': {'doc_count': 1},
+                'by_type': {'buckets': [{'key': 'net_zero', 'doc_count': 4, 'verified': {'doc_count': 2}}]},
+            },
+        }
+
+
+def test_score_revalidates_despite_last_updated(monkeypatch):
+    monkeypatch.setattr(companies, 'get_elasticsearch', ScoreES)
+    client = TestClient(app)
+
+    first = client.get('/api/companies/acme/score')
+    assert first.status_code == 200
+    assert first.json()['overall_score'] == 50.0
+
+    second = client.get('/api/companies/acme/score', headers={'If-None-Match': first.headers['etag']})
+    assert second.status_code == 304
+    assert second.headers['cache-control'] == 'public, max-age=300'
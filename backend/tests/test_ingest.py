@@ -0,0 +1,115 @@
+import gzip
+import json
+
+import pytest
+
+from ecotrace_crawler import ingest
+from ecotrace_crawler.ingest import Checkpoint, Progress, iter_dump, write_chunk
+from ecotrace_crawler.projector import ParallelWriter
+from ecotrace_crawler.storage import Sink, SinkError
+
+RECORDS = [{'article_id': f'n{i}', 'title': f'Title {i}'} for i in range(1, 6)]
+
+
+def jsonl(records):
+    return ''.join(json.dumps(record) + '\n' for record in records)
+
+
+def test_jsonl_positions_skip_blank_lines(tmp_path):
+    path = tmp_path / 'news.jsonl'
+    path.write_text('\n' + jsonl(RECORDS[:2]) + '\n\n' + jsonl(RECORDS[2:]))
+    assert list(iter_dump(str(path))) == list(enumerate(RECORDS, 1))
+
+
+def test_gzipped_json_array(tmp_path):
+    path = tmp_path / 'news.json.gz'
+    with gzip.open(path, 'wt') as f:
+        f.write('  ' + json.dumps(RECORDS))
+    assert list(iter_dump(str(path), skip=3)) == [(4, RECORDS[3]), (5, RECORDS[4])]
+
+
+def test_invalid_lines_keep_their_position(tmp_path):
+    path = tmp_path / 'news.jsonl'
+    path.write_text(jsonl(RECORDS[:1]) + '{broken\n' + jsonl(RECORDS[1:2]))
+    assert list(iter_dump(str(path))) == [(1, RECORDS[0]), (2, None), (3, RECORDS[1])]
+
+
+def test_resume_from_checkpoint(tmp_path):
+    dump = tmp_path / 'news.jsonl'
+    dump.write_text(jsonl(RECORDS))
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+    key = str(dump)
+
+    Checkpoint(checkpoint_path).update(key, 3)
+
+    # A new run, as after an interruption, picks up after record 3
+    checkpoint = Checkpoint(checkpoint_path)
+    assert not checkpoint.is_done(key)
+    resumed = list(iter_dump(key, checkpoint.position(key)))
+    assert resumed == [(4, RECORDS[3]), (5, RECORDS[4])]
+
+    checkpoint.update(key, 5, done=True)
+    assert Checkpoint(checkpoint_path).is_done(key)
+    assert not (tmp_path / 'checkpoint.json.tmp').exists()
+
+
+class Partial(Sink):
+    name = 'elasticsearch'
+
+    def __init__(self, fail_ids=(), down=False):
+        self.fail_ids = set(fail_ids)
+        self.down = down
+
+    def write_batch(self, records):
+        if self.down:
+            raise RuntimeError('down')
+        failed = [(record, 'mapping') for record in records if record.doc_id in self.fail_ids]
+        if failed:
+            raise SinkError(self.name, failed)
+
+
+class Spool:
+    def __init__(self):
+        self.spooled = []
+
+    def spool_failure(self, sink, records, error):
+        self.spooled.append(sink)
+
+    def close(self):
+        pass
+
+
+def chunk(*ids):
+    return [('news', doc_id, {'article_id': doc_id}) for doc_id in ids]
+
+
+@pytest.fixture
+def writer(monkeypatch):
+    def setup(sinks, deadletter=True):
+        spool = Spool() if deadletter else None
+        monkeypatch.setattr(ingest, '_deadletter', spool)
+        monkeypatch.setattr(ingest, '_writer', ParallelWriter(sinks, spool))
+    return setup
+
+
+def test_dead_lettered_records_are_not_counted_as_written(writer):
+    writer({'elasticsearch': Partial(fail_ids={'n2'}), 'neo4j': Partial(fail_ids={'n2', 'n3'})})
+    assert write_chunk(chunk('n1', 'n2', 'n3', 'n4')) == (2, 2)
+
+
+def test_a_failed_batch_loses_every_record(writer):
+    writer({'elasticsearch': Partial(down=True)})
+    assert write_chunk(chunk('n1', 'n2')) == (0, 2)
+
+
+def test_failures_without_deadletter_raise(writer):
+    writer({'elasticsearch': Partial(down=True)}, deadletter=False)
+    with pytest.raises(RuntimeError):
+        write_chunk(chunk('n1'))
+
+
+def test_summary_reports_failed():
+    progress = Progress()
+    progress.written, progress.failed, progress.skipped = 8, 2, 1
+    summary = progress.summary()
+    assert (summary['written'], summary['failed'], summary['skipped']) == (8, 2, 1)
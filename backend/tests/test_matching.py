@@ -0,0 +1,40 @@
+import pytest
+
+from ecotrace_crawler.matching import AHOCORASICK_AVAILABLE, KeywordMatcher
+
+BACKENDS = [False] + ([True] if AHOCORASICK_AVAILABLE else [])
+
+
+def matcher(use_automaton):
+    return (
+        KeywordMatcher(use_automaton=use_automaton)
+        .add('company', ['Shell', 'BP'])
+        .add('topic', ['net zero', 'carbon neutral', 'carbon'], prefix=True)
+        .add('negative', ['greenwash'], prefix=True)
+    )
+
+
+@pytest.mark.parametrize('use_automaton', BACKENDS)
+def test_whole_words_and_prefixes(use_automaton):
+    hits = matcher(use_automaton).scan("Shell accused of greenwashing; BPX and Shellfish unaffected")
+    assert hits['company'] == {'Shell': 1}
+    assert hits['negative'] == {'greenwash': 1}
+
+
+@pytest.mark.parametrize('use_automaton', BACKENDS)
+def test_overlapping_phrases_all_count(use_automaton):
+    hits = matcher(use_automaton).scan("Carbon neutral by 2030, net zero by 2040. Carbon", "bp")
+    assert hits['topic'] == {'carbon neutral': 1, 'carbon': 2, 'net zero': 1}
+    assert hits['company'] == {'BP': 1}
+
+
+@pytest.mark.parametrize('use_automaton', BACKENDS)
+def test_no_match_inside_words(use_automaton):
+    assert matcher(use_automaton).scan("decarbonisation of the shellac industry") == {}
+
+
+def test_fallback_agrees_with_automaton():
+    if not AHOCORASICK_AVAILABLE:
+        pytest.skip("pyahocorasick is not installed")
+    text = "Shell's net-zero pledge: carbon neutral, carbonated, greenwashed? BP, bp. net zero"
+    assert matcher(False).scan(text) == matcher(True).scan(text)
@@ -0,0 +1,70 @@
+from concurrent.futures.process import BrokenProcessPool
+
+from ecotrace_crawler.items import SustainabilityClaimItem
+from ecotrace_crawler.nlp import extract_batch, extract_claim_fields
+from ecotrace_crawler.pipelines import NLPExtractionPipeline
+
+
+def test_regex_extraction_without_model():
+    texts = [
+        "We will cut carbon emissions 50% by 2030 against a 2019 baseline",
+        "Our recycling programme reached every site",
+    ]
+    first, second = extract_batch(texts)
+
+    assert first == {
+        'target_year': '2030',
+        'numerical_value': '50',
+        'unit': 'percent',
+        'claim_type': 'emissions',
+        'claim_category': 'target',
+    }
+    assert second == {'claim_type': 'waste', 'claim_category': 'achievement'}
+
+
+def test_type_priority_follows_keyword_order():
+    fields = extract_claim_fields("Solar power cuts our CO2 footprint", [])
+    assert fields['claim_type'] == 'emissions'
+
+
+def test_pipeline_classifies_and_fills_empty_fields():
+    pipeline = NLPExtractionPipeline(batch_size=1)
+    item = SustainabilityClaimItem(
+        claim_text="Reach 100% renewable electricity by 2025",
+        claim_type='renewable_energy_pledge',
+        target_year='2030',
+    )
+
+    # Without spaCy the regex extractor runs inline
+    assert pipeline.process_item(item, spider=None) is item
+    assert item['claim_type'] == 'renewable_energy'
+    assert item['claim_category'] == 'target'
+    assert item['target_year'] == '2030'
+    assert item['numerical_value'] == '100'
+
+
+class BrokenPool:
+    def submit(self, *args):
+        raise BrokenProcessPool('worker died')
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def test_broken_pool_falls_back_to_regex():
+    pipeline = NLPExtractionPipeline(batch_size=1)
+    pipeline.executor = BrokenPool()
+    item = SustainabilityClaimItem(claim_text="Cut water use 20% by 2030")
+
+    results = []
+    pipeline.process_item(item, spider=None).addCallback(results.append)
+
+    assert results == [item]
+    assert (item['claim_type'], item['target_year']) == ('water', '2030')
+    assert pipeline.executor is None
+
+
+def test_items_without_claim_text_pass_through():
+    pipeline = NLPExtractionPipeline(batch_size=1)
+    item = SustainabilityClaimItem(claim_text='')
+    assert pipeline.process_item(item, spider=None) is item
@@ -0,0 +1,90 @@
+import pytest
+from elasticsearch import NotFoundError
+from fastapi import HTTPException
+
+from api.pagination import (
+    START_CURSOR, check_offset, decode_cursor, encode_cursor, iter_hits, search_page
+)
+
+
+class FakePitES:
+    """Serves hits sorted by position, resuming after the sort value"""
+
+    def __init__(self, total):
+        self.docs = [{'_id': f'd{i}', 'sort': [i]} for i in range(total)]
+        self.open = set()
+        self.opened = 0
+        self.expired = False
+
+    def open_point_in_time(self, index, keep_alive, ignore_unavailable):
+        self.opened += 1
+        pit_id = f'pit{self.opened}'
+        self.open.add(pit_id)
+        return {'id': pit_id}
+
+    def close_point_in_time(self, id):
+        self.open.discard(id)
+
+    def search(self, query, size, sort, pit, search_after=None, **kwargs):
+        if self.expired or pit['id'] not in self.open:
+            raise NotFoundError(404, 'search_context_missing_exception', {})
+        start = search_after[0] + 1 if search_after else 0
+        return {'pit_id': pit['id'], 'hits': {'hits': self.docs[start:start + size]}}
+
+
+def test_cursor_round_trip():
+    token = encode_cursor('pit', [3, 'x'], 'abc')
+    assert '=' not in token
+    assert decode_cursor(token) == ('pit', [3, 'x'], 'abc')
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor('not-a-cursor')
+    assert error.value.status_code == 400
+
+
+def test_pages_walk_every_hit_and_close_the_pit():
+    es = FakePitES(5)
+    query = {'match_all': {}}
+    seen = []
+    cursor = START_CURSOR
+    while cursor:
+        response, cursor = search_page(es, 'ecotrace_claims', cursor, query, size=2)
+        seen.extend(hit['_id'] for hit in response['hits']['hits'])
+
+    assert seen == [f'd{i}' for i in range(5)]
+    assert es.open == set()
+
+
+def test_cursor_bound_to_its_query():
+    es = FakePitES(5)
+    _, cursor = search_page(es, 'ecotrace_claims', START_CURSOR, {'match_all': {}}, size=2)
+
+    with pytest.raises(HTTPException) as error:
+        search_page(es, 'ecotrace_claims', cursor, {'term': {'claim_type': 'water'}}, size=2)
+    assert error.value.status_code == 400
+
+
+def test_expired_cursor_is_gone():
+    es = FakePitES(5)
+    _, cursor = search_page(es, 'ecotrace_claims', START_CURSOR, {'match_all': {}}, size=2)
+    es.expired = True
+
+    with pytest.raises(HTTPException) as error:
+        search_page(es, 'ecotrace_claims', cursor, {'match_all': {}}, size=2)
+    assert error.value.status_code == 410
+
+
+def test_offset_past_result_window():
+    check_offset(9990, 10)
+    with pytest.raises(HTTPException) as error:
+        check_offset(9991, 10)
+    assert error.value.status_code == 400
+
+
+def test_iter_hits_streams_all_pages():
+    es = FakePitES(7)
+    hits = list(iter_hits(es, 'ecotrace_claims', {'match_all': {}}, batch_size=3))
+    assert [hit['_id'] for hit in hits] == [f'd{i}' for i in range(7)]
+    assert es.open == set()
@@ -0,0 +1,135 @@
+import pytest
+
+from api import partitions as api_partitions
+from ecotrace_crawler import partitions
+from ecotrace_crawler.partitions import first_partition, logical_index, partition_generation
+from ecotrace_crawler.storage import ElasticsearchSink, StorageRecord
+from es_fakes import FakeElasticsearch, patch_bulk
+
+ALIAS = 'ecotrace_news'
+
+
+def news(doc_id, title='Title'):
+    return StorageRecord('news', doc_id, {'article_id': doc_id, 'title': title})
+
+
+@pytest.fixture
+def es(monkeypatch):
+    es = FakeElasticsearch(hide_unrefreshed=True)
+    es.aliases[ALIAS] = [first_partition(ALIAS)]
+    es.data[first_partition(ALIAS)] = {}
+    patch_bulk(monkeypatch, es)
+    return es
+
+
+@pytest.fixture
+def sink(es):
+    sink = ElasticsearchSink(es)
+    sink.partitioned.add('news')
+    sink.write_partitions['news'] = first_partition(ALIAS)
+    return sink
+
+
+def stored_in(es, doc_id):
+    return sorted(index for index, docs in es.data.items() if doc_id in docs)
+
+
+def test_documents_in_older_partitions_are_rewritten_in_place(es, sink):
+    sink.write_batch([news('n1')])
+    es.indices.refresh(index=first_partition(ALIAS))
+    es.indices.rollover(alias=ALIAS)
+
+    sink.write_batch([news('n1', title='Updated')])
+
+    assert stored_in(es, 'n1') == ['ecotrace_news-000001']
+    assert es.data['ecotrace_news-000001']['n1']['title'] == 'Updated'
+
+
+def test_rollover_right_after_a_write_leaves_no_duplicate(es, sink):
+    sink.write_batch([news('n1'), news('n2')])
+    # Rolled over before the first partition refreshed: locate cannot see n1
+    es.indices.rollover(alias=ALIAS)
+
+    sink.write_batch([news('n1', title='Updated'), news('n3')])
+
+    assert stored_in(es, 'n1') == ['ecotrace_news-000002']
+    assert es.data['ecotrace_news-000002']['n1']['title'] == 'Updated'
+    assert stored_in(es, 'n2') == ['ecotrace_news-000001']
+    assert sink.write_partitions['news'] == 'ecotrace_news-000002'
+
+    # The previous partition was refreshed, so later batches find n2 there
+    sink.write_batch([news('n2', title='Updated')])
+    assert stored_in(es, 'n2') == ['ecotrace_news-000001']
+
+
+def test_no_refresh_without_a_rollover(es, sink):
+    sink.write_batch([news('n1')])
+    sink.write_batch([news('n2')])
+    assert es.indices.refreshes == []
+
+
+def test_rewrites_in_remapped_or_shrunken_copies_are_not_a_rollover(es, sink):
+    sink.write_partitions['news'] = 'ecotrace_news-000002'
+    sink.follow_rollover({'ecotrace_news-r20240101235959': ['n1'], 'shrink-ab12-ecotrace_news-000001': ['n2']})
+
+    assert sink.write_partitions['news'] == 'ecotrace_news-000002'
+    assert es.indices.refreshes == []
+
+
+def test_partition_generation():
+    names = ['ecotrace_news-000010', 'shrink-ab12-ecotrace_news-000002', 'ecotrace_news-r20240101235959',
+             'ecotrace_news-000009']
+    assert sorted(names, key=partition_generation) == [
+        'ecotrace_news-r20240101235959', 'shrink-ab12-ecotrace_news-000002', 'ecotrace_news-000009', 'ecotrace_news-000010',
+    ]
+
+
+def test_logical_index():
+    assert logical_index('ecotrace_news-000003') == ALIAS
+    assert logical_index('shrink-ab12-ecotrace_news-000001') == ALIAS
+    assert logical_index('ecotrace_claims') == 'ecotrace_claims'
+
+
+class FieldCaps:
+    def __init__(self):
+        self.calls = 0
+
+    def field_caps(self, **kwargs):
+        self.calls += 1
+        return {'indices': ['ecotrace_news-000002']}
+
+
+@pytest.fixture
+def field_caps():
+    api_partitions.partition_cache.clear()
+    yield FieldCaps()
+    api_partitions.partition_cache.clear()
+
+
+def test_closed_ranges_are_cached(field_caps):
+    for _ in range(2):
+        assert api_partitions.partitions_for(field_caps, ALIAS, '2024-01-01', '2024-01-31') == ['ecotrace_news-000002']
+    assert field_caps.calls == 1
+
+
+def test_open_ended_ranges_are_not_cached(field_caps):
+    # New partitions and documents keep arriving at the open end
+    for _ in range(2):
+        api_partitions.partitions_for(field_caps, ALIAS, '2024-01-01', None)
+    assert field_caps.calls == 2
+
+
+def test_unbounded_or_unpartitioned_searches_use_the_index(field_caps):
+    assert api_partitions.partitions_for(field_caps, ALIAS) == [ALIAS]
+    assert api_partitions.partitions_for(field_caps, 'ecotrace_claims', '2024-01-01', '2024-01-31') == ['ecotrace_claims']
+    assert field_caps.calls == 0
+
+
+@pytest.mark.parametrize('name', [
+    'ecotrace_news-000003', 'shrink-ab12-ecotrace_news-000001', 'ecotrace_claims-r20240101000000',
+    'ecotrace_claims', 'ecotrace_news-12', 'ecotrace_news-r2024',
+])
+def test_api_and_crawler_agree_on_partition_names(name):
+    # The API does not import the crawler package, so each keeps a copy
+    assert api_partitions.PARTITION_NAME.pattern == partitions.PARTITION_NAME.pattern
+    assert api_partitions.logical_index(name) == logical_index(name)
@@ -0,0 +1,39 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.middleware import payload_sizes
+from api.projection import HEAVY_FIELDS, fields_param, project, source_filter
+
+
+def test_fields_param():
+    assert fields_param(None) is None
+    assert fields_param(' , ') is None
+    assert fields_param('claim_id, claim_text,') == ['claim_id', 'claim_text']
+
+
+def test_endpoint_defaults():
+    assert 'claim_text' in source_filter('claims.list')['source_includes']
+    assert 'embedding' not in source_filter('claims.list')['source_includes']
+    assert source_filter('search') == {'source_excludes': HEAVY_FIELDS}
+
+
+def test_requested_fields_must_be_exposed():
+    assert source_filter('claims.list', ['claim_id']) == {'source_includes': ['claim_id']}
+    assert source_filter('search', ['title']) == {'source_includes': ['title']}
+
+    for endpoint, fields in (('claims.list', ['embedding']), ('search', ['content'])):
+        with pytest.raises(HTTPException) as error:
+            source_filter(endpoint, fields)
+        assert error.value.status_code == 400
+
+
+def test_project():
+    assert project({'a': 1, 'b': 2}, ['a', 'c']) == {'a': 1, 'c': None}
+
+
+def test_payload_sizes_recorded_per_route():
+    response = TestClient(app).get('/')
+    summary = payload_sizes.summary()['GET /']
+    assert summary['max_bytes'] >= len(response.content)
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import main
+from ecotrace_crawler.projector import STATE_COLLECTION, OutboxProjector
+from ecotrace_crawler.storage import OUTBOX_COLLECTION, Sink
+from mongo_fakes import Database
+
+
+class Recording(Sink):
+    name = 'elasticsearch'
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def write_batch(self, records):
+        if self.fail:
+            raise RuntimeError('down')
+        self.batches.append(records)
+
+
+def queue(db, kind, doc_id, created_at=None, **extra):
+    db[OUTBOX_COLLECTION].insert_one({
+        'kind': kind, 'doc_id': doc_id, 'created_at': created_at or datetime.utcnow(), **extra,
+    })
+
+
+@pytest.fixture
+def db():
+    db = Database()
+    db['news'].insert_many([
+        {'article_id': 'n1', 'title': 'First'},
+        {'article_id': 'n2', 'title': 'Second'},
+    ])
+    return db
+
+
+def projector(db, sink, **kwargs):
+    return OutboxProjector(db, {'elasticsearch': sink}, **kwargs)
+
+
+def test_load_collapses_entries_and_skips_deleted_documents(db):
+    entries = [
+        {'kind': 'news', 'doc_id': 'n1'},
+        {'kind': 'news', 'doc_id': 'n1'},
+        {'kind': 'news', 'doc_id': 'gone'},
+        {'kind': 'news', 'doc_id': None, 'doc': {'title': 'No id'}},
+    ]
+    records = projector(db, Recording()).load(entries)
+
+    assert sorted(record.doc['title'] for record in records) == ['First', 'No id']
+    assert all('_id' not in record.doc for record in records)
+
+
+def test_project_once_drains_the_outbox_and_reports(db):
+    queue(db, 'news', 'n1')
+    queue(db, 'news', 'n2')
+    sink = Recording()
+    p = projector(db, sink)
+
+    assert p.project_once() == 2
+    assert [record.doc_id for batch in sink.batches for record in batch] == ['n1', 'n2']
+    assert db[OUTBOX_COLLECTION].docs == []
+
+    state = db[STATE_COLLECTION].find_one({'_id': 'outbox'})
+    assert state['backlog'] == 0 and state['projected_total'] == 2
+    assert state['last_batch']['documents'] == 2
+    assert p.project_once() == 0
+
+
+def test_failed_projection_without_deadletter_keeps_entries(db):
+    queue(db, 'news', 'n1')
+    with pytest.raises(RuntimeError):
+        projector(db, Recording(fail=True)).project_once()
+    assert len(db[OUTBOX_COLLECTION].docs) == 1
+
+
+def test_rebuild_keeps_entries_queued_after_it_started(db):
+    queue(db, 'news', 'n1', created_at=datetime.utcnow() - timedelta(minutes=1))
+    # Written during the rebuild by another process, with a smaller ObjectId
+    queue(db, 'news', 'n2', created_at=datetime.utcnow() + timedelta(minutes=1), _id=0)
+    sink = Recording()
+
+    result = projector(db, sink).rebuild(kinds=['news'])
+
+    assert result['documents'] == 2 and result['failed_batches'] == 0
+    assert [entry['doc_id'] for entry in db[OUTBOX_COLLECTION].docs] == ['n2']
+
+
+def test_lag_is_the_age_of_the_oldest_entry(db):
+    queue(db, 'news', 'n1', created_at=datetime.utcnow() - timedelta(seconds=30))
+    lag = projector(db, Recording()).lag()
+    assert lag['backlog'] == 1
+    assert 29 <= lag['lag_seconds'] <= 31
+
+
+class Client:
+    def __init__(self, db):
+        self.db = db
+
+    def __getitem__(self, name):
+        return self.db
+
+    def close(self):
+        pass
+
+
+def test_metrics_serve_the_projector_state(db, monkeypatch):
+    queue(db, 'news', 'n1', created_at=datetime.utcnow() - timedelta(seconds=30))
+    projector(db, Recording()).report(0)
+    monkeypatch.setattr(main, 'get_mongodb', lambda: Client(db))
+
+    body = TestClient(main.app).get('/api/metrics/projection').json()
+
+    assert body['backlog'] == 1 and 29 <= body['lag_seconds'] <= 31
+    assert body['state_age_seconds'] < 5
+    assert body['sinks'].keys() == {'elasticsearch'}
+
+
+def test_metrics_before_the_projector_ran(monkeypatch):
+    monkeypatch.setattr(main, 'get_mongodb', lambda: Client(Database()))
+    assert TestClient(main.app).get('/api/metrics/projection').status_code == 404
@@ -0,0 +1,66 @@
+import pytest
+from fastapi import HTTPException
+
+from api.query_builder import build_filtered_query, build_search, filter_clauses, index_clause
+
+
+def test_unknown_filters_are_rejected():
+    with pytest.raises(HTTPException) as error:
+        build_search('net zero', filters={'claim_text': 'x'})
+    assert error.value.status_code == 400
+    assert 'claim_text' in error.value.detail
+
+
+def test_filters_use_keyword_fields_per_index():
+    filters = {'company_name': ['Acme', 'Beta'], 'sentiment': None}
+    assert filter_clauses('ecotrace_news', filters) == [
+        {'terms': {'company_mentions.keyword': ['Acme', 'Beta']}}
+    ]
+    assert filter_clauses('ecotrace_companies', {'sentiment': 'negative'}) is None
+
+
+def test_indices_a_filter_cannot_apply_to_are_dropped():
+    targets, query = build_search('greenwashing', filters={'sentiment': 'negative'})
+    assert targets == ['ecotrace_news']
+    # A single index needs no _index clause
+    assert query == {'bool': {
+        'must': [{'multi_match': {'query': 'greenwashing', 'fields': ['title^2', 'summary', 'content']}}],
+        'filter': [{'term': {'sentiment.keyword': 'negative'}}],
+    }}
+
+
+def test_multi_index_search_scopes_fields_and_filters():
+    targets, query = build_search('acme', indices=['ecotrace_claims', 'ecotrace_news'],
+                                  filters={'company_name': 'Acme'}, fuzziness='AUTO')
+    assert targets == ['ecotrace_claims', 'ecotrace_news']
+
+    claims, news = query['bool']['should']
+    assert claims['bool']['must'][0]['multi_match'] == {
+        'query': 'acme', 'fields': ['company_name^3', 'claim_text^2'], 'fuzziness': 'AUTO'
+    }
+    assert claims['bool']['filter'] == [
+        {'term': {'_index': 'ecotrace_claims'}},
+        {'term': {'company_name.keyword': 'Acme'}},
+    ]
+    assert news['bool']['filter'][0] == index_clause('ecotrace_news')
+
+
+def test_date_range_drops_undated_indices():
+    targets, query = build_search('acme', date_from='2024-01-01')
+    assert 'ecotrace_companies' not in targets
+    claims = query['bool']['should'][targets.index('ecotrace_claims')]
+    assert {'range': {'extracted_at': {'gte': '2024-01-01'}}} in claims['bool']['filter']
+
+
+def test_no_applicable_index():
+    with pytest.raises(HTTPException):
+        build_search('acme', indices=['ecotrace_companies'], filters={'journal': 'Nature'})
+
+
+def test_filtered_query_for_lists():
+    assert build_filtered_query('ecotrace_claims', {}) == {'match_all': {}}
+    assert build_filtered_query('ecotrace_claims', {'claim_type': 'water'}, [{'exists': {'field': 'unit'}}]) == {
+        'bool': {'filter': [{'term': {'claim_type.keyword': 'water'}}, {'exists': {'field': 'unit'}}]}
+    }
+    with pytest.raises(HTTPException):
+        build_filtered_query('ecotrace_claims', {'journal': 'Nature'})
@@ -0,0 +1,101 @@
+import pytest
+
+from ecotrace_crawler import reconciler
+from ecotrace_crawler.reconciler import Reconciler, bucket_of
+from mongo_fakes import Database
+
+
+class InMemory(Reconciler):
+    """Scans {store: {id: doc}} instead of the datastores"""
+
+    def __init__(self, stores, **kwargs):
+        super().__init__({name: object() for name in stores}, **kwargs)
+        self.data = stores
+        self.scans = []
+
+    def scan(self, store, kind):
+        self.scans.append(store)
+        return iter(self.data[store].items())
+
+
+def news(title, **extra):
+    return {'title': title, 'source': 'Reuters', 'url': f'https://example.com/{title}', **extra}
+
+
+def corpus(n=50):
+    return {f'n{i}': news(f't{i}') for i in range(n)}
+
+
+def test_identical_stores_have_no_differences():
+    r = InMemory({'mongodb': corpus(), 'elasticsearch': corpus(), 'neo4j': corpus()}, buckets=16)
+    assert r.diff('news') == {
+        'elasticsearch': {'missing': [], 'extra': [], 'changed': []},
+        'neo4j': {'missing': [], 'extra': [], 'changed': []},
+    }
+    # Matching digests mean no document-level pass
+    assert r.scans == ['mongodb', 'elasticsearch', 'neo4j']
+
+
+def test_missing_extra_and_changed_documents():
+    es = corpus()
+    del es['n3']
+    es['stray'] = news('stray')
+    es['n7'] = news('t7', sentiment='negative')
+
+    r = InMemory({'mongodb': corpus(), 'elasticsearch': es}, buckets=16)
+    assert r.diff('news') == {'elasticsearch': {'missing': ['n3'], 'extra': ['stray'], 'changed': ['n7']}}
+
+
+def test_unset_and_empty_fields_compare_equal():
+    mongo = {'n1': news('a', sentiment=None)}
+    es = {'n1': news('a', sentiment='')}
+    assert InMemory({'mongodb': mongo, 'elasticsearch': es}).diff('news')['elasticsearch']['changed'] == []
+
+
+def test_only_differing_buckets_are_compared_per_document(monkeypatch):
+    es = corpus(200)
+    es['n5'] = news('edited')
+    r = InMemory({'mongodb': corpus(200), 'elasticsearch': es}, buckets=64)
+    hashed = []
+    monkeypatch.setattr(reconciler, 'doc_hash', lambda doc_id, doc, fields: hashed.append(doc_id) or hash(str(doc)))
+
+    assert r.diff('news')['elasticsearch']['changed'] == ['n5']
+
+    # Both digests hash everything; the second pass only n5's bucket, in each store
+    in_bucket = sum(bucket_of(f'n{i}', 64) == bucket_of('n5', 64) for i in range(200))
+    assert len(hashed) == 400 + 2 * in_bucket
+
+
+def test_neo4j_is_skipped_for_kinds_it_does_not_hold():
+    r = InMemory({'mongodb': {}, 'elasticsearch': {}, 'neo4j': {}})
+    assert r.stores('regulatory') == ['elasticsearch']
+
+
+def test_needs_mongodb():
+    with pytest.raises(ValueError):
+        Reconciler({'elasticsearch': object()})
+
+
+class Sink:
+    def __init__(self, db=None):
+        self.db = db
+        self.written = []
+        self.deleted = []
+
+    def write_batch(self, records):
+        self.written.extend(record.doc_id for record in records)
+
+    def delete_batch(self, kind, ids):
+        self.deleted.extend(ids)
+
+
+def test_repair_rewrites_from_mongodb_and_deletes_extras():
+    db = Database()
+    db['news'].insert_many([{'article_id': 'n1', 'title': 'a'}, {'article_id': 'n2', 'title': 'b'}])
+    es = Sink()
+    r = Reconciler({'mongodb': Sink(db), 'elasticsearch': es}, batch_size=1)
+
+    repaired = r.repair('news', {'elasticsearch': {'missing': ['n1'], 'extra': ['x'], 'changed': ['n2']}})
+
+    assert repaired == {'elasticsearch': {'rewritten': 2, 'deleted': 1}}
+    assert es.written == ['n1', 'n2'] and es.deleted == ['x']
@@ -0,0 +1,148 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from api.routes import analytics
+from ecotrace_crawler.items import SustainabilityClaimItem
+from ecotrace_crawler.pipelines import RollupPipeline
+from ecotrace_crawler.rollups import DailyRollup, rollup_day
+from ecotrace_crawler.storage import ElasticsearchSink, StorageRecord
+from es_fakes import FakeElasticsearch, patch_bulk
+
+
+@pytest.fixture
+def es(monkeypatch):
+    es = FakeElasticsearch()
+    patch_bulk(monkeypatch, es)
+    return es
+
+
+def claim(extracted_at, claim_type='emissions', claim_id='c1', company='Acme'):
+    return StorageRecord('claims', claim_id, {
+        'claim_id': claim_id, 'company_name': company, 'claim_type': claim_type,
+        'claim_text': 'Cut emissions 42%', 'extracted_at': extracted_at,
+    })
+
+
+def totals(es, dataset='claims'):
+    """{day: count} of the overall counters"""
+    days = {}
+    for source in es.docs('ecotrace_rollups_daily').values():
+        if source.get('dataset') == dataset and 'company' not in source:
+            days[source['date']] = days.get(source['date'], 0) + source['count']
+    return days
+
+
+def test_recrawled_claims_keep_their_day(es):
+    sink = ElasticsearchSink(es)
+    rollup = DailyRollup(es)
+
+    sink.write_batch([claim('2024-01-01T09:00:00.000Z')])
+    rollup.update(kinds=['claims'], full=True)
+    assert totals(es) == {'2024-01-01': 1}
+
+    # Re-crawled four days later: extracted_at moves, the claim does not
+    sink.write_batch([claim('2024-01-05T09:00:00.000Z')])
+    stored = es.docs('ecotrace_claims')['c1']
+    assert stored['extracted_at'] == '2024-01-05T09:00:00.000Z'
+    assert stored['first_seen_at'] == '2024-01-01T09:00:00.000Z'
+
+    rollup.refresh({'claims': {'2024-01-05'}})             # what the crawl marks dirty
+    rollup.update(kinds=['claims'], since='2024-01-05')     # what `scrapy rollup` rebuilds
+    assert totals(es) == {'2024-01-01': 1}
+
+
+def test_claims_stored_before_first_seen_count_on_extracted_at(es):
+    es.index(index='ecotrace_claims', id='old', document=claim('2023-12-01T00:00:00.000Z', claim_id='old').doc)
+    rollup = DailyRollup(es)
+
+    rollup.update(kinds=['claims'], full=True)
+    assert totals(es) == {'2023-12-01': 1}
+
+    ElasticsearchSink(es).write_batch([claim('2024-02-01T00:00:00.000Z', claim_id='old')])
+    assert es.docs('ecotrace_claims')['old']['first_seen_at'] == '2023-12-01T00:00:00.000Z'
+    rollup.update(kinds=['claims'], full=True)
+    assert totals(es) == {'2023-12-01': 1}
+
+
+def test_first_seen_is_looked_up_once_per_batch(es):
+    ElasticsearchSink(es).write_batch([claim('2024-01-01', claim_id=f'c{i}') for i in range(3)])
+    assert [call[0] for call in es.calls] == ['mget']
+    assert {source['first_seen_at'] for source in es.docs('ecotrace_claims').values()} == {'2024-01-01'}
+
+
+def test_emptied_days_lose_their_counters(es):
+    sink = ElasticsearchSink(es)
+    rollup = DailyRollup(es)
+    sink.write_batch([claim('2024-01-01', claim_type='water')])
+    rollup.update(kinds=['claims'], full=True)
+
+    del es.docs('ecotrace_claims')['c1']
+    rollup.refresh({'claims': {'2024-01-01'}})
+    assert totals(es) == {}
+
+
+def test_news_counts_per_sentiment_and_company(es):
+    for i, (day, sentiment) in enumerate([('2024-03-01', 'positive'), ('2024-03-01', None), ('2024-03-02', 'negative')]):
+        es.index(index='ecotrace_news', id=f'n{i}', document={
+            'published_date': f'{day}T10:00:00.000Z', 'crawled_at': f'{day}T11:00:00.000Z',
+            'sentiment': sentiment, 'company_mentions': ['Acme', 'Globex'],
+        })
+    DailyRollup(es).update(kinds=['news'], full=True)
+
+    rows = [source for source in es.docs('ecotrace_rollups_daily').values() if source.get('dataset') == 'news']
+    overall = {(row['date'], row['value']): row['count'] for row in rows if 'company' not in row}
+    assert overall == {('2024-03-01', 'positive'): 1, ('2024-03-01', 'unknown'): 1, ('2024-03-02', 'negative'): 1}
+    assert sum(row['count'] for row in rows if row.get('company') == 'Globex') == 3
+
+
+def test_pipeline_marks_the_crawl_day_dirty():
+    pipeline = RollupPipeline()
+    pipeline.rollup = object()
+    pipeline.process_item(SustainabilityClaimItem(claim_id='c1', extracted_at='2024-01-05T09:00:00.000Z'), None)
+    assert pipeline.dirty == {'claims': {'2024-01-05'}}
+
+
+def test_rollup_day():
+    assert rollup_day('2024-01-05T09:00:00.000Z') == '2024-01-05'
+    assert rollup_day(None) is None and rollup_day('soon') is None
+
+
+class TrendES:
+    """Answers trend searches; the rollup watermark exists only once rolled up"""
+
+    def __init__(self, rolled_up):
+        self.rolled_up = rolled_up
+        self.searched = []
+
+    def get(self, index, id):
+        if not self.rolled_up:
+            raise KeyError(id)
+        return {'_source': {'rolled_at': '2024-01-01T00:00:00'}}
+
+    def search(self, index, query, aggs, **kwargs):
+        self.searched.append(index)
+        day = {'key_as_string': '2024-01-01', 'doc_count': 2,
+               'total': {'value': 2}, 'values': {'buckets': [
+                   {'key': 'water', 'doc_count': 2, 'total': {'value': 2}}]}}
+        top = {'key': 'water', 'doc_count': 2, 'total': {'value': 2}}
+        return {'aggregations': {'over_time': {'buckets': [day]}, 'top_values': {'buckets': [top]}}}
+
+
+@pytest.fixture
+def trends(monkeypatch):
+    analytics.rollup_cache.clear()
+    yield lambda es: monkeypatch.setattr(analytics, 'get_elasticsearch', lambda: es)
+    analytics.rollup_cache.clear()
+
+
+@pytest.mark.parametrize('rolled_up, index', [(False, 'ecotrace_claims'), (True, 'ecotrace_rollups_daily')])
+def test_trends_read_the_raw_index_until_rolled_up(trends, rolled_up, index):
+    es = TrendES(rolled_up)
+    trends(es)
+
+    body = TestClient(app).get('/api/analytics/trends?days=7').json()
+
+    assert es.searched == [index]
+    assert body['timeline'] == [{'date': '2024-01-01', 'count': 2, 'by_type': {'water': 2}}]
+    assert body['trending_claim_types'] == {'water': 2}
@@ -0,0 +1,27 @@
+import orjson
+from pydantic import BaseModel, Field
+
+from api.models import SustainabilityClaim
+from api.serialization import construct_rows, trusted_response
+
+
+def test_rows_match_validated_models():
+    source = {'claim_id': 'c1', 'company_id': 'acme', 'company_name': 'Acme', 'claim_text': 'Net zero',
+              'normalized_value': 50.0, 'embedding': [0.1, 0.2]}
+    row, = construct_rows(SustainabilityClaim, [source])
+    assert row == SustainabilityClaim(**source).model_dump()
+
+
+def test_missing_required_fields_serialise_as_null():
+    row, = construct_rows(SustainabilityClaim, [{'claim_id': 'c1'}])
+    assert row['company_name'] is None
+    assert orjson.loads(orjson.dumps(row))['claim_text'] is None
+    assert trusted_response([row]).status_code == 200
+
+
+def test_default_factories_are_called():
+    class Tagged(BaseModel):
+        name: str
+        tags: list = Field(default_factory=list)
+
+    assert construct_rows(Tagged, [{'name': 'a'}]) == [{'name': 'a', 'tags': []}]
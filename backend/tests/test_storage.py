@@ -0,0 +1,165 @@
+import pytest
+from pymongo.errors import BulkWriteError
+
+from ecotrace_crawler import storage
+from ecotrace_crawler.items import SustainabilityClaimItem
+from ecotrace_crawler.storage import (
+    ElasticsearchSink, MongoSink, Neo4jSink, Sink, SinkError, SinkStats, StorageRecord,
+    route_item, route_record, timed_write
+)
+from es_fakes import FakeElasticsearch
+
+
+def record(kind, doc_id, **doc):
+    return StorageRecord(kind, doc_id, {**doc})
+
+
+def test_route_item_by_class():
+    assert route_item(SustainabilityClaimItem()) == ('claims', 'claim_id')
+    assert route_item(object()) is None
+
+
+@pytest.mark.parametrize('doc, route', [
+    ({'item_type': 'NewsArticleItem', 'company_id': 'acme'}, ('news', 'article_id')),
+    ({'_type': 'CompanyItem'}, ('companies', 'company_id')),
+    ({'item_type': 'Unknown'}, None),
+    # Claims and regulatory records also carry company_id
+    ({'claim_id': 'c1', 'company_id': 'acme'}, ('claims', 'claim_id')),
+    ({'record_id': 'r1', 'company_id': 'acme'}, ('regulatory', 'record_id')),
+    ({'company_id': 'acme'}, ('companies', 'company_id')),
+    ({'title': 'orphan'}, None),
+])
+def test_route_record(doc, route):
+    assert route_record(doc) == route
+
+
+def test_sinks_must_implement_write_batch():
+    with pytest.raises(TypeError):
+        Sink()
+
+
+class BulkStub:
+    """helpers.streaming_bulk failing the given items"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.actions = None
+
+    def __call__(self, es, actions, **kwargs):
+        self.actions = list(actions)
+        failed = {next(iter(error.values()))['_id'] for error in self.errors}
+        for error in self.errors:
+            yield False, error
+        for action in self.actions:
+            if action['_id'] not in failed:
+                yield True, {'index': {'_index': action['_index'], '_id': action['_id']}}
+
+
+def test_elasticsearch_partial_failure_names_failed_records(monkeypatch):
+    bulk = BulkStub([
+        {'index': {'_index': 'ecotrace_news-000002', '_id': 'n2', 'error': {'type': 'mapper_parsing_exception'}}},
+        {'index': {'_index': 'ecotrace_news-000001', '_id': 'n3', 'error': {'type': 'cluster_block_exception'}}},
+    ])
+    monkeypatch.setattr(storage.helpers, 'streaming_bulk', bulk)
+    records = [record('news', 'n1'), record('news', 'n2'), record('news', 'n3'), record('claims', 'n2')]
+
+    with pytest.raises(SinkError) as error:
+        ElasticsearchSink(es=FakeElasticsearch()).write_batch(records)
+
+    # Partition names map back to their alias; read-only partitions are not failures
+    assert [(failed.kind, failed.doc_id) for failed, _ in error.value.failed] == [('news', 'n2')]
+    assert 'mapper_parsing_exception' in error.value.failed[0][1]
+    assert error.value.sink == 'elasticsearch'
+
+
+def test_elasticsearch_read_only_partitions_are_not_failures(monkeypatch):
+    monkeypatch.setattr(storage.helpers, 'streaming_bulk', BulkStub([
+        {'index': {'_index': 'ecotrace_news-000001', '_id': 'n1', 'error': {'type': 'cluster_block_exception'}}},
+    ]))
+    ElasticsearchSink(es=None).write_batch([record('news', 'n1')])
+
+
+class Collection:
+    def __init__(self, failing=()):
+        self.failing = failing
+        self.operations = []
+        self.inserted = []
+
+    def bulk_write(self, operations, ordered):
+        self.operations.extend(operations)
+        if self.failing:
+            raise BulkWriteError({'writeErrors': [{'index': i, 'errmsg': 'duplicate key'} for i in self.failing]})
+
+    def insert_many(self, documents, ordered):
+        self.inserted.extend(documents)
+
+
+class MongoStub(dict):
+    def __missing__(self, name):
+        self[name] = Collection()
+        return self[name]
+
+
+def test_mongo_partial_failure_only_queues_written_records():
+    sink = MongoSink({'ecotrace': MongoStub()}, outbox=True)
+    sink.db['claims'] = Collection(failing=[1])
+    records = [record('claims', 'c1'), record('claims', 'c2'), record('news', 'n1')]
+
+    with pytest.raises(SinkError) as error:
+        sink.write_batch(records)
+
+    assert error.value.failed == [(records[1], 'duplicate key')]
+    assert [(entry['kind'], entry['doc_id']) for entry in sink.db['outbox'].inserted] == [('claims', 'c1'), ('news', 'n1')]
+
+
+class Neo4jStub:
+    def __init__(self, failing_kind):
+        self.failing_kind = failing_kind
+        self.rows = {}
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, work):
+        return work(self)
+
+    def run(self, query, rows):
+        kind = next(kind for kind, text in Neo4jSink.QUERIES.items() if text == query)
+        if kind == self.failing_kind:
+            raise RuntimeError('deadlock')
+        self.rows[kind] = rows
+        return self
+
+    def consume(self):
+        return None
+
+
+def test_neo4j_failure_is_per_kind():
+    driver = Neo4jStub(failing_kind='claims')
+    records = [record('claims', 'c1', claim_id='c1'),
+               record('news', 'n1', article_id='n1', company_mentions=['Acme', '', 'Beta']),
+               record('regulatory', 'r1')]
+
+    with pytest.raises(SinkError) as error:
+        Neo4jSink(driver).write_batch(records)
+
+    assert [failed.doc_id for failed, _ in error.value.failed] == ['c1']
+    assert driver.rows['news'][0]['mentions'] == ['Acme', 'Beta']
+    assert 'regulatory' not in driver.rows
+
+
+def test_timed_write_records_failures():
+    class Failing(Sink):
+        def write_batch(self, records):
+            raise SinkError('failing', [(records[0], 'down')])
+
+    stats = SinkStats()
+    with pytest.raises(SinkError):
+        timed_write(Failing(), stats, [record('news', 'n1')])
+    assert (stats.summary()['batches'], stats.summary()['errors']) == (1, 1)
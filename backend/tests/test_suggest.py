@@ -0,0 +1,87 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+from api import cache
+from api.cache import TTLCache, cached
+from api.main import app
+from api.metrics import LatencyTracker
+from api.routes import search
+
+
+def test_ttl_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    ttl = TTLCache(maxsize=2, ttl=10)
+
+    ttl.set('a', 1)
+    ttl.set('b', 2)
+    assert ttl.get('a') == 1          # a is now most recently used
+    ttl.set('c', 3)
+    assert ttl.get('b') is None
+    assert len(ttl) == 2
+
+    now[0] = 111.0
+    assert ttl.get('a') is None
+    assert ttl.get('c') is None
+
+
+def test_concurrent_calls_share_one_backend_request():
+    calls = []
+
+    @cached(TTLCache(), key_func=lambda prefix: prefix)
+    async def fetch(prefix):
+        calls.append(prefix)
+        await asyncio.sleep(0.01)
+        return [prefix.upper()]
+
+    async def run():
+        first = await asyncio.gather(fetch('ac'), fetch('ac'), fetch('ex'))
+        return first, await fetch('ac')
+
+    first, again = asyncio.run(run())
+
+    assert sorted(calls) == ['ac', 'ex']
+    assert first == [(['AC'], False), (['AC'], True), (['EX'], False)]
+    assert again == (['AC'], True)
+
+
+def test_latency_percentiles():
+    tracker = LatencyTracker(target_p99_ms=50)
+    for ms in range(1, 101):
+        tracker.record(ms)
+    summary = tracker.summary()
+    assert (summary['p50_ms'], summary['p99_ms']) == (51.0, 99.0)
+    assert summary['within_target'] is False
+
+
+class FakeES:
+    def __init__(self):
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def msearch(self, searches):
+        with self.lock:
+            self.calls += 1
+        assert searches[0] == {'index': 'ecotrace_companies'}
+        assert searches[1]['suggest']['s']['prefix'] == 'ac'
+        return {'responses': [{'suggest': {'s': [{'options': [
+            {'text': 'Acme', '_index': 'ecotrace_companies', '_source': {'company_id': 'c1'}},
+        ]}]}}]}
+
+
+def test_suggest_route_caches_by_prefix(monkeypatch):
+    es = FakeES()
+    monkeypatch.setattr(search, 'get_elasticsearch', lambda: es)
+    search.suggest_cache.clear()
+    client = TestClient(app)
+
+    first = client.get('/api/search/suggest?q=AC&types=company')
+    second = client.get('/api/search/suggest?q=ac%20&types=company')
+
+    assert first.status_code == 200
+    assert first.json()['suggestions'] == [{'text': 'Acme', 'type': 'company', 'id': 'c1', 'index': 'ecotrace_companies'}]
+    assert (first.json()['cached'], second.json()['cached']) == (False, True)
+    assert es.calls == 1
+    assert 'max-age' in first.headers['cache-control']
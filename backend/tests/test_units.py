@@ -0,0 +1,103 @@
+import pytest
+
+from ecotrace_crawler.items import RegulatoryDataItem, SustainabilityClaimItem
+from ecotrace_crawler.mappings import index_mappings, mapping_conflicts
+from ecotrace_crawler.pipelines import UnitNormalizationPipeline
+from ecotrace_crawler.units import normalize_quantity, normalized_fields, parse_quantity
+
+
+@pytest.mark.parametrize('text, expected', [
+    # US short tons vs metric tonnes
+    ('100 tons', (90.7185, 'tonnes')),
+    ('100 tonnes', (100.0, 'tonnes')),
+    ('100 metric tons', (100.0, 'tonnes')),
+    # Mass followed by a greenhouse gas is CO2e
+    ('100 tonnes of CO2', (100.0, 'tCO2e')),
+    ('100 tonnes CO2e', (100.0, 'tCO2e')),
+    ('100 tons of greenhouse gas', (90.7185, 'tCO2e')),
+    ('100 tonnes of waste', (100.0, 'tonnes')),
+    ('5 MtCO2e', (5e6, 'tCO2e')),
+    # Scale words
+    ('1,200 million tons', (1200e6 * 0.907185, 'tonnes')),
+    ('3.5 billion gallons', (3.5e9 * 0.00378541, 'm3')),
+    ('250k MWh', (250e3, 'MWh')),
+    ('2 GW', (2000.0, 'MW')),
+    # Currency
+    ('$4.5 million', (4.5e6, 'USD')),
+    ('$300', (300.0, 'USD')),
+    ('42%', (42.0, 'percent')),
+    ('42', (42.0, None)),
+])
+def test_parse_quantity(text, expected):
+    value, unit = parse_quantity(text)
+    assert (pytest.approx(value), unit) == expected
+
+
+def test_require_unit_skips_bare_numbers():
+    assert parse_quantity('In 2030 we will cut 30% of waste', require_unit=True) == (30.0, 'percent')
+    assert parse_quantity('By 2030', require_unit=True) is None
+
+
+def test_unit_field_is_appended_to_bare_values():
+    assert normalize_quantity('1200', 'metric_tons_co2e') == (1200.0, 'tCO2e')
+    assert normalize_quantity('12 MW', 'tons') == (12.0, 'MW')
+
+
+def test_bare_value_takes_its_unit_from_the_same_number_in_context():
+    assert normalize_quantity('42', None, 'reduce emissions by 42% by 2030') == (42.0, 'percent')
+    assert normalize_quantity('1.5', None, 'invest $1.5 billion in 2025') == (1.5e9, 'USD')
+
+
+def test_scaled_value_is_matched_to_the_context_before_scaling():
+    assert normalize_quantity('1.2', 'million', 'cut 1.2 million tonnes of CO2') == (1.2e6, 'tCO2e')
+    # 1.2 tonnes is not 1.2 million of anything
+    assert normalize_quantity('1.2', 'million', 'cut 1.2 tonnes of CO2') == (1.2e6, None)
+
+
+def test_bare_value_not_in_context_stays_unitless():
+    # 20 is not the 2030 in the text, nor the 10 MW
+    assert normalize_quantity('20', None, 'add 10 MW by 2030') == (20.0, None)
+
+
+def test_context_fallback_without_a_value():
+    assert normalize_quantity(None, None, 'cut 2 million tonnes of CO2 by 2030') == (2e6, 'tCO2e')
+    assert normalize_quantity('', None, 'no numbers here') is None
+
+
+def test_normalized_fields_per_kind():
+    claim = {'numerical_value': '42', 'claim_text': 'Scope 1 emissions down 42% vs 2019'}
+    assert normalized_fields('claims', claim) == {'normalized_value': 42.0, 'normalized_unit': 'percent'}
+    assert normalized_fields('regulatory', {'value': 'n/a', 'unit': None}) == {
+        'normalized_value': None, 'normalized_unit': None,
+    }
+
+
+def test_pipeline_fills_claims_and_regulatory_items():
+    pipeline = UnitNormalizationPipeline()
+    claim = pipeline.process_item(SustainabilityClaimItem(
+        claim_id='c1', numerical_value='42', claim_text='cut emissions by 42% by 2030'
+    ), None)
+    record = pipeline.process_item(RegulatoryDataItem(record_id='r1', value='1,000', unit='tons'), None)
+
+    assert (claim['normalized_value'], claim['normalized_unit']) == (42.0, 'percent')
+    assert (record['normalized_value'], record['normalized_unit']) == (907.185, 'tonnes')
+
+
+class Indices:
+    def __init__(self, properties):
+        self.properties = properties
+
+    def get_mapping(self, index):
+        return {index: {'mappings': {'properties': self.properties}}}
+
+
+class ES:
+    def __init__(self, properties):
+        self.indices = Indices(properties)
+
+
+def test_years_indexed_as_text_conflict_with_the_integer_mapping():
+    es = ES({'target_year': {'type': 'text'}, 'baseline_year': {'type': 'long'}, 'normalized_value': {'type': 'float'}})
+    conflicts = mapping_conflicts(es, 'ecotrace_claims', index_mappings()['claims']['properties'])
+    # Numbers of another width are left as they are
+    assert conflicts == {'target_year': ('text', 'integer')}
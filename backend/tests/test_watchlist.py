@@ -0,0 +1,210 @@
+import socket
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from api.main import app
+from api.routes import watchlist as watch_routes
+from ecotrace_crawler import watchlist
+from ecotrace_crawler.storage import StorageRecord
+from ecotrace_crawler.watchlist import Watchlist, WebhookPusher
+from es_fakes import FakeElasticsearch, patch_bulk
+
+WATCH = {'name': 'Acme water', 'webhook_url': 'https://hooks.example.com/acme'}
+
+
+@pytest.fixture
+def es(monkeypatch):
+    es = FakeElasticsearch()
+    patch_bulk(monkeypatch, es)
+    es.indices.create(index='ecotrace_watchlist', mappings={'properties': {'query': {}, 'watch': {}, 'title': {}}})
+    es.index(index='ecotrace_watchlist', id='w1', document={'watch': WATCH})
+    return es
+
+
+@pytest.fixture
+def alerts(es):
+    alerts = Watchlist(es)
+    alerts.ensure_index()
+    return alerts
+
+
+def resolving_to(monkeypatch, module, address):
+    monkeypatch.setattr(module.socket, 'getaddrinfo', lambda host, port: [
+        (socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, 0))
+    ])
+
+
+class Webhook:
+    """Stands in for requests.post, failing while down"""
+
+    def __init__(self, monkeypatch):
+        self.calls = []
+        self.down = False
+        self.is_redirect = False
+        self.headers = {'location': 'http://169.254.169.254/'}
+        monkeypatch.setattr(watchlist.requests, 'post', self.post)
+
+    def post(self, url, json, timeout, allow_redirects=True):
+        assert not allow_redirects
+        if self.down:
+            raise ConnectionError('webhook down')
+        self.calls.append((url, [match['doc_id'] for match in json['matches']]))
+        return self
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    resolving_to(monkeypatch, watchlist, '93.184.216.34')
+    return Webhook(monkeypatch)
+
+
+def news(doc_id):
+    return StorageRecord('news', doc_id, {'article_id': doc_id, 'title': f'Acme water {doc_id}'})
+
+
+def percolating(alerts, *records):
+    alerts.percolate = lambda batch: [('w1', WATCH, record) for record in batch if record in records]
+    return alerts
+
+
+def delivered(es):
+    return {doc['doc_id']: doc['delivered'] for doc in es.docs('ecotrace_watch_matches').values()}
+
+
+def test_processing_records_matches_without_pushing(alerts, es, webhook):
+    matched, new_matches = percolating(alerts, news('n1')).process([news('n1'), news('n2')])
+
+    assert (matched, [match_id for match_id, _, _ in new_matches]) == (1, ['w1:news:n1'])
+    assert delivered(es) == {'n1': False}
+    assert webhook.calls == []
+
+
+def test_matches_recorded_on_an_earlier_crawl_are_not_new(alerts):
+    percolating(alerts, news('n1'))
+    alerts.process([news('n1')])
+    assert alerts.process([news('n1')]) == (1, [])
+
+
+def test_full_push_queue_does_not_block(alerts):
+    pusher = WebhookPusher(alerts, queue_size=1)
+    _, new_matches = percolating(alerts, news('n1'), news('n2')).process([news('n1'), news('n2')])
+
+    pusher.submit(new_matches[:1])
+    pusher.submit(new_matches[1:])
+    assert (pusher.queue.qsize(), pusher.deferred) == (1, 1)
+
+
+def test_queued_matches_are_pushed_in_the_background(alerts, es, webhook):
+    pusher = WebhookPusher(alerts, retry_interval=3600)
+    pusher.start()
+    _, new_matches = percolating(alerts, news('n1')).process([news('n1')])
+
+    pusher.submit(new_matches)
+    pusher.close(timeout=5)
+
+    assert webhook.calls == [(WATCH['webhook_url'], ['n1'])]
+    assert pusher.delivered == 1 and delivered(es) == {'n1': True}
+
+
+def test_undelivered_matches_are_retried(alerts, es, webhook):
+    webhook.down = True
+    _, new_matches = percolating(alerts, news('n1'), news('n2')).process([news('n1'), news('n2')])
+    pusher = WebhookPusher(alerts, retry_interval=0)
+    pusher.push(new_matches)
+    assert delivered(es) == {'n1': False, 'n2': False}
+
+    webhook.down = False
+    pusher.retry()
+    assert webhook.calls == [(WATCH['webhook_url'], ['n1', 'n2'])]
+    assert delivered(es) == {'n1': True, 'n2': True}
+    assert alerts.undelivered(older_than=0, max_age=3600) == []
+
+
+def test_recent_and_expired_matches_are_left_to_the_queue_and_dropped(alerts, es):
+    percolating(alerts, news('n1'), news('n2')).process([news('n1'), news('n2')])
+    es.docs('ecotrace_watch_matches')['w1:news:n2']['matched_at'] = '2000-01-01T00:00:00'
+
+    assert alerts.undelivered(older_than=300, max_age=3600) == []
+    assert [match_id for match_id, _, _ in alerts.undelivered(older_than=0, max_age=3600)] == ['w1:news:n1']
+
+
+def test_matches_of_deleted_watches_are_not_retried(alerts, es):
+    percolating(alerts, news('n1')).process([news('n1')])
+    del es.data['ecotrace_watchlist']['w1']
+    assert alerts.undelivered(older_than=0, max_age=3600) == []
+
+
+def test_watch_index_is_found_as_soon_as_it_exists():
+    es = FakeElasticsearch()
+    alerts = Watchlist(es)
+    assert alerts.fields() is None
+
+    es.indices.create(index='ecotrace_watchlist', mappings={'properties': {'query': {}, 'watch': {}, 'title': {}}})
+    assert alerts.fields() == {'title'}
+
+
+def test_webhooks_resolving_to_private_hosts_are_not_pushed(alerts, es, webhook, monkeypatch):
+    _, new_matches = percolating(alerts, news('n1')).process([news('n1')])
+    resolving_to(monkeypatch, watchlist, '10.1.2.3')
+
+    assert alerts.push(new_matches) == 0
+    assert webhook.calls == [] and delivered(es) == {'n1': False}
+
+
+def test_redirected_pushes_are_not_delivered(alerts, es, webhook):
+    _, new_matches = percolating(alerts, news('n1')).process([news('n1')])
+    webhook.is_redirect = True
+
+    assert alerts.push(new_matches) == 0
+    assert delivered(es) == {'n1': False}
+
+
+@pytest.mark.parametrize('url', [
+    'ftp://hooks.example.com/acme',
+    'http://127.0.0.1:8000/hook',
+    'http://localhost/hook',
+    'http://10.0.0.5/hook',
+    'http://192.168.1.20/hook',
+    'http://169.254.169.254/latest/meta-data',
+    'http://[::1]/hook',
+    'not a url',
+])
+def test_webhooks_must_be_public_http(url, monkeypatch):
+    monkeypatch.setattr(watch_routes, 'get_elasticsearch', lambda: pytest.fail('not validated'))
+    response = TestClient(app).post('/api/watchlist/', json={'name': 'Acme', 'query': 'water', 'webhook_url': url})
+    assert response.status_code == 422
+    assert not watchlist.is_public_url(url)
+
+
+def test_webhook_hosts_are_checked_by_their_addresses(monkeypatch):
+    resolving_to(monkeypatch, watch_routes, '10.1.2.3')
+    assert not watch_routes.is_public_host('internal.example.com')
+
+    resolving_to(monkeypatch, watch_routes, '93.184.216.34')
+    assert watch_routes.is_public_host('hooks.example.com')
+
+
+class WatchES(FakeElasticsearch):
+    def __init__(self):
+        super().__init__()
+        self.indices.put_mapping = lambda **kwargs: None
+
+
+def test_webhook_urls_are_not_returned(monkeypatch):
+    resolving_to(monkeypatch, watch_routes, '93.184.216.34')
+    es = WatchES()
+    monkeypatch.setattr(watch_routes, 'get_elasticsearch', lambda: es)
+    client = TestClient(app)
+
+    created = client.post('/api/watchlist/', json={**WATCH, 'query': 'water'})
+    assert created.status_code == 201
+    assert es.docs('ecotrace_watchlist')[created.json()['watch_id']]['watch']['webhook_url'] == WATCH['webhook_url']
+
+    listed = client.get('/api/watchlist/').json()
+    for watch in [created.json()] + listed:
+        assert 'webhook_url' not in watch and watch['has_webhook'] is True